@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Synthetic Importer Fixtures
+All4Yah Project
+
+Generates deterministic corpora in the exact formats the importers read,
+so the benchmarks run without the manuscripts/ checkouts:
+
+- lxx.csv            LXX_final_main.csv - book id, chapter, verse, text with
+                     word<S>num</S><m>morph</m> tags (import-lxx.py)
+- tbesh.txt          STEPBible TBESH / TBESG lexicon TSVs, preamble included
+- tbesg.txt          (lexicon_parser.py)
+- cross_refs.tsv     OpenBible.info cross-references (import-cross-references-rest.py)
+- oshb.sql           OSHB morphology UPDATE dump (import-oshb-rest-api.py)
+- targum.sql         Targum Onkelos INSERT dump (import-targum-rest-api.py)
+
+Words are built from Hebrew / Greek syllables with niqqud and polytonic
+accents, so normalization and gematria do realistic work. The same seed
+and scale always produce byte-identical files.
+
+Usage:
+  python3 benchmarks/fixtures.py                       # benchmarks/.fixtures, scale 1.0
+  python3 benchmarks/fixtures.py --scale 0.1 --out /tmp/fixtures
+"""
+
+import os
+import sys
+import json
+import random
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "database"))
+
+from versification import LXX_BOOK_IDS, OSIS_BOOK_CODES, OT_BOOKS
+
+# =============================================================================
+# Configuration
+# =============================================================================
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".fixtures")
+SEED = 4
+VERSES_PER_CHAPTER = 30
+
+# Rows generated at scale 1.0
+SIZES = {
+    'lxx': 20000,            # verses
+    'tbesh': 6000,           # Hebrew lexicon entries
+    'tbesg': 4000,           # Greek lexicon entries
+    'cross_refs': 50000,     # links
+    'oshb': 5000,            # verses
+    'targum': 5000,          # verses
+}
+FILES = {
+    'lxx': 'lxx.csv',
+    'tbesh': 'tbesh.txt',
+    'tbesg': 'tbesg.txt',
+    'cross_refs': 'cross_refs.tsv',
+    'oshb': 'oshb.sql',
+    'targum': 'targum.sql',
+}
+
+HEBREW_CONSONANTS = 'אבגדהוזחטיכלמנסעפצקרשת'
+HEBREW_FINALS = {'כ': 'ך', 'מ': 'ם', 'נ': 'ן', 'פ': 'ף', 'צ': 'ץ'}
+HEBREW_VOWELS = ['ָ', 'ַ', 'ֵ', 'ֶ', 'ִ', 'ֹ', 'ֻ', 'ְ', '']
+HEBREW_ACCENTS = ['֑', '֖', '֥', '֣', '']
+
+GREEK_SYLLABLES = ['λό', 'γος', 'θε', 'ός', 'ἀ', 'γά', 'πη', 'ἐν', 'ἀρ', 'χῇ', 'κύ', 'ρι', 'ος', 'πνεῦ',
+                   'μα', 'ἡ', 'μέ', 'ρᾳ', 'δό', 'ξα', 'εἰ', 'ρή', 'νη', 'σω', 'τη', 'ρί', 'ᾳ', 'ὕ', 'δωρ']
+GREEK_MORPHS = ['N-NSM', 'N-GSF', 'V-PAI-3S', 'V-AAI-3S', 'A-NSM', 'RA-NSM', 'C', 'P', 'D', 'RP-GS']
+TRANSLIT_SYLLABLES = ['sha', 'lôw', 'ru', 'wach', 'ba', 'râ', 'el', 'ô', 'hîym', 'dâ', 'bar', 'lo', 'gos',
+                      'the', 'os', 'a', 'ga', 'pē', 'kyr', 'i', 'pneu', 'ma', 'dox', 'ei', 'rē', 'nē']
+GLOSSES = ['father', 'spirit', 'peace', 'word', 'glory', 'to create', 'heaven', 'earth', 'light',
+           'water', 'to say', 'king', 'house', 'son', 'day', 'to go', 'love', 'faith', 'life', 'truth']
+LEXICON_MORPHS = {'hebrew': ['H:N-M', 'H:N-F', 'H:V', 'H:A', 'H:N-M-P', 'H:Prep', 'H:Conj'],
+                  'greek': ['G:N-M', 'G:N-F', 'G:V', 'G:A', 'G:ADV', 'G:CONJ', 'G:PREP']}
+OSHB_MORPHS = ['HNcmsa', 'HVqp3ms', 'HR/Ncfsa', 'HC/Vqw3ms', 'HTo', 'HNcmpa', 'HAamsa']
+
+OT_OSIS = sorted(name for name, code in OSIS_BOOK_CODES.items() if code in OT_BOOKS)
+NT_OSIS = sorted(name for name, code in OSIS_BOOK_CODES.items() if code not in OT_BOOKS)
+
+# =============================================================================
+# Words
+# =============================================================================
+
+def hebrew_word(rng, pointed=True):
+    letters = [rng.choice(HEBREW_CONSONANTS) for _ in range(rng.randint(2, 6))]
+    letters[-1] = HEBREW_FINALS.get(letters[-1], letters[-1])
+    if not pointed:
+        return ''.join(letters)
+    return ''.join(c + rng.choice(HEBREW_VOWELS) + rng.choice(HEBREW_ACCENTS) for c in letters)
+
+def greek_word(rng):
+    return ''.join(rng.choice(GREEK_SYLLABLES) for _ in range(rng.randint(1, 4)))
+
+def transliteration(rng):
+    return ''.join(rng.choice(TRANSLIT_SYLLABLES) for _ in range(rng.randint(1, 3)))
+
+def references(books, count):
+    """(book, chapter, verse) in canonical order across `books`."""
+    per_book = max(1, -(-count // len(books)))
+    refs = []
+    for book in books:
+        for i in range(per_book):
+            refs.append((book, i // VERSES_PER_CHAPTER + 1, i % VERSES_PER_CHAPTER + 1))
+            if len(refs) == count:
+                return refs
+    return refs
+
+# =============================================================================
+# Writers
+# =============================================================================
+
+def write_lxx(path, count, rng):
+    with open(path, 'w', encoding='utf-8') as f:
+        for book_id, chapter, verse in references(sorted(LXX_BOOK_IDS), count):
+            tokens = []
+            for _ in range(rng.randint(6, 24)):
+                token = f"{greek_word(rng)}<S>{rng.randint(1, 5624)}</S><m>{rng.choice(GREEK_MORPHS)}</m>"
+                if rng.random() < 0.05:
+                    token += f"<S>{rng.randint(1, 5624)}</S>"
+                tokens.append(token)
+            f.write(f"{book_id}\t{chapter}\t{verse}\t{' '.join(tokens)}\n")
+
+def write_lexicon(path, language, count, rng):
+    prefix = 'H' if language == 'hebrew' else 'G'
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("TBES - Translators Brief lexicon of Extended Strongs - STEPBible.org CC BY\n")
+        f.write("Synthetic benchmark fixture\n\n")
+        f.write("eStrong#\tdStrong\tuStrong\tWord\tTransliteration\tMorph\tGloss\tMeaning\n")
+        for n in range(1, count + 1):
+            word = hebrew_word(rng) if language == 'hebrew' else greek_word(rng)
+            gloss = rng.choice(GLOSSES)
+            definition = (f"<b>{gloss}</b><br>{' '.join(rng.choice(GLOSSES) for _ in range(rng.randint(4, 30)))}"
+                          f" <ref='Gen.1.{n % 31 + 1}'>Gen.1.{n % 31 + 1}</ref> &amp; related")
+            f.write(f"{prefix}{n:04d}\t{prefix}{n:04d}\t=\t{word}\t{transliteration(rng)}\t"
+                    f"{rng.choice(LEXICON_MORPHS[language])}\t{gloss}\t{definition}\n")
+            if rng.random() < 0.05:
+                f.write(f"{prefix}{n:04d}G =\t{prefix}{n:04d}G\t=\t{word}\t\t\t{gloss}\tdisambiguation\n")
+
+def osis_ref(rng):
+    book = rng.choice(OT_OSIS if rng.random() < 0.75 else NT_OSIS)
+    return f"{book}.{rng.randint(1, 20)}.{rng.randint(1, 25)}"
+
+def write_cross_refs(path, count, rng):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("From Verse\tTo Verse\tVotes\t#www.openbible.info CC-BY\n")
+        for _ in range(count):
+            target = osis_ref(rng)
+            if rng.random() < 0.2:
+                book, chapter, verse = target.split('.')
+                target += f"-{book}.{chapter}.{int(verse) + rng.randint(1, 5)}"
+            f.write(f"{osis_ref(rng)}\t{target}\t{rng.randint(-5, 400)}\n")
+
+def write_oshb(path, count, rng):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("-- OSHB morphology (synthetic benchmark fixture)\nBEGIN;\n\n")
+        for book, chapter, verse in references(sorted(OT_BOOKS), count):
+            words = [{
+                'index': i + 1,
+                'text': hebrew_word(rng),
+                'lemma': f"{rng.choice(['', 'b/', 'c/', 'l/'])}{rng.randint(1, 8674)}",
+                'morph': rng.choice(OSHB_MORPHS),
+                'id': f"01{chapter:03d}{verse:02d}{i:02d}",
+            } for i in range(rng.randint(5, 18))]
+            f.write(f"UPDATE verses\nSET morphology = '{json.dumps(words, ensure_ascii=False)}'::jsonb\n"
+                    f"WHERE manuscript_id = (SELECT id FROM manuscripts WHERE code = 'WLC')\n"
+                    f"  AND book = '{book}'\n  AND chapter = {chapter}\n  AND verse = {verse};\n\n")
+        f.write("COMMIT;\n")
+
+def write_targum(path, count, rng):
+    manuscript = "(SELECT id FROM manuscripts WHERE code = 'ONKELOS')"
+    with open(path, 'w', encoding='utf-8') as f:
+        chapter_rows = []
+        refs = references(['GEN', 'EXO', 'LEV', 'NUM', 'DEU'], count)
+        for n, (book, chapter, verse) in enumerate(refs):
+            text = ' '.join(hebrew_word(rng, pointed=rng.random() < 0.3) for _ in range(rng.randint(6, 20)))
+            if rng.random() < 0.02:
+                text += " ''"
+            chapter_rows.append(f"({manuscript}, '{book}', {chapter}, {verse}, '{text}')")
+            if n + 1 == len(refs) or refs[n + 1][:2] != (book, chapter):
+                f.write(f"\n-- Insert {book} {chapter} ({len(chapter_rows)} verses)\n"
+                        f"INSERT INTO verses (manuscript_id, book, chapter, verse, text)\nVALUES\n  "
+                        + ',\n  '.join(chapter_rows)
+                        + "\nON CONFLICT (manuscript_id, book, chapter, verse)\n"
+                          "DO UPDATE SET\n  text = EXCLUDED.text,\n  updated_at = NOW();\n")
+                chapter_rows = []
+
+def generate(out_dir=FIXTURES_DIR, scale=1.0, seed=SEED):
+    """Write every fixture to out_dir; returns {name: path}."""
+    os.makedirs(out_dir, exist_ok=True)
+    paths = {name: os.path.join(out_dir, filename) for name, filename in FILES.items()}
+    counts = {name: max(1, int(size * scale)) for name, size in SIZES.items()}
+    rng = random.Random(seed)
+    write_lxx(paths['lxx'], counts['lxx'], rng)
+    write_lexicon(paths['tbesh'], 'hebrew', counts['tbesh'], rng)
+    write_lexicon(paths['tbesg'], 'greek', counts['tbesg'], rng)
+    write_cross_refs(paths['cross_refs'], counts['cross_refs'], rng)
+    write_oshb(paths['oshb'], counts['oshb'], rng)
+    write_targum(paths['targum'], counts['targum'], rng)
+    return paths
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic importer fixtures")
+    parser.add_argument("--out", default=FIXTURES_DIR, help="Output directory")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiplier on the default row counts")
+    parser.add_argument("--seed", type=int, default=SEED, help="Random seed")
+    args = parser.parse_args()
+
+    for name, path in generate(args.out, args.scale, args.seed).items():
+        print(f"✓ {name:12} {os.path.getsize(path) / 1e6:7.1f} MB  {path}")
+
+if __name__ == "__main__":
+    main()
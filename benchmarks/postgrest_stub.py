@@ -0,0 +1,501 @@
+#!/usr/bin/env python3
+"""
+PostgREST Stand-in
+All4Yah Project
+
+A local, in-process HTTP server implementing the subset of the PostgREST
+API the REST importers use, backed by SQLite, so they can be run and
+load-tested offline:
+
+- GET     select=, column filters, order=, limit= / offset=, and
+          Prefer: count=exact (Content-Range: 0-99/1234)
+- POST    single or bulk JSON rows; Prefer: resolution=merge-duplicates
+          with ?on_conflict= upserts, a duplicate key without it is a 409;
+          Prefer: return=representation echoes the rows
+- PATCH   / DELETE with column filters
+- Filters eq, neq, gt, gte, lt, lte, like, ilike, in.(a,b), is.null /
+  is.true / is.false, each negatable with not.
+- POST rpc/verse_anomalies and rpc/verse_tier_counts, computed in Python
+  with the same definitions as migration 009
+
+Tables and columns are created as rows arrive; a column's SQLite type comes
+from its first value, and dict / list values round-trip as JSON. Rows
+without an id get a UUID, like the Supabase tables' defaults. UNIQUE
+holds the natural keys of schema.sql, so duplicate inserts fail as they do
+against Supabase.
+
+Every request can be delayed (latency + random jitter) and a fraction of
+them answered 429 with Retry-After, to exercise BatchWriter's retries and
+the importers' concurrency.
+
+Point an importer at it with SUPABASE_URL:
+
+  python3 benchmarks/postgrest_stub.py --port 54321 --latency 0.02 --error-rate 0.05
+  SUPABASE_URL=http://127.0.0.1:54321 python3 database/import-targum-rest-api.py targum.sql
+
+or in-process:
+
+  with PostgrestStub(latency=0.01) as stub:
+      writer = BatchWriter(stub.url, "lexicon", headers)
+"""
+
+import sys
+import json
+import time
+import signal
+import uuid
+import random
+import sqlite3
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qsl
+
+# =============================================================================
+# Configuration
+# =============================================================================
+
+# Natural keys from schema.sql - inserting a duplicate without merge-duplicates is a 409
+UNIQUE = {
+    'manuscripts': ['code'],
+    'verses': ['manuscript_id', 'book', 'chapter', 'verse'],
+    'lexicon': ['strong_number'],
+}
+# Seeded so the importers' manuscript lookups succeed
+MANUSCRIPT_LANGUAGES = {'WLC': 'hebrew', 'SBLGNT': 'greek', 'LXX': 'greek', 'ONKELOS': 'aramaic', 'DSS': 'hebrew'}
+DEFAULT_MANUSCRIPTS = list(MANUSCRIPT_LANGUAGES)
+DEFAULT_PORT = 54321
+RETRY_AFTER_SECONDS = 0.05
+
+OPERATORS = {
+    'eq': '=', 'neq': '<>', 'gt': '>', 'gte': '>=', 'lt': '<', 'lte': '<=',
+    'like': 'GLOB', 'ilike': 'LIKE',      # GLOB is case-sensitive and already uses * as the wildcard
+}
+RESERVED_PARAMS = {'select', 'order', 'limit', 'offset', 'on_conflict', 'columns'}
+
+class PostgrestError(Exception):
+    def __init__(self, status, code, message):
+        super().__init__(message)
+        self.status = status
+        self.code = code
+        self.message = message
+
+# =============================================================================
+# SQLite store
+# =============================================================================
+
+def quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+def sqlite_type(value):
+    if isinstance(value, bool) or isinstance(value, int):
+        return 'INTEGER'
+    if isinstance(value, float):
+        return 'REAL'
+    return 'TEXT'
+
+class Store:
+    """Schemaless PostgREST tables in one SQLite database (thread-safe)."""
+
+    def __init__(self, path=':memory:', unique=None):
+        self.db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.lock = threading.Lock()
+        self.unique = UNIQUE if unique is None else unique
+        self.columns = {}          # table -> [column]
+        self.json_columns = {}     # table -> {column}
+        self.indexes = set()       # (table, columns)
+
+    def _ensure(self, table, rows):
+        if table not in self.columns:
+            self.db.execute(f"CREATE TABLE {quote(table)} (id TEXT)")
+            self.columns[table] = ['id']
+            self.json_columns[table] = set()
+        for row in rows:
+            self._ensure_columns(table, row)
+        keys = self.unique.get(table)
+        if keys and all(k in self.columns[table] for k in keys):
+            self._unique_index(table, keys)
+
+    def _ensure_columns(self, table, row):
+        for column, value in row.items():
+            if column in self.columns[table]:
+                continue
+            column_type = '' if value is None else sqlite_type(value)
+            self.db.execute(f"ALTER TABLE {quote(table)} ADD COLUMN {quote(column)} {column_type}")
+            self.columns[table].append(column)
+            if isinstance(value, (dict, list)):
+                self.json_columns[table].add(column)
+
+    def _unique_index(self, table, columns):
+        if (table, tuple(columns)) in self.indexes:
+            return
+        name = quote(f"{table}_{'_'.join(columns)}_key")
+        self.db.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS {name} ON {quote(table)} "
+                        f"({', '.join(map(quote, columns))})")
+        self.indexes.add((table, tuple(columns)))
+
+    def _column(self, table, column):
+        if column not in self.columns.get(table, ()):
+            raise PostgrestError(400, '42703', f'column {table}.{column} does not exist')
+        return quote(column)
+
+    def _encode(self, table, column, value):
+        if isinstance(value, (dict, list)):
+            self.json_columns[table].add(column)
+            return json.dumps(value)
+        if column in self.json_columns[table] and value is not None:
+            return json.dumps(value)
+        return value
+
+    def _decode(self, table, row):
+        return {column: json.loads(value) if column in self.json_columns[table] and value is not None else value
+                for column, value in row.items()}
+
+    def _where(self, table, filters):
+        clauses, args = [], []
+        for column, expression in filters:
+            negate = expression.startswith('not.')
+            if negate:
+                expression = expression[4:]
+            operator, _, operand = expression.partition('.')
+            target = self._column(table, column)
+            if operator in OPERATORS:
+                if operator == 'ilike':
+                    operand = operand.replace('*', '%')
+                clause = f"{target} {OPERATORS[operator]} ?"
+                args.append(operand)
+            elif operator == 'in':
+                values = [v.strip('"') for v in operand.strip('()').split(',')] if operand.strip('()') else []
+                clause = f"{target} IN ({', '.join('?' * len(values))})" if values else '0'
+                args.extend(values)
+            elif operator == 'is' and operand in ('null', 'true', 'false'):
+                clause = f"{target} IS {operand.upper() if operand == 'null' else int(operand == 'true')}"
+            else:
+                raise PostgrestError(400, 'PGRST100', f'unsupported filter "{column}={expression}"')
+            clauses.append(f"NOT ({clause})" if negate else clause)
+        return (' WHERE ' + ' AND '.join(clauses)) if clauses else '', args
+
+    def select(self, table, filters, columns=None, order=None, limit=None, offset=0, count=False):
+        """(rows, total or None)"""
+        with self.lock:
+            if table not in self.columns:
+                return [], 0 if count else None
+            names = self.columns[table] if not columns or columns == ['*'] else columns
+            select = ', '.join(self._column(table, c) for c in names)
+            where, args = self._where(table, filters)
+            sql = f"SELECT {select} FROM {quote(table)}{where}"
+            if order:
+                terms = []
+                for term in order.split(','):
+                    parts = term.split('.')
+                    direction = 'DESC' if 'desc' in parts[1:] else 'ASC'
+                    terms.append(f"{self._column(table, parts[0])} {direction}")
+                sql += ' ORDER BY ' + ', '.join(terms)
+            if limit is not None or offset:
+                sql += ' LIMIT ? OFFSET ?'
+                page_args = [-1 if limit is None else limit, offset]
+            else:
+                page_args = []
+            rows = [self._decode(table, dict(zip(names, r))) for r in self.db.execute(sql, args + page_args)]
+            total = None
+            if count:
+                total = self.db.execute(f"SELECT COUNT(*) FROM {quote(table)}{where}", args).fetchone()[0]
+            return rows, total
+
+    def insert(self, table, rows, on_conflict=None, merge=False):
+        rows = [row if 'id' in row else {'id': str(uuid.uuid4()), **row} for row in rows]
+        with self.lock:
+            self._ensure(table, rows)
+            columns = [c for c in self.columns[table] if any(c in row for row in rows)]
+            sql = (f"INSERT INTO {quote(table)} ({', '.join(map(quote, columns))}) "
+                   f"VALUES ({', '.join('?' * len(columns))})")
+            if merge:
+                keys = on_conflict or ['id']
+                self._ensure_columns(table, {k: None for k in keys})
+                self._unique_index(table, keys)
+                updates = [c for c in columns if c not in keys and c != 'id']
+                sql += f" ON CONFLICT ({', '.join(map(quote, keys))}) DO " + (
+                    'UPDATE SET ' + ', '.join(f"{quote(c)} = excluded.{quote(c)}" for c in updates)
+                    if updates else 'NOTHING')
+            values = [[self._encode(table, c, row.get(c)) for c in columns] for row in rows]
+            try:
+                self.db.execute('SAVEPOINT bulk')
+                self.db.executemany(sql, values)
+                self.db.execute('RELEASE bulk')
+            except sqlite3.IntegrityError as e:
+                self.db.execute('ROLLBACK TO bulk')
+                self.db.execute('RELEASE bulk')
+                raise PostgrestError(409, '23505', f'duplicate key value violates unique constraint ({e})')
+            return rows
+
+    def update(self, table, filters, values):
+        with self.lock:
+            if table not in self.columns:
+                return 0
+            self._ensure_columns(table, values)
+            where, args = self._where(table, filters)
+            assignments = ', '.join(f"{self._column(table, c)} = ?" for c in values)
+            cursor = self.db.execute(f"UPDATE {quote(table)} SET {assignments}{where}",
+                                     [self._encode(table, c, v) for c, v in values.items()] + args)
+            return cursor.rowcount
+
+    def delete(self, table, filters):
+        with self.lock:
+            if table not in self.columns:
+                return 0
+            where, args = self._where(table, filters)
+            return self.db.execute(f"DELETE FROM {quote(table)}{where}", args).rowcount
+
+# =============================================================================
+# RPC functions (database/migrations/009_add_verification_functions.sql)
+# =============================================================================
+
+def rpc_manuscript_verses(store, args):
+    return store.select('verses', [('manuscript_id', f"eq.{args['p_manuscript_id']}")])[0]
+
+def rpc_verse_anomalies(store, args):
+    book_tiers = {row.get('book_code'): row.get('canonical_tier') for row in store.select('canonical_books', [])[0]}
+    reports, references, chapter_verses = {}, {}, {}
+    for v in rpc_manuscript_verses(store, args):
+        book, chapter, verse, tier = v.get('book'), v.get('chapter'), v.get('verse'), v.get('canonical_tier')
+        report = reports.setdefault(book, {
+            'book': book, 'verses': 0, 'chapters': set(), 'duplicates': 0, 'invalid_chapters': 0,
+            'invalid_verses': 0, 'empty_text': 0, 'missing_ordinal': 0, 'verse_gaps': 0,
+            'untiered': 0, 'tier_mismatches': 0})
+        report['verses'] += 1
+        report['chapters'].add(chapter)
+        report['invalid_chapters'] += chapter is None or chapter <= 0
+        report['invalid_verses'] += verse is None or verse <= 0
+        report['empty_text'] += not (v.get('text') or '').strip()
+        report['missing_ordinal'] += v.get('ordinal') is None
+        report['untiered'] += tier is None
+        report['tier_mismatches'] += (tier is not None and book_tiers.get(book) is not None
+                                      and tier != book_tiers[book])
+        key = v['ordinal'] if v.get('ordinal') is not None else (book, chapter, verse)
+        references.setdefault(key, []).append(book)
+        if chapter and chapter > 0 and verse and verse > 0:
+            chapter_verses.setdefault((book, chapter), set()).add(verse)
+    for books in references.values():
+        if len(books) > 1:
+            reports[min(books)]['duplicates'] += len(books) - 1
+    for (book, _), verses in chapter_verses.items():
+        reports[book]['verse_gaps'] += max(verses) - len(verses)
+    return [dict(report, chapters=len(report['chapters'])) for _, report in sorted(reports.items())]
+
+def rpc_verse_tier_counts(store, args):
+    tiers = {}
+    for v in rpc_manuscript_verses(store, args):
+        counts = tiers.setdefault(v.get('canonical_tier'), {'books': set(), 'verses': 0})
+        counts['books'].add(v.get('book'))
+        counts['verses'] += 1
+    return [{'canonical_tier': tier, 'books': len(counts['books']), 'verses': counts['verses']}
+            for tier, counts in sorted(tiers.items(), key=lambda item: (item[0] is None, item[0] or 0))]
+
+RPC_FUNCTIONS = {
+    'verse_anomalies': rpc_verse_anomalies,
+    'verse_tier_counts': rpc_verse_tier_counts,
+}
+
+# =============================================================================
+# HTTP server
+# =============================================================================
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body=None, headers=None):
+        payload = b'' if body is None else json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        if body is not None:
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _request(self):
+        split = urlsplit(self.path)
+        if not split.path.startswith('/rest/v1/'):
+            raise PostgrestError(404, 'PGRST000', f'no route for {split.path}')
+        table = split.path[len('/rest/v1/'):].strip('/')
+        params = parse_qsl(split.query, keep_blank_values=True)
+        prefer = {p.strip() for part in self.headers.get_all('Prefer', []) for p in part.split(',')}
+        length = int(self.headers.get('Content-Length') or 0)
+        body = json.loads(self.rfile.read(length)) if length else None
+        return table, dict(params), [(k, v) for k, v in params if k not in RESERVED_PARAMS], prefer, body
+
+    def _handle(self, method):
+        stub = self.server.stub
+        stub.count(method)
+        stub.delay()
+        try:
+            # Read the body first so a 429 leaves the keep-alive connection usable
+            table, params, filters, prefer, body = self._request()
+            if stub.throttle():
+                return self._send(429, {'message': 'Too Many Requests (injected)'},
+                                  {'Retry-After': str(stub.retry_after)})
+            getattr(self, f'_{method.lower()}')(stub.store, table, params, filters, prefer, body)
+        except PostgrestError as e:
+            self._send(e.status, {'code': e.code, 'message': e.message, 'details': None, 'hint': None})
+        except (ValueError, TypeError) as e:
+            self._send(400, {'code': 'PGRST102', 'message': str(e), 'details': None, 'hint': None})
+
+    def _get(self, store, table, params, filters, prefer, body):
+        limit = int(params['limit']) if 'limit' in params else None
+        offset = int(params.get('offset') or 0)
+        columns = [c.strip() for c in params.get('select', '*').split(',') if c.strip()]
+        rows, total = store.select(table, filters, columns, params.get('order'), limit, offset,
+                                   count='count=exact' in prefer)
+        first = f"{offset}-{offset + len(rows) - 1}" if rows else '*'
+        self._send(200, rows, {'Content-Range': f"{first}/{'*' if total is None else total}"})
+
+    def _post(self, store, table, params, filters, prefer, body):
+        if table.startswith('rpc/'):
+            function = RPC_FUNCTIONS.get(table[len('rpc/'):])
+            if function is None:
+                raise PostgrestError(404, 'PGRST202', f'Could not find the function {table[len("rpc/"):]}')
+            return self._send(200, function(store, body or {}))
+        rows = body if isinstance(body, list) else [body]
+        if not all(isinstance(row, dict) for row in rows):
+            raise PostgrestError(400, 'PGRST102', 'request body must be an object or an array of objects')
+        on_conflict = params['on_conflict'].split(',') if params.get('on_conflict') else None
+        merge = 'resolution=merge-duplicates' in prefer
+        inserted = store.insert(table, rows, on_conflict, merge)
+        self.server.stub.rows_written += len(rows)
+        if 'return=representation' not in prefer:
+            return self._send(201)
+        if merge:
+            # Upserted rows as stored, not as sent
+            keys = on_conflict or ['id']
+            inserted = [store.select(table, [(k, f"eq.{row[k]}") for k in keys])[0][0] for row in inserted]
+        self._send(201, inserted)
+
+    def _patch(self, store, table, params, filters, prefer, body):
+        if not isinstance(body, dict):
+            raise PostgrestError(400, 'PGRST102', 'PATCH body must be an object')
+        updated = store.update(table, filters, body)
+        self.server.stub.rows_written += updated
+        if 'return=representation' in prefer:
+            return self._send(200, store.select(table, filters)[0])
+        self._send(204, headers={'Content-Range': f"0-{updated - 1}/*" if updated else '*/*'})
+
+    def _delete(self, store, table, params, filters, prefer, body):
+        deleted = store.delete(table, filters)
+        self._send(204, headers={'Content-Range': f"0-{deleted - 1}/*" if deleted else '*/*'})
+
+    def do_GET(self):
+        self._handle('GET')
+
+    def do_POST(self):
+        self._handle('POST')
+
+    def do_PATCH(self):
+        self._handle('PATCH')
+
+    def do_DELETE(self):
+        self._handle('DELETE')
+
+class PostgrestStub:
+    """
+    The stand-in server, on a background thread. `latency` (+ up to
+    `jitter`) seconds are added to every request and `error_rate` of them
+    are answered 429. `manuscripts` codes are seeded so the importers'
+    manuscript lookups succeed.
+    """
+
+    def __init__(self, port=0, latency=0.0, jitter=0.0, error_rate=0.0, seed=None,
+                 manuscripts=DEFAULT_MANUSCRIPTS, db_path=':memory:', retry_after=RETRY_AFTER_SECONDS):
+        self.store = Store(db_path)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.random_lock = threading.Lock()
+        self.stats_lock = threading.Lock()
+        self.requests = {}
+        self.throttled = 0
+        self.rows_written = 0
+        if manuscripts:
+            self.store.insert('manuscripts', [{'code': code, 'name': code, 'language': MANUSCRIPT_LANGUAGES.get(code)}
+                                              for code in manuscripts])
+        self.server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+        self.server.daemon_threads = True
+        self.server.stub = self
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = None
+
+    def count(self, method):
+        with self.stats_lock:
+            self.requests[method] = self.requests.get(method, 0) + 1
+
+    def delay(self):
+        if self.latency or self.jitter:
+            with self.random_lock:
+                extra = self.random.uniform(0, self.jitter) if self.jitter else 0
+            time.sleep(self.latency + extra)
+
+    def throttle(self):
+        if not self.error_rate:
+            return False
+        with self.random_lock:
+            hit = self.random.random() < self.error_rate
+        if hit:
+            with self.stats_lock:
+                self.throttled += 1
+        return hit
+
+    def stats(self):
+        return {'requests': dict(self.requests), 'throttled': self.throttled, 'rows_written': self.rows_written}
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+# =============================================================================
+# CLI Entry Point
+# =============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Local PostgREST stand-in backed by SQLite")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="Port to listen on (127.0.0.1)")
+    parser.add_argument("--db", default=':memory:', help="SQLite database file (default in-memory)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every request")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Up to this many extra random seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered 429")
+    parser.add_argument("--seed", type=int, help="Random seed for jitter and 429s")
+    parser.add_argument("--manuscripts", default=','.join(DEFAULT_MANUSCRIPTS),
+                        help="Comma-separated manuscript codes to seed")
+    args = parser.parse_args()
+
+    stub = PostgrestStub(args.port, args.latency, args.jitter, args.error_rate, args.seed,
+                         [c for c in args.manuscripts.split(',') if c], args.db)
+    print(f"🧪 PostgREST stand-in on {stub.url} (latency {args.latency * 1000:.0f} ms, "
+          f"429 rate {args.error_rate:.0%})")
+    print(f"   SUPABASE_URL={stub.url}")
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        stub.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"\n📊 {stub.stats()}")
+        stub.server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,451 @@
+#!/usr/bin/env python3
+"""
+Importer Benchmark Suite
+All4Yah Project
+
+Times each importer's stages over the synthetic corpora from fixtures.py,
+using the importers' own functions:
+
+- lxx         import-lxx.py            load_verses / prepare_verses / verse_params
+- lexicon     lexicon_parser.py        iter_entries / _asdict / JSON batches
+- cross_refs  import-cross-references  load_cross_references / link_record / JSON batches
+- oshb        import-oshb-rest-api.py  split_updates + parse_update_statement / PATCH bodies
+- targum      import-targum-rest-api   parse_sql_file / verse_rows / JSON batches
+
+Stages are parse (file -> records), transform (records -> rows) and
+serialize (rows -> wire format: JSON request bodies, or the psycopg2
+parameter tuples for LXX). An optional write stage sends the rows to a
+local PostgreSQL (--dsn; LXX, into a temp copy of verses that is rolled
+back) or to a PostgREST-compatible endpoint (--postgrest; the REST cases).
+--stub starts postgrest_stub.py in-process for the REST writes, with
+optional latency and 429 injection.
+
+Each case runs in its own process, so its peak RSS (ru_maxrss) is its own.
+Stage times are the median of --rounds. Results are compared to
+benchmarks/baseline.json: a stage whose throughput drops by more than
+--tolerance, or a case whose peak RSS grows by more than --rss-tolerance, is
+a regression and the run exits 1. Single-core timings swing by tens of
+percent between runs, hence the wide default throughput tolerance. Peak RSS
+is only compared when the baseline ran the same stages (a write stage adds
+the HTTP or database client to the child process).
+
+Usage:
+  python3 benchmarks/run.py                               # run all, compare to the baseline
+  python3 benchmarks/run.py --case lxx --case targum
+  python3 benchmarks/run.py --update-baseline             # record a new baseline
+  python3 benchmarks/run.py --postgrest http://localhost:3000 --dsn postgresql://localhost/all4yah
+  python3 benchmarks/run.py --stub --stub-latency 0.005 --stub-error-rate 0.02
+  python3 benchmarks/run.py --json results.json
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import uuid
+import statistics
+import platform
+import argparse
+import resource
+import subprocess
+import importlib.util
+from contextlib import redirect_stdout
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATABASE_DIR = os.path.join(ROOT, "database")
+sys.path.insert(0, DATABASE_DIR)
+
+import fixtures
+from postgrest_stub import PostgrestStub
+
+# =============================================================================
+# Configuration
+# =============================================================================
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+CASES = ['lxx', 'lexicon', 'cross_refs', 'oshb', 'targum']
+STAGES = ['parse', 'transform', 'serialize', 'write']
+DEFAULT_ROUNDS = 5
+DEFAULT_TOLERANCE = 0.5
+DEFAULT_RSS_TOLERANCE = 0.25
+MANUSCRIPT_ID = str(uuid.UUID(int=1))
+BENCH_HEADERS = {
+    "apikey": os.getenv("SUPABASE_SERVICE_ROLE_KEY", "benchmark"),
+    "Authorization": f"Bearer {os.getenv('SUPABASE_SERVICE_ROLE_KEY', 'benchmark')}",
+    "Content-Type": "application/json",
+    "Prefer": "return=minimal,resolution=merge-duplicates",
+}
+
+def load_script(filename):
+    """Import a hyphenated database/ script as a module."""
+    name = filename[:-3].replace('-', '_')
+    spec = importlib.util.spec_from_file_location(name, os.path.join(DATABASE_DIR, filename))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def batches(rows, size):
+    return [rows[i:i + size] for i in range(0, len(rows), size)]
+
+def json_batches(rows, size):
+    return [json.dumps(batch) for batch in batches(rows, size)]
+
+def post_batches(target, table, rows, size, params=None):
+    from batch_writer import BatchWriter
+    writer = BatchWriter(target, table, BENCH_HEADERS, params=params)
+    for batch in batches(rows, size):
+        writer.write(batch)
+    writer.close()
+    return writer.written
+
+# =============================================================================
+# Cases
+#
+# Each case is a list of (stage, fn); fn takes the previous stage's output
+# and returns (output, rows processed).
+# =============================================================================
+
+def lxx_case(paths, options):
+    lxx = load_script("import-lxx.py")
+    tier_map = lxx.load_tier_map()
+
+    def parse(_):
+        verses_by_book = lxx.load_verses(tier_map, csv_path=paths['lxx'])
+        return verses_by_book, sum(len(b['verses']) for b in verses_by_book.values())
+
+    def transform(verses_by_book):
+        for book in verses_by_book.values():
+            lxx.prepare_verses(book['verses'])
+        return verses_by_book, sum(len(b['verses']) for b in verses_by_book.values())
+
+    def serialize(verses_by_book):
+        params = [p for code, book in sorted(verses_by_book.items())
+                  for p in lxx.verse_params(MANUSCRIPT_ID, code, book['tier'], book['verses'])]
+        return params, len(params)
+
+    def write(params):
+        import psycopg2
+        from psycopg2.extras import execute_batch
+        conn = psycopg2.connect(options['dsn'], options="-c client_encoding=UTF8")
+        try:
+            with conn.cursor() as cur:
+                # Shadows public.verses for this transaction only
+                cur.execute("""
+                    CREATE TEMP TABLE verses (
+                        manuscript_id UUID, book TEXT, chapter INTEGER, verse INTEGER,
+                        text TEXT, text_normalized TEXT, morphology JSONB, canonical_tier INTEGER,
+                        ordinal INTEGER, gematria_values INTEGER[],
+                        UNIQUE (manuscript_id, book, chapter, verse)
+                    ) ON COMMIT DROP
+                """)
+                for batch in batches(params, 100):
+                    execute_batch(cur, lxx.UPSERT_SQL, batch)
+        finally:
+            conn.rollback()
+            conn.close()
+        return None, len(params)
+
+    stages = [('parse', parse), ('transform', transform), ('serialize', serialize)]
+    if options.get('dsn'):
+        stages.append(('write', write))
+    return stages
+
+def lexicon_case(paths, options):
+    from lexicon_parser import iter_entries
+
+    def parse(_):
+        entries = list(iter_entries(paths['tbesh'], 'hebrew')) + list(iter_entries(paths['tbesg'], 'greek'))
+        return entries, len(entries)
+
+    def transform(entries):
+        return [entry._asdict() for entry in entries], len(entries)
+
+    def serialize(rows):
+        return (rows, json_batches(rows, 500)), len(rows)
+
+    def write(serialized):
+        rows, _ = serialized
+        return None, post_batches(options['postgrest'], "lexicon", rows, 500, {"on_conflict": "strong_number"})
+
+    stages = [('parse', parse), ('transform', transform), ('serialize', serialize)]
+    if options.get('postgrest'):
+        stages.append(('write', write))
+    return stages
+
+def cross_refs_case(paths, options):
+    xrefs = load_script("import-cross-references-rest.py")
+    wlc_id, sblgnt_id = MANUSCRIPT_ID, str(uuid.UUID(int=2))
+
+    def parse(_):
+        with redirect_stdout(io.StringIO()):
+            links = xrefs.load_cross_references(paths['cross_refs'])
+        return links, len(links)
+
+    def transform(links):
+        records = [r for r in (xrefs.link_record(link, wlc_id, sblgnt_id) for link in links) if r]
+        return records, len(links)
+
+    def serialize(records):
+        return (records, json_batches(records, 500)), len(records)
+
+    def write(serialized):
+        records, _ = serialized
+        return None, post_batches(options['postgrest'], "cross_references", records, 500)
+
+    stages = [('parse', parse), ('transform', transform), ('serialize', serialize)]
+    if options.get('postgrest'):
+        stages.append(('write', write))
+    return stages
+
+def oshb_case(paths, options):
+    oshb = load_script("import-oshb-rest-api.py")
+
+    def parse(_):
+        with open(paths['oshb'], 'r', encoding='utf-8') as f:
+            updates = oshb.split_updates(f.read())
+        verses = [v for v in map(oshb.parse_update_statement, updates) if v]
+        return verses, len(verses)
+
+    def transform(verses):
+        # One PATCH per verse: its filter params and body
+        requests_ = [({'manuscript_id': f'eq.{MANUSCRIPT_ID}', 'book': f"eq.{v['book']}",
+                       'chapter': f"eq.{v['chapter']}", 'verse': f"eq.{v['verse']}"},
+                      {'morphology': v['morphology']}) for v in verses]
+        return (verses, requests_), len(verses)
+
+    def serialize(transformed):
+        verses, requests_ = transformed
+        return (verses, [json.dumps(body) for _, body in requests_]), len(requests_)
+
+    def write(serialized):
+        verses, _ = serialized
+        oshb.SUPABASE_URL = options['postgrest']
+        updated = 0
+        for v in verses:
+            # No retries here: like main(), a failed PATCH is counted, not fatal
+            try:
+                oshb.update_verse_morphology(MANUSCRIPT_ID, v)
+                updated += 1
+            except oshb.requests.RequestException:
+                pass
+        return None, updated
+
+    stages = [('parse', parse), ('transform', transform), ('serialize', serialize)]
+    if options.get('postgrest'):
+        stages.append(('write', write))
+    return stages
+
+def targum_case(paths, options):
+    targum = load_script("import-targum-rest-api.py")
+
+    def parse(_):
+        with redirect_stdout(io.StringIO()):
+            verses = targum.parse_sql_file(paths['targum'])
+        return verses, len(verses)
+
+    def transform(verses):
+        rows = [r for batch in batches(verses, 100) for r in targum.verse_rows(MANUSCRIPT_ID, batch)]
+        return rows, len(rows)
+
+    def serialize(rows):
+        return (rows, json_batches(rows, 100)), len(rows)
+
+    def write(serialized):
+        rows, _ = serialized
+        return None, post_batches(options['postgrest'], "verses", rows, 100,
+                                  {"on_conflict": "manuscript_id,book,chapter,verse"})
+
+    stages = [('parse', parse), ('transform', transform), ('serialize', serialize)]
+    if options.get('postgrest'):
+        stages.append(('write', write))
+    return stages
+
+CASE_BUILDERS = {
+    'lxx': lxx_case,
+    'lexicon': lexicon_case,
+    'cross_refs': cross_refs_case,
+    'oshb': oshb_case,
+    'targum': targum_case,
+}
+
+# =============================================================================
+# Runner
+# =============================================================================
+
+def run_case(name, paths, options, rounds):
+    """{'stages': {stage: {seconds, rows, rows_per_sec}}, 'peak_rss_kb'} for one case, in this process (median of rounds)."""
+    os.chdir(ROOT)
+    stages = CASE_BUILDERS[name](paths, options)
+    timings = {stage: [] for stage, _ in stages}
+    for _ in range(rounds):
+        data = None
+        for stage, fn in stages:
+            start = time.perf_counter()
+            data, rows = fn(data)
+            timings[stage].append((time.perf_counter() - start, rows))
+    result = {}
+    for stage, runs in timings.items():
+        elapsed = statistics.median(seconds for seconds, _ in runs)
+        rows = runs[-1][1]
+        result[stage] = {'seconds': round(elapsed, 4), 'rows': rows,
+                         'rows_per_sec': round(rows / elapsed) if elapsed else None}
+    return {'stages': result, 'peak_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}
+
+def run_isolated(name, args):
+    """Run one case in a child process so its peak RSS is not shared with the others."""
+    command = [sys.executable, os.path.abspath(__file__), '--child', name,
+               '--fixtures', args.fixtures, '--rounds', str(args.rounds)]
+    if args.dsn:
+        command += ['--dsn', args.dsn]
+    if args.postgrest:
+        command += ['--postgrest', args.postgrest]
+    result = subprocess.run(command, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"{name} failed:\n{result.stderr}")
+    return json.loads(result.stdout.splitlines()[-1])
+
+def compare(results, baseline, tolerance, rss_tolerance=DEFAULT_RSS_TOLERANCE):
+    """
+    Regression messages for throughput drops beyond `tolerance` and RSS growth
+    beyond `rss_tolerance`. RSS is skipped for a case whose baseline ran a
+    different set of stages.
+    """
+    regressions = []
+    for name, result in results.items():
+        expected = baseline.get('cases', {}).get(name)
+        if not expected:
+            continue
+        for stage, timing in result['stages'].items():
+            base = expected['stages'].get(stage)
+            if not base or not base.get('rows_per_sec') or not timing.get('rows_per_sec'):
+                continue
+            if timing['rows_per_sec'] < base['rows_per_sec'] * (1 - tolerance):
+                regressions.append(f"{name}.{stage}: {timing['rows_per_sec']:,} rows/s "
+                                   f"(baseline {base['rows_per_sec']:,})")
+        if set(result['stages']) != set(expected['stages']):
+            continue
+        if result['peak_rss_kb'] > expected['peak_rss_kb'] * (1 + rss_tolerance):
+            regressions.append(f"{name}: peak RSS {result['peak_rss_kb'] / 1024:.0f} MB "
+                               f"(baseline {expected['peak_rss_kb'] / 1024:.0f} MB)")
+    return regressions
+
+def machine():
+    return {'python': platform.python_version(), 'platform': platform.platform(), 'cpus': os.cpu_count()}
+
+def print_result(name, result, baseline):
+    expected = baseline.get('cases', {}).get(name, {}).get('stages', {}) if baseline else {}
+    for stage in STAGES:
+        timing = result['stages'].get(stage)
+        if not timing:
+            continue
+        line = f"  {name:10} {stage:9} | {timing['seconds'] * 1000:9.1f} ms | {timing['rows_per_sec'] or 0:>10,} rows/s"
+        base = expected.get(stage, {}).get('rows_per_sec')
+        if base and timing['rows_per_sec']:
+            line += f" | {(timing['rows_per_sec'] / base - 1) * 100:+6.1f}%"
+        print(line)
+    print(f"  {name:10} {'peak RSS':9} | {result['peak_rss_kb'] / 1024:9.1f} MB\n")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the importers over synthetic fixtures")
+    parser.add_argument("--case", action="append", choices=CASES, help="Case to run (repeatable; default all)")
+    parser.add_argument("--fixtures", default=fixtures.FIXTURES_DIR, help="Fixture directory")
+    parser.add_argument("--scale", type=float, default=1.0, help="Fixture size multiplier")
+    parser.add_argument("--rounds", type=int, default=DEFAULT_ROUNDS, help="Rounds per case (the median is kept)")
+    parser.add_argument("--dsn", help="Local PostgreSQL DSN for the LXX write stage")
+    parser.add_argument("--postgrest", help="PostgREST base URL for the REST write stages")
+    parser.add_argument("--stub", action="store_true", help="Write the REST cases to an in-process PostgREST stand-in")
+    parser.add_argument("--stub-latency", type=float, default=0.0, help="Stand-in latency per request (seconds)")
+    parser.add_argument("--stub-error-rate", type=float, default=0.0, help="Fraction of stand-in requests answered 429")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Baseline JSON")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Allowed fractional throughput drop")
+    parser.add_argument("--rss-tolerance", type=float, default=DEFAULT_RSS_TOLERANCE,
+                        help="Allowed fractional peak RSS growth")
+    parser.add_argument("--update-baseline", action="store_true", help="Write results as the new baseline")
+    parser.add_argument("--json", help="Also write results to this file")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    paths = {name: os.path.join(args.fixtures, filename) for name, filename in fixtures.FILES.items()}
+    if args.child:
+        options = {'dsn': args.dsn, 'postgrest': args.postgrest}
+        print(json.dumps(run_case(args.child, paths, options, args.rounds)))
+        return
+
+    print("⏱️  Importer benchmarks\n")
+    manifest_path = os.path.join(args.fixtures, "manifest.json")
+    manifest = {'scale': args.scale, 'seed': fixtures.SEED}
+    current = None
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            current = json.load(f)
+    if current != manifest:
+        print(f"📝 Generating fixtures (scale {args.scale}) in {args.fixtures}\n")
+        fixtures.generate(args.fixtures, args.scale)
+        with open(manifest_path, 'w') as f:
+            json.dump(manifest, f)
+
+    baseline = None
+    if os.path.exists(args.baseline) and not args.update_baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get('scale') != args.scale:
+            print(f"❌ Baseline was recorded at scale {baseline.get('scale')}, not {args.scale}")
+            sys.exit(2)
+        if baseline.get('machine') != machine():
+            print(f"⚠️  Baseline was recorded on {baseline.get('machine')}\n")
+
+    stub = None
+    if args.stub:
+        stub = PostgrestStub(latency=args.stub_latency, error_rate=args.stub_error_rate, seed=fixtures.SEED).start()
+        args.postgrest = stub.url
+        print(f"🧪 PostgREST stand-in on {stub.url}\n")
+
+    results = {}
+    try:
+        for name in args.case or CASES:
+            results[name] = run_isolated(name, args)
+            print_result(name, results[name], baseline)
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    finally:
+        if stub:
+            print(f"🧪 Stand-in: {stub.stats()}\n")
+            stub.stop()
+
+    report = {'scale': args.scale, 'rounds': args.rounds, 'machine': machine(), 'cases': results}
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.update_baseline:
+        if args.case and os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                report['cases'] = {**json.load(f).get('cases', {}), **results}
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+            f.write('\n')
+        print(f"✅ Baseline written to {args.baseline}")
+        return
+
+    if baseline is None:
+        print(f"⚠️  No baseline at {args.baseline} - run with --update-baseline to record one")
+        return
+
+    tolerances = f"{args.tolerance:.0%} throughput / {args.rss_tolerance:.0%} RSS"
+    for name, result in results.items():
+        expected = baseline.get('cases', {}).get(name)
+        if expected and set(result['stages']) != set(expected['stages']):
+            print(f"⚠️  {name}: baseline ran {', '.join(expected['stages'])}; peak RSS not compared")
+    regressions = compare(results, baseline, args.tolerance, args.rss_tolerance)
+    if regressions:
+        print(f"❌ {len(regressions)} regression(s) beyond {tolerances}:")
+        for regression in regressions:
+            print(f"   {regression}")
+        sys.exit(1)
+    print(f"✅ No regressions beyond {tolerances}")
+
+if __name__ == "__main__":
+    main()
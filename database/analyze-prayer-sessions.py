@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Prayer Session Analysis Worker
+All4Yah Project
+
+Drains prayer_sessions with analysis_status = 'pending' into session_analysis
+(schema-lsi.sql). Each worker claims a batch of sessions with
+FOR UPDATE SKIP LOCKED, so any number of workers - threads here, or separate
+processes on other machines - can run at once without blocking each other
+or double-processing a session.
+
+Per batch, the aggregates come from three GROUP BY queries over the whole
+batch rather than queries per session:
+
+- prayer_patterns:    total_patterns_detected, average_tempo_bpm, tempo_variation
+- phoneme syllables:  most_frequent_phoneme ("sha-la-ma" -> sha, la, ma)
+- linguistic_echoes:  primary_language_echoes, top_strongs_references
+
+The batch's previous rows from this worker are replaced with one
+execute_values() INSERT, and the sessions are marked completed, in the
+same transaction. A batch that fails is rolled back and its sessions are
+marked 'failed'. Sessions left 'processing' by a worker that died are put
+back to 'pending' after --reclaim-after minutes.
+
+Usage:
+  python3 database/analyze-prayer-sessions.py                     # drain the backlog
+  python3 database/analyze-prayer-sessions.py --workers 4 --batch-size 200
+  python3 database/analyze-prayer-sessions.py --retry-failed      # re-queue failed sessions first
+"""
+
+import os
+import sys
+import time
+import argparse
+import threading
+import psycopg2
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from psycopg2.extras import execute_values
+
+# =============================================================================
+# Configuration
+# =============================================================================
+
+DB_HOST = "db.txeeaekwhkdilycefczq.supabase.co"
+DB_NAME = "postgres"
+DB_USER = "postgres"
+DB_PASSWORD = os.getenv("SUPABASE_DB_PASSWORD")
+
+ANALYZED_BY = 'session-aggregator-v1'
+MODEL_VERSION = '1.0'
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_WORKERS = 2
+RECLAIM_AFTER_MINUTES = 30
+TOP_STRONGS = 5
+STEADY_TEMPO_CV = 0.1       # tempo stddev / mean below this is 'steady'
+ACCELERATING_CORR = 0.5     # tempo-vs-time correlation above this is 'accelerating'
+
+ANALYSIS_COLUMNS = [
+    'session_id', 'summary', 'total_patterns_detected', 'most_frequent_phoneme',
+    'average_tempo_bpm', 'tempo_variation', 'primary_language_echoes',
+    'top_strongs_references', 'analyzed_by', 'model_version', 'analysis_duration_ms',
+]
+
+def connect():
+    return psycopg2.connect(
+        host=DB_HOST,
+        database=DB_NAME,
+        user=DB_USER,
+        password=DB_PASSWORD,
+        options="-c client_encoding=UTF8"
+    )
+
+# =============================================================================
+# Queue
+# =============================================================================
+
+def requeue(conn, retry_failed=False, reclaim_after=RECLAIM_AFTER_MINUTES):
+    """Put stale 'processing' (and optionally 'failed') sessions back to 'pending'."""
+    with conn.cursor() as cur:
+        cur.execute("""
+            UPDATE prayer_sessions SET analysis_status = 'pending'
+            WHERE deleted_at IS NULL
+              AND ((analysis_status = 'processing' AND updated_at < NOW() - make_interval(mins => %s))
+                   OR (%s AND analysis_status = 'failed'))
+        """, (reclaim_after, retry_failed))
+        count = cur.rowcount
+    conn.commit()
+    return count
+
+def claim_batch(conn, batch_size):
+    """Mark up to batch_size pending sessions 'processing' and return their ids."""
+    with conn.cursor() as cur:
+        cur.execute("""
+            UPDATE prayer_sessions SET analysis_status = 'processing'
+            WHERE id IN (
+                SELECT id FROM prayer_sessions
+                WHERE analysis_status = 'pending' AND deleted_at IS NULL
+                ORDER BY recorded_at
+                LIMIT %s
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING id
+        """, (batch_size,))
+        ids = [row[0] for row in cur.fetchall()]
+    conn.commit()
+    return ids
+
+# =============================================================================
+# Aggregation
+# =============================================================================
+
+def tempo_variation(mean, stddev, corr):
+    if mean is None:
+        return None
+    if not mean or not stddev or stddev / mean < STEADY_TEMPO_CV:
+        return 'steady'
+    if corr is not None and corr > ACCELERATING_CORR:
+        return 'accelerating'
+    return 'variable'
+
+def aggregate(cur, ids):
+    """{session_id: session_analysis column dict} for a batch of sessions."""
+    results = {i: {'total_patterns_detected': 0, 'most_frequent_phoneme': None, 'average_tempo_bpm': None,
+                   'tempo_variation': None, 'primary_language_echoes': None, 'top_strongs_references': []}
+               for i in ids}
+
+    cur.execute("""
+        SELECT session_id, COUNT(*), AVG(tempo_bpm), STDDEV_SAMP(tempo_bpm),
+               CORR(tempo_bpm, timestamp_offset_ms)
+        FROM prayer_patterns
+        WHERE session_id = ANY(%s::uuid[])
+        GROUP BY session_id
+    """, (ids,))
+    for session_id, count, mean, stddev, corr in cur.fetchall():
+        result = results[session_id]
+        result['total_patterns_detected'] = count
+        result['average_tempo_bpm'] = round(mean) if mean is not None else None
+        result['tempo_variation'] = tempo_variation(
+            float(mean) if mean is not None else None, float(stddev or 0), corr)
+
+    cur.execute("""
+        SELECT DISTINCT ON (session_id) session_id, phoneme
+        FROM (
+            SELECT p.session_id, s.phoneme, COUNT(*) AS n
+            FROM prayer_patterns p,
+                 unnest(string_to_array(lower(p.phoneme_sequence), '-')) AS s(phoneme)
+            WHERE p.session_id = ANY(%s::uuid[]) AND btrim(s.phoneme) <> ''
+            GROUP BY p.session_id, s.phoneme
+        ) counts
+        ORDER BY session_id, n DESC, phoneme
+    """, (ids,))
+    for session_id, phoneme in cur.fetchall():
+        results[session_id]['most_frequent_phoneme'] = phoneme
+
+    cur.execute("""
+        SELECT session_id, source_language, strongs_number, COUNT(*),
+               COALESCE(SUM(phonetic_similarity_score), 0)
+        FROM linguistic_echoes
+        WHERE session_id = ANY(%s::uuid[])
+        GROUP BY session_id, source_language, strongs_number
+    """, (ids,))
+    languages = defaultdict(lambda: defaultdict(int))
+    strongs = defaultdict(list)
+    for session_id, language, strong, count, score in cur.fetchall():
+        languages[session_id][language] += count
+        if strong:
+            strongs[session_id].append((-count, -float(score), strong))
+    for session_id, counts in languages.items():
+        results[session_id]['primary_language_echoes'] = max(counts, key=lambda lang: (counts[lang], lang))
+        results[session_id]['top_strongs_references'] = [s for _, _, s in sorted(strongs[session_id])[:TOP_STRONGS]]
+
+    return results
+
+def summarize(result):
+    parts = [f"{result['total_patterns_detected']} patterns detected"]
+    if result['most_frequent_phoneme']:
+        parts.append(f"most frequent phoneme '{result['most_frequent_phoneme']}'")
+    if result['average_tempo_bpm'] is not None:
+        parts.append(f"{result['tempo_variation']} tempo around {result['average_tempo_bpm']} bpm")
+    if result['primary_language_echoes']:
+        parts.append(f"echoes mostly {result['primary_language_echoes']}")
+    return '; '.join(parts) + '.'
+
+def process_batch(conn, ids):
+    """Aggregate and store one claimed batch. Returns True on success."""
+    start = time.perf_counter()
+    try:
+        with conn.cursor() as cur:
+            results = aggregate(cur, ids)
+            duration_ms = int((time.perf_counter() - start) * 1000 / len(ids))
+            rows = [(
+                session_id, summarize(r), r['total_patterns_detected'], r['most_frequent_phoneme'],
+                r['average_tempo_bpm'], r['tempo_variation'], r['primary_language_echoes'],
+                r['top_strongs_references'], ANALYZED_BY, MODEL_VERSION, duration_ms,
+            ) for session_id, r in results.items()]
+            cur.execute("DELETE FROM session_analysis WHERE session_id = ANY(%s::uuid[]) AND analyzed_by = %s",
+                        (ids, ANALYZED_BY))
+            execute_values(cur, f"INSERT INTO session_analysis ({', '.join(ANALYSIS_COLUMNS)}) VALUES %s",
+                           rows, page_size=len(rows))
+            cur.execute("""
+                UPDATE prayer_sessions SET analysis_status = 'completed', analyzed_at = NOW()
+                WHERE id = ANY(%s::uuid[])
+            """, (ids,))
+        conn.commit()
+        return True
+    except psycopg2.Error as e:
+        conn.rollback()
+        print(f"   ❌ Batch of {len(ids)} failed: {e}")
+        with conn.cursor() as cur:
+            cur.execute("UPDATE prayer_sessions SET analysis_status = 'failed' WHERE id = ANY(%s::uuid[])", (ids,))
+        conn.commit()
+        return False
+
+# =============================================================================
+# Workers
+# =============================================================================
+
+class Progress:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.completed = 0
+        self.failed = 0
+
+    def record(self, count, ok):
+        with self.lock:
+            if ok:
+                self.completed += count
+            else:
+                self.failed += count
+            print(f"\r   Progress: {self.completed} completed, {self.failed} failed", end='', flush=True)
+
+def worker(batch_size, progress, max_batches=None):
+    """Claim and process batches until the queue is empty."""
+    conn = connect()
+    batches = 0
+    try:
+        while max_batches is None or batches < max_batches:
+            ids = claim_batch(conn, batch_size)
+            if not ids:
+                return
+            progress.record(len(ids), process_batch(conn, ids))
+            batches += 1
+    finally:
+        conn.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Aggregate pending prayer sessions into session_analysis")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Concurrent workers (connections)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Sessions claimed per batch")
+    parser.add_argument("--max-batches", type=int, help="Stop each worker after this many batches")
+    parser.add_argument("--reclaim-after", type=int, default=RECLAIM_AFTER_MINUTES,
+                        help="Minutes after which a 'processing' session is re-queued")
+    parser.add_argument("--retry-failed", action="store_true", help="Re-queue 'failed' sessions first")
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print("Prayer Session Analysis Worker - All4Yah")
+    print("=" * 80)
+    print(f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+
+    try:
+        conn = connect()
+    except psycopg2.OperationalError as e:
+        print(f"❌ Connection failed: {e}")
+        sys.exit(1)
+    requeued = requeue(conn, args.retry_failed, args.reclaim_after)
+    with conn.cursor() as cur:
+        cur.execute("SELECT COUNT(*) FROM prayer_sessions WHERE analysis_status = 'pending' AND deleted_at IS NULL")
+        pending = cur.fetchone()[0]
+    conn.close()
+    print(f"📋 {pending} pending sessions ({requeued} re-queued), {args.workers} workers x {args.batch_size}\n")
+
+    start = time.perf_counter()
+    progress = Progress()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        futures = [pool.submit(worker, args.batch_size, progress, args.max_batches) for _ in range(args.workers)]
+        for future in futures:
+            future.result()
+    elapsed = time.perf_counter() - start
+
+    print(f"\n\n✅ {progress.completed} sessions analyzed, {progress.failed} failed in {elapsed:.1f}s")
+    print(f"Finished: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+if __name__ == "__main__":
+    from profiling import profile_from_argv
+    profile_from_argv()
+    main()
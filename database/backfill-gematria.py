@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Backfill lexicon.gematria and verses.gematria_values
+All4Yah Project
+
+Fills the value columns added by migration 008 for rows imported before
+they existed - the lexicon, and the WLC / LXX / SBLGNT verses (WLC and
+SBLGNT come from the JS importers, which do not set them).
+
+Each table or manuscript is read with a server-side cursor in chunks of
+FETCH_SIZE rows; each chunk is valued in one gematria.values_many() pass,
+COPYed into a temp table and applied with a single UPDATE ... FROM, so
+memory is bounded by the chunk. Each table or manuscript is one commit.
+
+Usage:
+  python3 database/backfill-gematria.py                        # lexicon + WLC, LXX, SBLGNT
+  python3 database/backfill-gematria.py --manuscript LXX       # one manuscript only
+  python3 database/backfill-gematria.py --lexicon-only
+  python3 database/backfill-gematria.py --force                # recompute rows that have values
+"""
+
+import io
+import os
+import sys
+import argparse
+import psycopg2
+from datetime import datetime
+
+from gematria import values_many, verse_values_many
+
+# =============================================================================
+# Configuration
+# =============================================================================
+
+DB_HOST = "db.txeeaekwhkdilycefczq.supabase.co"
+DB_NAME = "postgres"
+DB_USER = "postgres"
+DB_PASSWORD = os.getenv("SUPABASE_DB_PASSWORD")
+
+DEFAULT_MANUSCRIPTS = ['WLC', 'LXX', 'SBLGNT']
+FETCH_SIZE = 10000
+
+# =============================================================================
+# Backfill
+# =============================================================================
+
+def fetch_chunks(cur):
+    """Rows of an executed (server-side) cursor, FETCH_SIZE at a time."""
+    while True:
+        rows = cur.fetchmany(FETCH_SIZE)
+        if not rows:
+            return
+        yield rows
+
+def copy_update(conn, table, key_column, key_type, column, column_type, chunks):
+    """
+    UPDATE table.column from chunks of (key, value) rows, each COPYed into a
+    temp table. Returns rows updated; the caller commits.
+    """
+    updated = 0
+    with conn.cursor() as cur:
+        cur.execute(f"CREATE TEMP TABLE backfill_values (key {key_type}, value {column_type}) ON COMMIT DROP")
+        for rows in chunks:
+            buffer = io.StringIO(''.join(f"{key}\t{value}\n" for key, value in rows))
+            cur.execute("TRUNCATE backfill_values")
+            cur.copy_expert("COPY backfill_values FROM STDIN", buffer)
+            cur.execute(f"""
+                UPDATE {table} t SET {column} = b.value
+                FROM backfill_values b WHERE t.{key_column} = b.key
+            """)
+            updated += cur.rowcount
+    return updated
+
+def lexicon_values(rows):
+    values = values_many([word for _, word in rows])
+    return [(strong, value or '\\N') for (strong, _), value in zip(rows, values)]
+
+def verse_values(rows):
+    values = verse_values_many([(morphology, text) for _, morphology, text in rows])
+    return [(row[0], '{' + ','.join(map(str, v)) + '}') for row, v in zip(rows, values)]
+
+def backfill_lexicon(conn, force=False):
+    with conn.cursor(name="gematria_lexicon") as cur:
+        cur.itersize = FETCH_SIZE
+        cur.execute(f"SELECT strong_number, original_word FROM lexicon {'' if force else 'WHERE gematria IS NULL'}")
+        updated = copy_update(conn, 'lexicon', 'strong_number', 'TEXT', 'gematria', 'INTEGER',
+                              map(lexicon_values, fetch_chunks(cur)))
+    conn.commit()
+    return updated
+
+def backfill_manuscript(conn, code, manuscript_id, force=False):
+    with conn.cursor(name=f"gematria_{code.lower()}") as cur:
+        cur.itersize = FETCH_SIZE
+        cur.execute(f"""
+            SELECT id, morphology, text FROM verses
+            WHERE manuscript_id = %s {'' if force else 'AND gematria_values IS NULL'}
+        """, (manuscript_id,))
+        updated = copy_update(conn, 'verses', 'id', 'UUID', 'gematria_values', 'INTEGER[]',
+                              map(verse_values, fetch_chunks(cur)))
+    conn.commit()
+    return updated
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill gematria values (migration 008)")
+    parser.add_argument("--manuscript", action="append",
+                        help=f"Manuscript code (repeatable; default {' '.join(DEFAULT_MANUSCRIPTS)})")
+    parser.add_argument("--lexicon-only", action="store_true", help="Only backfill lexicon.gematria")
+    parser.add_argument("--force", action="store_true", help="Recompute rows that already have values")
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print("Gematria Backfill - All4Yah")
+    print("=" * 80)
+    print(f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+
+    try:
+        conn = psycopg2.connect(
+            host=DB_HOST,
+            database=DB_NAME,
+            user=DB_USER,
+            password=DB_PASSWORD,
+            options="-c client_encoding=UTF8"
+        )
+    except psycopg2.OperationalError as e:
+        print(f"❌ Connection failed: {e}")
+        sys.exit(1)
+
+    if not args.manuscript:
+        print(f"✓ {'lexicon':12} {backfill_lexicon(conn, args.force):>7} entries")
+
+    if not args.lexicon_only:
+        codes = args.manuscript or DEFAULT_MANUSCRIPTS
+        with conn.cursor() as cur:
+            cur.execute("SELECT code, id FROM manuscripts WHERE code = ANY(%s) ORDER BY code", (codes,))
+            manuscripts = cur.fetchall()
+        for code in sorted(set(codes) - {code for code, _ in manuscripts}):
+            print(f"⚠️  {code} manuscript not found - skipping")
+        for code, manuscript_id in manuscripts:
+            print(f"✓ {code:12} {backfill_manuscript(conn, code, manuscript_id, args.force):>7} verses")
+    conn.close()
+
+    print(f"\n✅ Backfill complete")
+    print(f"Finished: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+if __name__ == "__main__":
+    from profiling import profile_from_argv
+    profile_from_argv()
+    main()
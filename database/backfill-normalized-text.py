@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Backfill verses.text_normalized
+All4Yah Project
+
+Fills the accent-insensitive shadow column added by migration 007 for rows
+imported before it existed (or by the JS importers, which do not set it).
+
+Each manuscript is streamed with a server-side cursor in chunks of
+FETCH_SIZE rows; each chunk is folded in one normalize_many() pass, COPYed
+into a temp table and applied with a single UPDATE ... FROM, so a 23k-verse
+manuscript takes a few round trips rather than 23k UPDATE statements, and
+memory is bounded by the chunk. The manuscript is committed as a whole.
+
+Usage:
+  python3 database/backfill-normalized-text.py                 # rows still NULL, every manuscript
+  python3 database/backfill-normalized-text.py --manuscript WLC --manuscript LXX
+  python3 database/backfill-normalized-text.py --force         # recompute every row
+"""
+
+import io
+import os
+import sys
+import argparse
+import psycopg2
+from datetime import datetime
+
+from normalize import normalize_many
+
+# =============================================================================
+# Configuration
+# =============================================================================
+
+DB_HOST = "db.txeeaekwhkdilycefczq.supabase.co"
+DB_NAME = "postgres"
+DB_USER = "postgres"
+DB_PASSWORD = os.getenv("SUPABASE_DB_PASSWORD")
+
+FETCH_SIZE = 10000
+
+# =============================================================================
+# Backfill
+# =============================================================================
+
+def copy_value(text):
+    """Escape a value for COPY text format."""
+    return text.replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+
+def backfill_manuscript(conn, code, manuscript_id, force=False):
+    """Normalize one manuscript's verses, FETCH_SIZE at a time. Returns the number of rows updated."""
+    updated = 0
+    with conn.cursor(name=f"normalize_{code.lower()}") as cur, conn.cursor() as write:
+        cur.itersize = FETCH_SIZE
+        cur.execute(f"""
+            SELECT id, text FROM verses
+            WHERE manuscript_id = %s {'' if force else 'AND text_normalized IS NULL'}
+        """, (manuscript_id,))
+        write.execute("CREATE TEMP TABLE normalized_text (id UUID, text_normalized TEXT) ON COMMIT DROP")
+        while True:
+            rows = cur.fetchmany(FETCH_SIZE)
+            if not rows:
+                break
+            normalized = normalize_many([row[1] for row in rows])
+            buffer = io.StringIO(''.join(f"{row[0]}\t{copy_value(n)}\n" for row, n in zip(rows, normalized)))
+            write.execute("TRUNCATE normalized_text")
+            write.copy_expert("COPY normalized_text FROM STDIN", buffer)
+            write.execute("""
+                UPDATE verses v SET text_normalized = n.text_normalized
+                FROM normalized_text n WHERE v.id = n.id
+            """)
+            updated += write.rowcount
+    conn.commit()
+    return updated
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill verses.text_normalized (migration 007)")
+    parser.add_argument("--manuscript", action="append", help="Manuscript code (repeatable; default all)")
+    parser.add_argument("--force", action="store_true", help="Recompute rows that already have a value")
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print("Normalized Text Backfill - All4Yah")
+    print("=" * 80)
+    print(f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+
+    try:
+        conn = psycopg2.connect(
+            host=DB_HOST,
+            database=DB_NAME,
+            user=DB_USER,
+            password=DB_PASSWORD,
+            options="-c client_encoding=UTF8"
+        )
+    except psycopg2.OperationalError as e:
+        print(f"❌ Connection failed: {e}")
+        sys.exit(1)
+
+    with conn.cursor() as cur:
+        cur.execute("SELECT code, id FROM manuscripts WHERE %s::TEXT[] IS NULL OR code = ANY(%s::TEXT[]) ORDER BY code",
+                    (args.manuscript, args.manuscript))
+        manuscripts = cur.fetchall()
+
+    total = 0
+    for code, manuscript_id in manuscripts:
+        updated = backfill_manuscript(conn, code, manuscript_id, args.force)
+        total += updated
+        print(f"✓ {code:12} {updated:>7} verses")
+    conn.close()
+
+    print(f"\n✅ Normalized {total} verses across {len(manuscripts)} manuscripts")
+    print(f"Finished: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+if __name__ == "__main__":
+    from profiling import profile_from_argv
+    profile_from_argv()
+    main()
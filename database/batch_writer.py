@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Bisecting Batch Writer
+All4Yah Project
+
+Shared POST writer for the REST importers. A PostgREST bulk insert is one
+statement, so a single bad row fails the whole batch and writes nothing.
+Instead of retrying every row on its own (n extra requests per failed
+batch), BatchWriter splits a failing batch in half and recurses: each bad
+row is isolated in O(log n) requests and the good rows around it still go
+in as large batches.
+
+Only row-level failures are bisected: data errors (SQLSTATE class 22) and
+constraint violations (class 23), or a 400 / 409 without a PostgREST
+PGRST code. Auth, route and schema errors (401, 403, 404, PGRST204 unknown
+column, ...) would fail every row the same way, so they raise
+BatchWriteError instead of sending 2n-1 requests to reject the batch.
+Row-level failures always bisect down to single rows, even when both halves
+fail with the parent's exact error: messages like 22P02 "invalid input
+syntax for type integer" name the bad value, not the row, so two rows with
+the same bad value look identical from every batch that contains them.
+
+- 429 / 502 / 503 / 504 and connection errors are retried with backoff
+  before a batch is treated as failed
+- Isolated rows are quarantined, one JSON object per line, to a rejects
+  file (rejects/<table>-<timestamp>.jsonl) with the server's status and
+  error, so they can be fixed and replayed
+- One keep-alive session is reused for every request
+- With an ImportMetrics (import_metrics.py), the JSON encoding and each
+  POST are timed as the 'encode' and 'send' stages, with their bytes
+
+Writers that replace their own earlier output (name_restoration.py,
+phonetic_index.py) write the new rows first and only then delete the older
+ones: newest_created_at() marks where the previous run ends, and
+finish_replacement() deletes the rows up to that mark once every new row
+is in - or, if any row was rejected, deletes the partial new run instead and
+keeps the previous one. A single rejected row is enough: a partial run
+would silently drop rows the previous run had, so the previous run stays
+until the rejects are fixed and the writer is run again. A crash in between
+leaves both runs, and the next successful run removes them.
+
+Usage:
+  writer = BatchWriter(SUPABASE_URL, "lexicon", headers, params={"on_conflict": "strong_number"})
+  for batch in batches:
+      writer.write(batch)
+  writer.close()
+"""
+
+import os
+import json
+import time
+from datetime import datetime
+from contextlib import nullcontext
+
+import requests
+
+REJECTS_DIR = "rejects"
+RETRY_STATUSES = {429, 502, 503, 504}
+MAX_RETRIES = 4
+BACKOFF_SECONDS = 0.5
+ROW_ERROR_STATUSES = {400, 409}
+ROW_ERROR_CLASSES = ('22', '23')     # data exception, integrity constraint violation
+
+class BatchWriteError(requests.RequestException):
+    """A batch failed for a reason no subset of its rows would avoid."""
+    def __init__(self, table, status, error):
+        super().__init__(f"{table}: HTTP {status}: {error}" if status else f"{table}: {error}")
+        self.status = status
+        self.error = error
+
+def error_code(error):
+    """PostgREST / PostgreSQL error code from a response body, or None."""
+    try:
+        body = json.loads(error)
+    except (TypeError, ValueError):
+        return None
+    return body.get('code') if isinstance(body, dict) else None
+
+def is_row_error(status, error):
+    """Whether a failed batch may succeed without some of its rows."""
+    code = error_code(error) or ''
+    if code.startswith(ROW_ERROR_CLASSES):
+        return True
+    return status in ROW_ERROR_STATUSES and not code.startswith(('PGRST', '42'))
+
+class BatchWriter:
+    def __init__(self, supabase_url, table, headers, params=None, rejects_path=None, metrics=None):
+        self.url = f"{supabase_url}/rest/v1/{table}"
+        self.table = table
+        self.params = params
+        self.metrics = metrics
+        self.session = requests.Session()
+        self.session.headers.update(headers)
+        self.session.headers.setdefault('Content-Type', 'application/json')
+        self.rejects_path = rejects_path or os.path.join(
+            REJECTS_DIR, f"{table}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.jsonl")
+        self._rejects = None
+        self.written = 0
+        self.rejected = 0
+        self.requests = 0
+
+    def _stage(self, name, rows, size=0):
+        return self.metrics.stage(name, rows, size) if self.metrics else nullcontext()
+
+    def _post(self, records):
+        """POST once, retrying transient failures. Returns (ok, status, error text)."""
+        with self._stage('encode', len(records)) as stage:
+            body = json.dumps(records, allow_nan=False).encode('utf-8')
+            if stage:
+                stage.bytes = len(body)
+        for attempt in range(MAX_RETRIES + 1):
+            self.requests += 1
+            if attempt and self.metrics:
+                self.metrics.count('retries')
+            try:
+                with self._stage('send', len(records), len(body)):
+                    response = self.session.post(self.url, params=self.params, data=body)
+            except requests.RequestException as e:
+                status, error, retry_after = None, str(e), None
+            else:
+                if response.status_code in (200, 201, 204):
+                    return True, response.status_code, None
+                status, error = response.status_code, response.text
+                retry_after = response.headers.get('Retry-After')
+                if status not in RETRY_STATUSES:
+                    return False, status, error
+            if attempt < MAX_RETRIES:
+                delay = BACKOFF_SECONDS * (2 ** attempt)
+                if retry_after and retry_after.isdigit():
+                    delay = max(delay, int(retry_after))
+                time.sleep(delay)
+        return False, status, error
+
+    def _reject(self, record, status, error):
+        if self._rejects is None:
+            os.makedirs(os.path.dirname(self.rejects_path) or '.', exist_ok=True)
+            self._rejects = open(self.rejects_path, 'a', encoding='utf-8')
+        self._rejects.write(json.dumps({
+            'table': self.table,
+            'status': status,
+            'error': error,
+            'record': record,
+        }, ensure_ascii=False, default=str) + '\n')
+        self._rejects.flush()
+        self.rejected += 1
+        if self.metrics:
+            self.metrics.count('rejected')
+
+    def write(self, records):
+        """
+        Write a batch, bisecting around bad rows. Returns the number of rows
+        written; raises BatchWriteError when the failure is not row-level.
+        """
+        if not records:
+            return 0
+        ok, status, error = self._post(records)
+        if ok:
+            self.written += len(records)
+            return len(records)
+        return self._bisect(records, status, error)
+
+    def _bisect(self, records, status, error):
+        if not is_row_error(status, error):
+            raise BatchWriteError(self.table, status, error)
+        if len(records) == 1:
+            self._reject(records[0], status, error)
+            return 0
+        middle = len(records) // 2
+        halves = [records[:middle], records[middle:]]
+        written = 0
+        for half in halves:
+            ok, half_status, half_error = self._post(half)
+            if ok:
+                self.written += len(half)
+                written += len(half)
+            else:
+                written += self._bisect(half, half_status, half_error)
+        return written
+
+    def close(self):
+        """Close the session and rejects file; report where rejects went."""
+        self.session.close()
+        if self._rejects is not None:
+            self._rejects.close()
+            self._rejects = None
+            print(f"   ⚠️  {self.rejected} rejected {self.table} rows written to {self.rejects_path}")
+
+# =============================================================================
+# Replacing an earlier run
+# =============================================================================
+
+def newest_created_at(supabase_url, headers, table, filters):
+    """created_at of the newest row matching `filters` (PostgREST filter params), or None."""
+    response = requests.get(
+        f"{supabase_url}/rest/v1/{table}",
+        headers=headers,
+        params={**filters, "select": "created_at", "order": "created_at.desc", "limit": 1},
+    )
+    response.raise_for_status()
+    rows = response.json()
+    return rows[0]['created_at'] if rows else None
+
+def finish_replacement(supabase_url, headers, table, filters, cutoff, writer):
+    """
+    After `writer` has written a new run of the rows matching `filters`:
+    delete the previous run (created_at <= cutoff) if every row went in, or
+    the partial new run (created_at > cutoff) if even one row was rejected,
+    so a run is only ever replaced by a complete one. Returns True when the
+    new run replaced the old one.
+    """
+    replaced = not writer.rejected
+    if replaced and cutoff is None:
+        return True
+    scope = {"created_at": f"{'lte' if replaced else 'gt'}.{cutoff}"} if cutoff else {}
+    response = requests.delete(f"{supabase_url}/rest/v1/{table}", headers=headers, params={**filters, **scope})
+    response.raise_for_status()
+    return replaced
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Build verse_alignments
+All4Yah Project
+
+Populates verse_alignments (migration 001) by joining WLC, LXX, SBLGNT and WEB
+on a canonical (Masoretic) verse ordinal. LXX and WEB references are remapped
+through versification.py first, so e.g. LXX Psalm 22 and WEB Psalm 23:1 both
+land on MT Psalm 23:1-2 correctly.
+
+Each manuscript is read once with a server-side cursor (id and word count
+only - no verse text crosses the wire) and indexed in memory by canonical
+ordinal. Every ordinal attested in at least two manuscripts becomes one row with a
+heuristic score: how closely each witness's word count matches what the
+book-level length ratio to the reference text predicts. The whole table is
+then replaced in a single transaction with one COPY.
+
+Usage:
+  python3 database/build-verse-alignments.py
+  python3 database/build-verse-alignments.py --book PSA --csv psa_alignments.csv   # inspect without loading
+"""
+
+import io
+import os
+import sys
+import csv
+import json
+import argparse
+import psycopg2
+from collections import defaultdict
+from datetime import datetime
+
+from versification import system_for, canonical_ordinal, ordinal, reference, is_split_continuation
+
+# =============================================================================
+# Configuration
+# =============================================================================
+
+DB_HOST = "db.txeeaekwhkdilycefczq.supabase.co"
+DB_NAME = "postgres"
+DB_USER = "postgres"
+DB_PASSWORD = os.getenv("SUPABASE_DB_PASSWORD")
+
+ALIGNED_MANUSCRIPTS = ['WLC', 'LXX', 'SBLGNT', 'WEB']
+REFERENCE_ORDER = ['WLC', 'SBLGNT', 'LXX', 'WEB']
+COLUMNS = {
+    'WLC': 'verse_wlc_id',
+    'LXX': 'verse_lxx_id',
+    'SBLGNT': 'verse_sblgnt_id',
+    'WEB': 'verse_web_id',
+}
+FETCH_SIZE = 10000
+REMAP_PENALTY = 0.95
+
+# =============================================================================
+# Loading
+# =============================================================================
+
+def get_manuscript_ids(cur):
+    cur.execute("SELECT code, id FROM manuscripts WHERE code = ANY(%s)", (ALIGNED_MANUSCRIPTS,))
+    return dict(cur.fetchall())
+
+def load_index(conn, code, manuscript_id, books=None):
+    """
+    Return ({canonical_ordinal: (verse_id, words, original_or_None)}, skipped)
+    for one manuscript. original is the manuscript's own (book, chapter, verse),
+    set only when versification remapped the verse. Verses outside the ordinal
+    space (unknown books) are skipped.
+
+    The two halves of a split verse (versification.SPLIT_VERSES) share one
+    entry: the first half's id, both halves' words. Any other two verses
+    landing on the same canonical verse is a versification bug and raises
+    ValueError rather than dropping one of them.
+    """
+    system = system_for(code)
+    index = {}
+    sources = {}
+    skipped = 0
+    with conn.cursor(name=f"alignments_{code.lower()}") as cur:
+        cur.itersize = FETCH_SIZE
+        cur.execute("""
+            SELECT id, book, chapter, verse,
+                   coalesce(array_length(regexp_split_to_array(btrim(text), '\\s+'), 1), 0)
+            FROM verses
+            WHERE manuscript_id = %s AND (%s::TEXT[] IS NULL OR book = ANY(%s::TEXT[]))
+        """, (manuscript_id, books, books))
+        for verse_id, book, chapter, verse, words in cur:
+            try:
+                key = canonical_ordinal(system, book, chapter, verse)
+                remapped = key != ordinal(book, chapter, verse)
+            except (KeyError, ValueError):
+                skipped += 1
+                continue
+            entry = (verse_id, words, (book, chapter, verse) if remapped else None)
+            source = (book, chapter, verse)
+            if key in index:
+                other, (first_id, first_words, first_original) = sources[key], index[key]
+                if is_split_continuation(system, *source):         # second half after the first
+                    entry, source = (first_id, first_words + words, first_original), other
+                elif is_split_continuation(system, *other):        # first half after the second
+                    entry = (verse_id, words + first_words, entry[2])
+                else:
+                    target = reference(key)
+                    raise ValueError(f"{code} {book} {chapter}:{verse} and {other[0]} {other[1]}:{other[2]} "
+                                     f"both map to canonical {target[0]} {target[1]}:{target[2]}")
+            index[key] = entry
+            sources[key] = source
+    return index, skipped
+
+# =============================================================================
+# Scoring
+# =============================================================================
+
+def book_ratios(indexes):
+    """Per manuscript and book: total words relative to the reference text for that book."""
+    totals = defaultdict(lambda: defaultdict(int))
+    for code, index in indexes.items():
+        for key, (_, words, _) in index.items():
+            totals[reference(key)[0]][code] += words
+    ratios = {}
+    for book, per_code in totals.items():
+        reference_code = next((c for c in REFERENCE_ORDER if per_code.get(c)), None)
+        for code, words in per_code.items():
+            ratios[(code, book)] = words / per_code[reference_code] if reference_code else 1.0
+    return ratios
+
+def score_row(book, present, ratios):
+    """Mean length agreement of each witness with the reference verse."""
+    reference_code = next(c for c in REFERENCE_ORDER if c in present)
+    ref_words = present[reference_code][1]
+    ref_ratio = ratios.get((reference_code, book), 1.0) or 1.0
+    agreements = {}
+    for code, (_, words, original) in present.items():
+        if code == reference_code:
+            continue
+        expected = ref_words * ratios.get((code, book), 1.0) / ref_ratio
+        high = max(expected, words)
+        agreement = min(expected, words) / high if high else 1.0
+        if original is not None:
+            agreement *= REMAP_PENALTY
+        agreements[code] = round(agreement, 3)
+    score = sum(agreements.values()) / len(agreements)
+    return round(score, 3), reference_code, agreements
+
+def build_rows(indexes):
+    """Yield CSV rows, in canonical order, for every verse attested in two or more manuscripts."""
+    ratios = book_ratios(indexes)
+    keys = set()
+    for index in indexes.values():
+        keys.update(index)
+
+    for key in sorted(keys):
+        present = {code: index[key] for code, index in indexes.items() if key in index}
+        if len(present) < 2:
+            continue
+        book, chapter, verse = reference(key)
+        score, reference_code, agreements = score_row(book, present, ratios)
+        metadata = {
+            'key': f"{book} {chapter}:{verse}",
+            'reference': reference_code,
+            'length_agreement': agreements,
+        }
+        remapped = {code: f"{o[0]} {o[1]}:{o[2]}" for code, (_, _, o) in present.items() if o}
+        if remapped:
+            metadata['remapped'] = remapped
+        yield [present[code][0] if code in present else None for code in ALIGNED_MANUSCRIPTS] + [
+            score, 'heuristic', json.dumps(metadata, ensure_ascii=False)
+        ]
+
+# =============================================================================
+# Main
+# =============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Build verse_alignments across WLC, LXX, SBLGNT and WEB")
+    parser.add_argument("--book", action="append", help="Limit to a book code (repeatable)")
+    parser.add_argument("--csv", help="Write the rows to a CSV file instead of loading them")
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print("Verse Alignment Builder - All4Yah")
+    print("=" * 80)
+    print(f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+
+    try:
+        conn = psycopg2.connect(
+            host=DB_HOST,
+            database=DB_NAME,
+            user=DB_USER,
+            password=DB_PASSWORD,
+            options="-c client_encoding=UTF8"
+        )
+    except psycopg2.OperationalError as e:
+        print(f"❌ Connection failed: {e}")
+        sys.exit(1)
+
+    with conn.cursor() as cur:
+        manuscript_ids = get_manuscript_ids(cur)
+
+    indexes = {}
+    for code in ALIGNED_MANUSCRIPTS:
+        if code not in manuscript_ids:
+            print(f"⚠️  {code} manuscript not found - skipping")
+            continue
+        try:
+            indexes[code], skipped = load_index(conn, code, manuscript_ids[code], args.book)
+        except ValueError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        remapped = sum(1 for _, _, o in indexes[code].values() if o)
+        print(f"✓ {code:6} {len(indexes[code]):>7} verses ({remapped} remapped)")
+        if skipped:
+            print(f"   ⚠️  {skipped} verses outside the ordinal range skipped")
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    rows = 0
+    for row in build_rows(indexes):
+        writer.writerow(row)
+        rows += 1
+    print(f"\n✓ Built {rows} alignment rows")
+
+    if args.csv:
+        with open(args.csv, 'w', encoding='utf-8', newline='') as f:
+            f.write(buffer.getvalue())
+        print(f"✓ Wrote {args.csv}")
+        conn.close()
+        return
+
+    buffer.seek(0)
+    with conn.cursor() as cur:
+        cur.execute("DELETE FROM verse_alignments WHERE alignment_method = 'heuristic'")
+        cur.copy_expert(
+            "COPY verse_alignments (" + ', '.join(COLUMNS[c] for c in ALIGNED_MANUSCRIPTS) +
+            ", alignment_score, alignment_method, alignment_metadata) FROM STDIN WITH (FORMAT csv)",
+            buffer
+        )
+    conn.commit()
+    conn.close()
+
+    print(f"\n✅ Loaded {rows} rows into verse_alignments")
+    print(f"Finished: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+if __name__ == "__main__":
+    from profiling import profile_from_argv
+    profile_from_argv()
+    main()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Divine Name Occurrence Counter
+All4Yah Project
+
+Counts the Tetragrammaton per book straight from the imported manuscripts,
+replacing the hand-maintained divine_name_occurrences in books_tier_map.json.
+
+A token counts when its morphology carries H3068 (YHWH), H3069 (YHWH pointed
+as Elohim) or H3050 (Yah) - OSHB lemmas like "l/3068" as well as `strongs`
+arrays - or, for untagged tokens and verses without morphology, when its
+unpointed text contains יהוה or the paleo-Hebrew 𐤉𐤄𐤅𐤄 used in the scrolls.
+
+The reduction runs in one grouped query inside PostgreSQL, so only
+(manuscript, book, count) rows leave the database. A book's count is the
+highest across manuscripts: WLC is complete, DSS fragments are partial.
+
+The LXX is not counted: its tokens carry Greek numbers only, and κύριος
+(G2962) renders adonai and ordinary "lord" as well as the Tetragrammaton,
+so it cannot stand in for YHWH.
+
+import-canonical-books.py calls count_divine_names() during its upsert, and
+its --divine-names-only mode (import-all's divine-names stage, after WLC)
+recounts once the manuscripts are imported.
+
+Usage:
+  python3 database/divine_name_counts.py
+  python3 database/divine_name_counts.py --manuscripts WLC DSS
+"""
+
+import os
+import sys
+import argparse
+import psycopg2
+
+# =============================================================================
+# Configuration
+# =============================================================================
+
+DB_HOST = "db.txeeaekwhkdilycefczq.supabase.co"
+DB_NAME = "postgres"
+DB_USER = "postgres"
+DB_PASSWORD = os.getenv("SUPABASE_DB_PASSWORD")
+
+COUNTED_MANUSCRIPTS = ['WLC', 'DSS']
+DIVINE_NAME_STRONGS = ['H3068', 'H3069', 'H3050']
+LEMMA_PATTERN = r'(^|/)\s*(3068|3069|3050)([^0-9]|$)'
+SURFACE_PATTERN = 'יהוה|𐤉𐤄𐤅𐤄'
+POINTING_PATTERN = f"[{chr(0x0591)}-{chr(0x05C7)}]"  # cantillation + niqqud
+
+COUNT_SQL = """
+    WITH ms AS (
+        SELECT id, code FROM manuscripts WHERE code = ANY(%(codes)s)
+    ),
+    verse_morphology AS (
+        SELECT ms.code, v.book, v.text,
+               CASE jsonb_typeof(v.morphology)
+                   WHEN 'array' THEN v.morphology
+                   WHEN 'string' THEN (v.morphology #>> '{}')::jsonb
+                   ELSE '[]'::jsonb
+               END AS morphology
+        FROM verses v
+        JOIN ms ON ms.id = v.manuscript_id
+    ),
+    token_hits AS (
+        SELECT code, book, COUNT(*) AS hits
+        FROM verse_morphology
+        CROSS JOIN LATERAL jsonb_array_elements(morphology) AS t(token)
+        WHERE (token->>'lemma') ~ %(lemma)s
+           OR (token->'strongs') ?| %(strongs)s
+           OR (NOT token ? 'lemma' AND NOT token ? 'strongs'
+               AND regexp_replace(coalesce(token->>'text', token->>'word', ''), %(pointing)s, '', 'g') ~ %(surface)s)
+        GROUP BY code, book
+    ),
+    text_hits AS (
+        SELECT code, book,
+               SUM(regexp_count(regexp_replace(coalesce(text, ''), %(pointing)s, '', 'g'), %(surface)s)) AS hits
+        FROM verse_morphology
+        WHERE jsonb_array_length(morphology) = 0
+        GROUP BY code, book
+    )
+    SELECT code, book, SUM(hits)::INTEGER
+    FROM (SELECT * FROM token_hits UNION ALL SELECT * FROM text_hits) AS hits
+    GROUP BY code, book
+    HAVING SUM(hits) > 0
+"""
+
+# =============================================================================
+# Counting
+# =============================================================================
+
+def count_by_manuscript(cur, manuscripts=COUNTED_MANUSCRIPTS):
+    """Return {manuscript_code: {book_code: occurrences}}."""
+    cur.execute(COUNT_SQL, {
+        'codes': list(manuscripts),
+        'lemma': LEMMA_PATTERN,
+        'strongs': DIVINE_NAME_STRONGS,
+        'pointing': POINTING_PATTERN,
+        'surface': SURFACE_PATTERN,
+    })
+    counts = {}
+    for code, book, hits in cur.fetchall():
+        counts.setdefault(code, {})[book] = hits
+    return counts
+
+def count_divine_names(cur, manuscripts=COUNTED_MANUSCRIPTS):
+    """Return {book_code: occurrences}, taking the highest count across manuscripts."""
+    books = {}
+    for per_book in count_by_manuscript(cur, manuscripts).values():
+        for book, hits in per_book.items():
+            books[book] = max(books.get(book, 0), hits)
+    return books
+
+# =============================================================================
+# CLI Entry Point
+# =============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Count divine name occurrences per book")
+    parser.add_argument("--manuscripts", nargs="+", default=COUNTED_MANUSCRIPTS, help="Manuscript codes to scan")
+    args = parser.parse_args()
+
+    try:
+        conn = psycopg2.connect(
+            host=DB_HOST,
+            database=DB_NAME,
+            user=DB_USER,
+            password=DB_PASSWORD,
+            options="-c client_encoding=UTF8"
+        )
+    except psycopg2.OperationalError as e:
+        print(f"❌ Connection failed: {e}")
+        sys.exit(1)
+
+    cur = conn.cursor()
+    by_manuscript = count_by_manuscript(cur, args.manuscripts)
+    cur.close()
+    conn.close()
+
+    counts = {}
+    for code in args.manuscripts:
+        per_book = by_manuscript.get(code, {})
+        print(f"{code:6} | {sum(per_book.values()):>6} occurrences in {len(per_book)} books")
+        for book, hits in per_book.items():
+            counts[book] = max(counts.get(book, 0), hits)
+
+    print()
+    for book, hits in sorted(counts.items()):
+        print(f"  {book:5} {hits:>5}")
+
+if __name__ == "__main__":
+    from profiling import profile_from_argv
+    profile_from_argv()
+    main()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Gematria / Isopsephy Values
+All4Yah Project
+
+Hebrew gematria (Mispar Hechrechi, with the Gadol final-letter values as an
+option) and Greek isopsephy, with the same letter values as
+migrations/add_gematria_tables.sql and frontend/src/utils/gematria.js.
+
+Values are computed with one str.translate() pass per text: LETTER_TABLE
+maps every BMP code point to the value-bearing letters it contains after
+normalize.py's folding (niqqud, cantillation, accents and breathings
+dropped, presentation forms decomposed) and deletes everything else, so
+the value is a plain sum over the surviving letters. Hebrew and Greek
+share the table because their code points never overlap.
+
+values_many() folds a whole batch of words - the lexicon, or every
+morphology token of a manuscript (verse_values_many) - in a single
+translate call, and computes each distinct form once.
+
+    from gematria import value, verse_values
+    value('יְהוָה')             -> 26
+    value('Ἰησοῦς')            -> 888
+    value('אלהים', 'gadol')    -> 646
+
+Usage:
+  python3 database/gematria.py "בְּרֵאשִׁ֖ית"
+  python3 database/gematria.py "λόγος" --system katan
+"""
+
+import json
+import argparse
+
+from normalize import FOLD_TABLE, SEPARATOR
+
+HEBREW_VALUES = {
+    'א': 1, 'ב': 2, 'ג': 3, 'ד': 4, 'ה': 5, 'ו': 6, 'ז': 7, 'ח': 8, 'ט': 9,
+    'י': 10, 'כ': 20, 'ל': 30, 'מ': 40, 'נ': 50, 'ס': 60, 'ע': 70, 'פ': 80, 'צ': 90,
+    'ק': 100, 'ר': 200, 'ש': 300, 'ת': 400,
+}
+HEBREW_FINALS = {'ך': 'כ', 'ם': 'מ', 'ן': 'נ', 'ף': 'פ', 'ץ': 'צ'}
+GADOL_FINAL_VALUES = {'ך': 500, 'ם': 600, 'ן': 700, 'ף': 800, 'ץ': 900}
+
+GREEK_VALUES = {
+    'α': 1, 'β': 2, 'γ': 3, 'δ': 4, 'ε': 5, 'ϝ': 6, 'ζ': 7, 'η': 8, 'θ': 9,
+    'ι': 10, 'κ': 20, 'λ': 30, 'μ': 40, 'ν': 50, 'ξ': 60, 'ο': 70, 'π': 80, 'ϙ': 90,
+    'ρ': 100, 'σ': 200, 'τ': 300, 'υ': 400, 'φ': 500, 'χ': 600, 'ψ': 700, 'ω': 800,
+}
+
+STANDARD_VALUES = {**HEBREW_VALUES, **{f: HEBREW_VALUES[m] for f, m in HEBREW_FINALS.items()}, **GREEK_VALUES}
+GADOL_VALUES = {**STANDARD_VALUES, **GADOL_FINAL_VALUES}
+SYSTEMS = ['standard', 'gadol', 'katan']
+
+# Blocks that can contain value-bearing letters; every other BMP code point is deleted
+LETTER_RANGES = [
+    (0x0370, 0x03FF),    # Greek (incl. archaic digamma, koppa)
+    (0x0590, 0x05FF),    # Hebrew
+    (0x1F00, 0x1FFF),    # Greek Extended (polytonic)
+    (0xFB1D, 0xFB4F),    # Hebrew presentation forms
+]
+
+def _build_table(keep_finals=False):
+    table = [''] * 0x10000
+    table[ord(SEPARATOR)] = SEPARATOR
+    for low, high in LETTER_RANGES:
+        for cp in range(low, high + 1):
+            ch = chr(cp)
+            if keep_finals and ch in HEBREW_FINALS:
+                table[cp] = ch
+                continue
+            folded = FOLD_TABLE[cp] if cp < len(FOLD_TABLE) else ch
+            folded = chr(folded) if isinstance(folded, int) else folded
+            table[cp] = ''.join(c for c in folded if c in STANDARD_VALUES)
+    return table
+
+LETTER_TABLE = _build_table()
+GADOL_TABLE = _build_table(keep_finals=True)
+
+def katan(n):
+    """Reduced (Mispar Katan) value: 1-9, 0 for 0."""
+    return (n - 1) % 9 + 1 if n > 0 else 0
+
+def _letters_value(letters, values):
+    try:
+        return sum(map(values.__getitem__, letters))
+    except KeyError:
+        # Only astral-plane characters pass through the table untranslated
+        return sum(values.get(c, 0) for c in letters)
+
+def value(text, system='standard'):
+    """Gematria / isopsephy of a Hebrew or Greek word or phrase (0 if it has no letters)."""
+    if system == 'gadol':
+        return _letters_value((text or '').translate(GADOL_TABLE), GADOL_VALUES)
+    total = _letters_value((text or '').translate(LETTER_TABLE), STANDARD_VALUES)
+    return katan(total) if system == 'katan' else total
+
+def values_many(words, system='standard'):
+    """value() for every word, folding all distinct forms in one translate() pass."""
+    words = [w or '' for w in words]
+    forms = list(dict.fromkeys(w.replace(SEPARATOR, '') for w in words))
+    table, values = (GADOL_TABLE, GADOL_VALUES) if system == 'gadol' else (LETTER_TABLE, STANDARD_VALUES)
+    letters = SEPARATOR.join(forms).translate(table).split(SEPARATOR)
+    by_form = {}
+    for form, form_letters in zip(forms, letters):
+        total = _letters_value(form_letters, values)
+        by_form[form] = katan(total) if system == 'katan' else total
+    return [by_form[w.replace(SEPARATOR, '')] for w in words]
+
+def token_surfaces(morphology):
+    """Surface word of each stored morphology token (SBLGNT/LXX 'word', OSHB 'text')."""
+    if isinstance(morphology, str):
+        morphology = json.loads(morphology)
+    return [raw.get('word') or raw.get('text') or '' for raw in morphology or []]
+
+def verse_values_many(verses):
+    """
+    Sorted distinct word values of each (morphology, text) verse, for
+    verses.gematria_values: one per morphology token, or per whitespace-
+    separated word of the text when a verse has no morphology. All words
+    of all verses go through one values_many() call.
+    """
+    words = []
+    bounds = []
+    for morphology, text in verses:
+        start = len(words)
+        words.extend(token_surfaces(morphology) or (text or '').split())
+        bounds.append((start, len(words)))
+    values = values_many(words)
+    return [sorted({v for v in values[start:end] if v}) for start, end in bounds]
+
+def verse_values(morphology, text=None):
+    return verse_values_many([(morphology, text)])[0]
+
+# =============================================================================
+# CLI Entry Point
+# =============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Hebrew gematria / Greek isopsephy")
+    parser.add_argument("text", help="Hebrew or Greek word or phrase")
+    parser.add_argument("--system", choices=SYSTEMS, default='standard', help="Value system")
+    args = parser.parse_args()
+
+    print(f"{args.text}: {value(args.text, args.system)} ({args.system})")
+    words = args.text.split()
+    if len(words) > 1:
+        for word, word_value in zip(words, values_many(words, args.system)):
+            print(f"   {word}: {word_value}")
+
+if __name__ == "__main__":
+    from profiling import profile_from_argv
+    profile_from_argv()
+    main()
@@ -11,6 +11,11 @@ Usage:
   python3 database/generate-lxx-sql.py                # Generate full SQL file
   python3 database/generate-lxx-sql.py --tier 2       # Only deuterocanonical books
   python3 database/generate-lxx-sql.py --test         # Genesis 1 only
+  python3 database/generate-lxx-sql.py --omit ordinal  # target lacks migration 006
+
+The file writes verses.ordinal, text_normalized and gematria_values
+(migrations 006-008) and stops with an error before inserting anything if
+one of them is missing; --omit leaves columns out for an older database.
 """
 
 import csv
@@ -18,28 +23,16 @@ import json
 import re
 import sys
 
+from versification import LXX_BOOK_IDS, verse_ordinal
+from normalize import normalize_many
+from gematria import verse_values_many
+from optional_columns import OPTIONAL_COLUMNS
+
 # File paths
 LXX_CSV = "manuscripts/lxx-morphology/LXX-Rahlfs-1935/11_end-users_files/MyBible/Bibles/LXX_final_main.csv"
 TIER_MAP_JSON = "database/books_tier_map.json"
 OUTPUT_SQL = "database/lxx-import.sql"
 
-# Book ID mappings
-BOOK_ID_MAP = {
-    10: "GEN", 20: "EXO", 30: "LEV", 40: "NUM", 50: "DEU",
-    60: "JOS", 70: "JDG", 80: "RUT", 90: "1SA", 100: "2SA",
-    110: "1KI", 120: "2KI", 130: "1CH", 140: "2CH",
-    150: "EZR", 160: "NEH", 190: "EST",
-    220: "JOB", 230: "PSA", 240: "PRO", 250: "ECC", 260: "SNG",
-    290: "ISA", 300: "JER", 310: "LAM", 330: "EZK", 340: "DAN",
-    350: "HOS", 360: "JOL", 370: "AMO", 380: "OBA", 390: "JON",
-    400: "MIC", 410: "NAM", 420: "HAB", 430: "ZEP", 440: "HAG",
-    450: "ZEC", 460: "MAL",
-    # Deuterocanonical books
-    165: "1ES", 170: "TOB", 180: "JDT", 232: "PSS",
-    462: "1MA", 464: "2MA", 466: "3MA", 467: "4MA",
-    270: "WIS", 280: "SIR", 315: "LJE", 320: "BAR",
-    325: "SUS", 345: "BEL", 800: "ODE"
-}
 
 def load_tier_map():
     """Load canonical tier mappings from JSON."""
@@ -83,8 +76,17 @@ def escape_sql_string(s):
     """Escape string for SQL."""
     return s.replace("'", "''")
 
-def generate_sql(tier_filter=None, test_mode=False):
-    """Generate SQL import file."""
+def column_check_sql(columns):
+    """DO block that aborts the import when one of the optional verse `columns` does not exist."""
+    checks = "\n".join(f"""    IF NOT EXISTS (SELECT 1 FROM information_schema.columns
+                   WHERE table_name = 'verses' AND column_name = '{column}') THEN
+        RAISE EXCEPTION 'verses.{column} does not exist: apply migrations/{OPTIONAL_COLUMNS['verses'][column]} or regenerate with --omit {column}';
+    END IF;""" for column in columns)
+    return f"DO $$\nBEGIN\n{checks}\nEND\n$$;\n\n"
+
+def generate_sql(tier_filter=None, test_mode=False, omit=()):
+    """Generate SQL import file, without the optional verse columns in `omit`."""
+    optional = [c for c in OPTIONAL_COLUMNS['verses'] if c not in omit]
     print(f"Loading canonical tier mappings from {TIER_MAP_JSON}...")
     tier_map = load_tier_map()
     print(f"✓ Loaded {len(tier_map)} book definitions\n")
@@ -103,7 +105,7 @@ def generate_sql(tier_filter=None, test_mode=False):
             verse = int(row[2])
             verse_text = row[3]
 
-            book_code = BOOK_ID_MAP.get(book_id)
+            book_code = LXX_BOOK_IDS.get(book_id)
             if not book_code:
                 continue
 
@@ -146,6 +148,9 @@ def generate_sql(tier_filter=None, test_mode=False):
         f.write(f"-- Generated: {timestamp}\n\n")
 
         f.write("BEGIN;\n\n")
+        if optional:
+            f.write("-- Columns from migrations 006-008\n")
+            f.write(column_check_sql(optional))
 
         # Create/update LXX manuscript
         f.write("-- Create or update LXX manuscript\n")
@@ -178,18 +183,27 @@ ON CONFLICT (code) DO UPDATE SET
 
             f.write(f"-- {book_code}: {name} (Tier {tier}) - {len(verses)} verses\n")
 
-            for v in verses:
-                text_escaped = escape_sql_string(v['text'])
+            normalized_texts = normalize_many([v['text'] for v in verses])
+            book_values = verse_values_many([(v['morphology'], v['text']) for v in verses])
+            for v, normalized, values in zip(verses, normalized_texts, book_values):
                 morph_json = json.dumps(v['morphology']).replace("'", "''")
+                ordinal = verse_ordinal(book_code, v['chapter'], v['verse'])
+                row = {
+                    'text': f"'{escape_sql_string(v['text'])}'",
+                    'text_normalized': f"'{escape_sql_string(normalized)}'",
+                    'morphology': f"'{morph_json}'::jsonb",
+                    'canonical_tier': str(tier),
+                    'ordinal': 'NULL' if ordinal is None else str(ordinal),
+                    'gematria_values': f"'{{{','.join(map(str, values))}}}'::integer[]",
+                }
+                columns = [c for c in row if c not in omit]
 
                 f.write(f"""
-INSERT INTO verses (manuscript_id, book, chapter, verse, text, morphology, canonical_tier)
-SELECT m.id, '{book_code}', {v['chapter']}, {v['verse']}, '{text_escaped}', '{morph_json}'::jsonb, {tier}
+INSERT INTO verses (manuscript_id, book, chapter, verse, {', '.join(columns)})
+SELECT m.id, '{book_code}', {v['chapter']}, {v['verse']}, {', '.join(row[c] for c in columns)}
 FROM manuscripts m WHERE m.code = 'LXX'
 ON CONFLICT (manuscript_id, book, chapter, verse) DO UPDATE SET
-    text = EXCLUDED.text,
-    morphology = EXCLUDED.morphology,
-    canonical_tier = EXCLUDED.canonical_tier;
+    {', '.join(f"{c} = EXCLUDED.{c}" for c in columns)};
 """)
 
             total_verses += len(verses)
@@ -202,10 +216,14 @@ ON CONFLICT (manuscript_id, book, chapter, verse) DO UPDATE SET
     print(f'  PGPASSWORD="@4HQZgassmoe" psql -h db.txeeaekwhkdilycefczq.supabase.co -U postgres -d postgres -f {OUTPUT_SQL} -4\n')
 
 if __name__ == "__main__":
+    from profiling import profile_from_argv
+    profile_from_argv()
     import argparse
     parser = argparse.ArgumentParser(description="Generate LXX import SQL")
     parser.add_argument("--tier", type=int, choices=[1, 2], help="Only this tier")
     parser.add_argument("--test", action="store_true", help="Test mode (Genesis 1)")
+    parser.add_argument("--omit", nargs="+", default=[], choices=list(OPTIONAL_COLUMNS['verses']),
+                        help="Optional columns the target database does not have yet")
     args = parser.parse_args()
 
-    generate_sql(tier_filter=args.tier, test_mode=args.test)
+    generate_sql(tier_filter=args.tier, test_mode=args.test, omit=args.omit)
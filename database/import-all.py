@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""
+Import Orchestrator
+All4Yah Project
+
+Runs the importers as one dependency graph instead of by hand in the right
+order:
+
+    stage            after
+    canonical-books  -                 tiers, JSON divine-name counts
+    lxx              canonical-books
+    wlc              canonical-books
+    sblgnt           canonical-books
+    oshb             wlc
+    cross-refs       wlc, sblgnt
+    divine-names     wlc               counts from the imported verses
+    lexicon          -
+
+Stages whose dependencies are done run concurrently (--jobs), so the lexicon
+loads alongside LXX and the WLC/SBLGNT imports. Each stage is its usual
+script in a subprocess, with its output in data/cache/import-all/<stage>.log.
+
+A stage's fingerprint is the sha256 of its command line, its script, the
+database/ modules the script imports (directly or through other modules,
+e.g. versification.py and normalize.py for LXX; not the profiling and
+metrics instrumentation), the source files it reads and the fingerprints
+of the stages it depends on. A stage whose fingerprint
+matches its last successful run is skipped, so a rebuild only re-runs what
+changed and whatever depends on it. File hashes are kept with (size, mtime)
+in the state file, so unchanged sources are not re-read. Inputs are the
+paths the scripts actually open, which for the node importers lie outside
+the repository; a missing input is flagged in the stage listing.
+
+Usage:
+  python3 database/import-all.py                      # everything that changed
+  python3 database/import-all.py cross-refs           # cross-refs and what it depends on
+  python3 database/import-all.py --dry-run            # show what would run
+  python3 database/import-all.py lxx --force          # re-run lxx even if unchanged
+  python3 database/import-all.py --jobs 2 --oshb-sql database/oshb-genesis.sql
+"""
+
+import os
+import sys
+import re
+import ast
+import json
+import time
+import hashlib
+import argparse
+import subprocess
+from typing import List, NamedTuple
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime
+
+from lexicon_parser import LEXICON_FILES
+
+# =============================================================================
+# Configuration
+# =============================================================================
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STATE_DIR = os.path.join(BASE_DIR, 'data', 'cache', 'import-all')
+STATE_PATH = os.path.join(STATE_DIR, 'state.json')
+DEFAULT_JOBS = 3
+CHUNK_SIZE = 1 << 20
+PYTHON = sys.executable
+
+DATABASE_DIR = os.path.join(BASE_DIR, 'database')
+LXX_DIR = "manuscripts/lxx-morphology/LXX-Rahlfs-1935/11_end-users_files/MyBible/Bibles"
+OSHB_SQL = "database/oshb-genesis.sql"
+# Where the node importers read their sources (import-wlc.js loadWLCData,
+# import-sblgnt.js importBook), relative to BASE_DIR like every input
+WLC_SOURCE = "../manuscripts/hebrew/wlc/index.js"
+SBLGNT_SOURCE = "/home/hempquarterz/projects/All4Yah/manuscripts/greek_nt/morphgnt"
+# Instrumentation only - changing it does not change what a stage stores
+UNFINGERPRINTED = {'database/profiling.py', 'database/import_metrics.py'}
+JS_REQUIRE = re.compile(r"""require\(\s*['"](\.{1,2}/[^'"]+)['"]\s*\)""")
+
+class Stage(NamedTuple):
+    name: str
+    command: List[str]
+    inputs: List[str]       # source files or directories, repo-relative
+    after: List[str]        # stages that must finish first
+
+def build_stages(oshb_sql=OSHB_SQL):
+    stages = [
+        Stage('canonical-books', [PYTHON, 'database/import-canonical-books.py', '--skip-divine-names'],
+              ['database/books_tier_map.json'], []),
+        Stage('wlc', ['node', 'database/import-wlc.js', '--full'],
+              [WLC_SOURCE], ['canonical-books']),
+        Stage('sblgnt', ['node', 'database/import-sblgnt.js', '--full'],
+              [SBLGNT_SOURCE], ['canonical-books']),
+        Stage('lxx', [PYTHON, 'database/import-lxx.py'],
+              [f"{LXX_DIR}/LXX_final_main.csv", f"{LXX_DIR}/books_main.csv", 'database/books_tier_map.json'],
+              ['canonical-books']),
+        Stage('oshb', [PYTHON, 'database/import-oshb-rest-api.py', oshb_sql],
+              [oshb_sql], ['wlc']),
+        Stage('lexicon', [PYTHON, 'database/import-strongs-final.py'],
+              [path for path, _ in LEXICON_FILES], []),
+        Stage('cross-refs', [PYTHON, 'database/import-cross-references-rest.py', '--full'],
+              ['manuscripts/cross-references/openbible-cross-references.txt'], ['wlc', 'sblgnt']),
+        Stage('divine-names', [PYTHON, 'database/import-canonical-books.py', '--divine-names-only'],
+              [], ['wlc']),
+    ]
+    return {stage.name: stage for stage in stages}
+
+# =============================================================================
+# Fingerprints
+# =============================================================================
+
+def load_state(path):
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return {'files': {}, 'stages': {}}
+
+def save_state(state, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def expand_inputs(paths):
+    """Files under each input path, relative to BASE_DIR and sorted; missing paths are kept as-is."""
+    files = []
+    for path in paths:
+        full = os.path.join(BASE_DIR, path)
+        if os.path.isdir(full):
+            for root, dirs, names in os.walk(full):
+                dirs.sort()
+                files.extend(os.path.normpath(os.path.join(path, os.path.relpath(os.path.join(root, name), full)))
+                             for name in sorted(names))
+        else:
+            files.append(path)
+    return files
+
+def file_hash(path, known):
+    """sha256 of a repo-relative file, reusing `known` entries whose size and mtime still match."""
+    full = os.path.join(BASE_DIR, path)
+    try:
+        stat = os.stat(full)
+    except FileNotFoundError:
+        known.pop(path, None)
+        return 'missing'
+    entry = known.get(path)
+    if entry and entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime:
+        return entry['sha256']
+    digest = hashlib.sha256()
+    with open(full, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    known[path] = {'size': stat.st_size, 'mtime': stat.st_mtime, 'sha256': digest.hexdigest()}
+    return known[path]['sha256']
+
+def local_modules(script, found=None):
+    """
+    Repo-relative paths of the database/ modules `script` imports, directly
+    or through other local modules: Python imports anywhere in the file
+    (including function-level ones), and relative require()s for node.
+    """
+    found = set() if found is None else found
+    full = os.path.join(BASE_DIR, script)
+    try:
+        with open(full, 'r', encoding='utf-8') as f:
+            source = f.read()
+    except FileNotFoundError:
+        return found
+    if script.endswith('.js'):
+        modules = [os.path.normpath(os.path.join(os.path.dirname(full), name))
+                   for name in JS_REQUIRE.findall(source)]
+        modules = [m if m.endswith('.js') else m + '.js' for m in modules]
+    else:
+        names = set()
+        for node in ast.walk(ast.parse(source, filename=full)):
+            if isinstance(node, ast.Import):
+                names.update(alias.name.split('.')[0] for alias in node.names)
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                names.add(node.module.split('.')[0])
+        modules = [os.path.join(DATABASE_DIR, f"{name}.py") for name in names]
+    for module in sorted(modules):
+        path = os.path.relpath(module, BASE_DIR)
+        if os.path.exists(module) and path not in found:
+            found.add(path)
+            local_modules(path, found)
+    return found
+
+def stage_files(stage):
+    """Every file a stage's fingerprint covers: script, local modules, inputs."""
+    script = next(arg for arg in stage.command if arg.endswith(('.py', '.js')))
+    modules = local_modules(script) - {script} - UNFINGERPRINTED
+    return [script] + sorted(modules) + expand_inputs(stage.inputs)
+
+def fingerprints(stages, order, known_files, missing=None):
+    """
+    {stage: fingerprint}, each covering the fingerprints of the stages it
+    needs. Files that do not exist are collected in `missing` per stage.
+    """
+    result = {}
+    for name in order:
+        stage = stages[name]
+        digest = hashlib.sha256(json.dumps(stage.command[1:]).encode())
+        for path in stage_files(stage):
+            sha = file_hash(path, known_files)
+            if sha == 'missing' and missing is not None:
+                missing.setdefault(name, []).append(path)
+            digest.update(f"{path}\0{sha}\n".encode())
+        for upstream in stage.after:
+            digest.update(f"after {upstream} {result[upstream]}\n".encode())
+        result[name] = digest.hexdigest()
+    return result
+
+# =============================================================================
+# Graph
+# =============================================================================
+
+def resolve(stages, targets):
+    """Targets plus everything they depend on, in dependency order."""
+    order, visiting = [], set()
+
+    def visit(name, path):
+        if name not in stages:
+            raise SystemExit(f"❌ Unknown stage '{name}' (stages: {', '.join(stages)})")
+        if name in order:
+            return
+        if name in visiting:
+            raise SystemExit(f"❌ Dependency cycle: {' -> '.join(path + [name])}")
+        visiting.add(name)
+        for upstream in stages[name].after:
+            visit(upstream, path + [name])
+        visiting.discard(name)
+        order.append(name)
+
+    for name in targets or list(stages):
+        visit(name, [])
+    return order
+
+def run_stage(stage):
+    """Run one stage's script with its output in the stage log. Returns (returncode, seconds, log path)."""
+    os.makedirs(STATE_DIR, exist_ok=True)
+    log_path = os.path.join(STATE_DIR, f"{stage.name}.log")
+    start = time.perf_counter()
+    with open(log_path, 'w', encoding='utf-8') as log:
+        log.write(f"$ {' '.join(stage.command)}\n")
+        log.flush()
+        try:
+            returncode = subprocess.run(stage.command, cwd=BASE_DIR, stdout=log, stderr=subprocess.STDOUT,
+                                        env=dict(os.environ, PYTHONUNBUFFERED='1')).returncode
+        except OSError as e:        # e.g. node not installed
+            log.write(f"{e}\n")
+            returncode = 127
+    return returncode, time.perf_counter() - start, log_path
+
+def log_tail(path, lines=15):
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        return f.readlines()[-lines:]
+
+def run_graph(stages, order, todo, state, prints, jobs, state_path):
+    """
+    Run the stages in `todo` as their dependencies finish, up to `jobs` at a
+    time. A failed stage blocks the stages that need it; the rest carry on.
+    Returns {stage: 'done' | 'failed' | 'blocked'}.
+    """
+    results = {name: 'done' for name in order if name not in todo}
+    pending = [name for name in order if name in todo]
+    running = {}
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        while pending or running:
+            for name in list(pending):
+                upstream = [results.get(u) for u in stages[name].after]
+                if any(status in ('failed', 'blocked') for status in upstream):
+                    results[name] = 'blocked'
+                    pending.remove(name)
+                    print(f"   ⏭️  {name}: blocked by a failed dependency")
+                elif all(status == 'done' for status in upstream):
+                    pending.remove(name)
+                    print(f"   ▶️  {name}: {' '.join(stages[name].command[1:])}")
+                    running[pool.submit(run_stage, stages[name])] = name
+            if not running:
+                continue
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name = running.pop(future)
+                returncode, seconds, log_path = future.result()
+                if returncode == 0:
+                    results[name] = 'done'
+                    state['stages'][name] = {
+                        'fingerprint': prints[name],
+                        'finished_at': datetime.now().isoformat(timespec='seconds'),
+                        'seconds': round(seconds, 1),
+                    }
+                    print(f"   ✅ {name} ({seconds:.1f}s)")
+                else:
+                    results[name] = 'failed'
+                    state['stages'].pop(name, None)
+                    print(f"   ❌ {name} exited {returncode} after {seconds:.1f}s - {os.path.relpath(log_path, BASE_DIR)}:")
+                    for line in log_tail(log_path):
+                        print(f"      {line.rstrip()}")
+                save_state(state, state_path)
+    return results
+
+# =============================================================================
+# Main
+# =============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the importers as a dependency graph, skipping unchanged stages")
+    parser.add_argument("targets", nargs='*', help="Stages to bring up to date (default: all), with their dependencies")
+    parser.add_argument("--jobs", type=int, default=DEFAULT_JOBS, help="Stages run at once")
+    parser.add_argument("--force", action="store_true", help="Re-run the named targets even if unchanged")
+    parser.add_argument("--force-all", action="store_true", help="Re-run every selected stage")
+    parser.add_argument("--dry-run", action="store_true", help="Show what would run")
+    parser.add_argument("--oshb-sql", default=OSHB_SQL, help="OSHB morphology SQL file")
+    parser.add_argument("--state", default=STATE_PATH, help="State file of stage fingerprints")
+    args = parser.parse_args()
+
+    stages = build_stages(args.oshb_sql)
+    order = resolve(stages, args.targets)
+
+    print("=" * 80)
+    print("Import Orchestrator - All4Yah")
+    print("=" * 80)
+    print(f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+
+    state = load_state(args.state)
+    missing = {}
+    prints = fingerprints(stages, order, state['files'], missing)
+    forced = set(order) if args.force_all else set(args.targets) if args.force else set()
+    todo = {name for name in order
+            if name in forced or state['stages'].get(name, {}).get('fingerprint') != prints[name]}
+    for name in order:
+        last = state['stages'].get(name)
+        status = 'run' if name in todo else f"unchanged since {last['finished_at']}"
+        needs = f" (after {', '.join(stages[name].after)})" if stages[name].after else ''
+        print(f"  {name:16} {status}{needs}")
+        for path in missing.get(name, []):
+            print(f"  {'':16} ⚠️  missing input {path}")
+    print()
+
+    if args.dry_run or not todo:
+        if not todo:
+            print("✅ Everything is up to date")
+        save_state(state, args.state)
+        return
+
+    start = time.perf_counter()
+    results = run_graph(stages, order, todo, state, prints, args.jobs, args.state)
+    elapsed = time.perf_counter() - start
+
+    failed = [name for name in order if results[name] in ('failed', 'blocked')]
+    print(f"\n{'❌' if failed else '✅'} {len(todo) - len(failed)}/{len(todo)} stages ran in {elapsed:.1f}s"
+          + (f"; not done: {', '.join(failed)}" if failed else ''))
+    print(f"Finished: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    if failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    from profiling import profile_from_argv
+    profile_from_argv()
+    main()
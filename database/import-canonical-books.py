@@ -10,21 +10,32 @@ Populates the canonical_books table from books_tier_map.json with:
 - Historical era information
 - Provenance confidence scores
 - Manuscript source attestations
-- Divine name occurrence counts
+- Divine name occurrence counts (computed from WLC/DSS by divine_name_counts.py;
+  the hand-entered JSON values are only a fallback for books not yet imported)
 
 This completes the canonical tier infrastructure started in migration 002.
 
+The counts need the manuscripts imported first, while the manuscript imports
+need the tiers. import-all.py therefore runs the upsert with
+--skip-divine-names before the manuscripts, and --divine-names-only after
+them to store the counts.
+
 Usage:
   python3 database/import-canonical-books.py
+  python3 database/import-canonical-books.py --skip-divine-names   # tiers only, JSON counts
+  python3 database/import-canonical-books.py --divine-names-only   # recount from the imported verses
 """
 
 import os
 import sys
 import json
+import argparse
 import psycopg2
 from psycopg2.extras import execute_batch
 from datetime import datetime
 
+from divine_name_counts import count_divine_names
+
 # =============================================================================
 # Configuration
 # =============================================================================
@@ -42,9 +53,10 @@ TIER_MAP_JSON = "database/books_tier_map.json"
 # Main Import Function
 # =============================================================================
 
-def import_canonical_books():
+def import_canonical_books(divine_names=True):
     """
-    Import canonical book reference data from books_tier_map.json.
+    Import canonical book reference data from books_tier_map.json. With
+    divine_names=False the JSON divine_name_occurrences are stored as-is.
     """
     print("=" * 80)
     print("Canonical Books Import - All4Yah Phase 1 Completion")
@@ -77,9 +89,16 @@ def import_canonical_books():
         print_sql_statements(books)
         sys.exit(1)
 
+    # Count divine names from the imported manuscripts
+    cur = conn.cursor()
+    divine_name_counts = {}
+    if divine_names:
+        print("Counting divine name occurrences in the imported manuscripts...")
+        divine_name_counts = count_divine_names(cur)
+        print(f"✓ Counted occurrences for {len(divine_name_counts)} books\n")
+
     # Import books
     print("Importing canonical books to database...\n")
-    cur = conn.cursor()
 
     # Clear existing data (for clean re-import)
     cur.execute("DELETE FROM canonical_books")
@@ -100,7 +119,7 @@ def import_canonical_books():
         manuscript_sources = book.get('manuscript_sources', [])
         included_in_canons = book.get('included_in_canons', [])
         quoted_in_nt = book.get('quoted_in_nt')
-        divine_name_occurrences = book.get('divine_name_occurrences', 0)
+        divine_name_occurrences = divine_name_counts.get(book_code, book.get('divine_name_occurrences', 0))
         divine_name_restorations = book.get('divine_name_restorations', [])
         notes = book.get('notes')
 
@@ -182,6 +201,37 @@ def import_canonical_books():
     print(f"\n✅ canonical_books table successfully populated!")
     print(f"✅ Phase 1 canonical tier infrastructure COMPLETE!\n")
 
+def update_divine_name_counts():
+    """
+    Recount divine names from the imported manuscripts and update only
+    canonical_books.divine_name_occurrences. Books without any counted
+    occurrence keep their stored value.
+    """
+    print("Counting divine name occurrences in the imported manuscripts...")
+    try:
+        conn = psycopg2.connect(
+            host=DB_HOST,
+            database=DB_NAME,
+            user=DB_USER,
+            password=DB_PASSWORD,
+            options="-c client_encoding=UTF8"
+        )
+    except psycopg2.OperationalError as e:
+        print(f"❌ Connection failed: {e}")
+        sys.exit(1)
+
+    cur = conn.cursor()
+    counts = count_divine_names(cur)
+    execute_batch(cur, """
+        UPDATE canonical_books
+        SET divine_name_occurrences = %s, updated_at = NOW()
+        WHERE book_code = %s
+    """, [(hits, book) for book, hits in sorted(counts.items())])
+    conn.commit()
+    cur.close()
+    conn.close()
+    print(f"✅ Updated divine name counts for {len(counts)} books")
+
 def print_sql_statements(books):
     """
     Print SQL statements for manual execution (IPv6 workaround).
@@ -234,4 +284,16 @@ def print_sql_statements(books):
 # =============================================================================
 
 if __name__ == "__main__":
-    import_canonical_books()
+    from profiling import profile_from_argv
+    profile_from_argv()
+    parser = argparse.ArgumentParser(description="Import canonical_books from books_tier_map.json")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--skip-divine-names", action="store_true",
+                      help="Store the JSON divine name counts instead of counting the manuscripts")
+    mode.add_argument("--divine-names-only", action="store_true",
+                      help="Only recount divine names from the imported manuscripts")
+    args = parser.parse_args()
+    if args.divine_names_only:
+        update_divine_name_counts()
+    else:
+        import_canonical_books(divine_names=not args.skip_divine_names)
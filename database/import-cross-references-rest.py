@@ -13,12 +13,18 @@ Usage:
     python3 database/import-cross-references-rest.py --full      # All 344,800 links
 """
 
+import os
 import sys
 import requests
 import time
 
+from batch_writer import BatchWriter
+from import_metrics import ImportMetrics
+from manuscript_ids import open_resolver
+from versification import OSIS_BOOK_CODES, OT_BOOKS, to_canonical
+
 # Supabase credentials
-SUPABASE_URL = "https://txeeaekwhkdilycefczq.supabase.co"
+SUPABASE_URL = os.getenv("SUPABASE_URL", "https://txeeaekwhkdilycefczq.supabase.co")
 API_KEY = "sb_secret_ga_5t6BceIDCZzm5rJ8FlA_y1wxONOO"
 
 headers = {
@@ -28,68 +34,18 @@ headers = {
     "Prefer": "return=minimal"
 }
 
-# Book name mapping
-BOOK_CODE_MAP = {
-    # Old Testament
-    'Gen': 'GEN', 'Exod': 'EXO', 'Lev': 'LEV', 'Num': 'NUM', 'Deut': 'DEU',
-    'Josh': 'JOS', 'Judg': 'JDG', 'Ruth': 'RUT',
-    '1Sam': '1SA', '2Sam': '2SA', '1Kgs': '1KI', '2Kgs': '2KI',
-    '1Chr': '1CH', '2Chr': '2CH',
-    'Ezra': 'EZR', 'Neh': 'NEH', 'Esth': 'EST',
-    'Job': 'JOB', 'Ps': 'PSA', 'Prov': 'PRO', 'Eccl': 'ECC', 'Song': 'SNG',
-    'Isa': 'ISA', 'Jer': 'JER', 'Lam': 'LAM', 'Ezek': 'EZK', 'Dan': 'DAN',
-    'Hos': 'HOS', 'Joel': 'JOL', 'Amos': 'AMO', 'Obad': 'OBA', 'Jon': 'JON',
-    'Mic': 'MIC', 'Nah': 'NAM', 'Hab': 'HAB', 'Zeph': 'ZEP',
-    'Hag': 'HAG', 'Zech': 'ZEC', 'Mal': 'MAL',
-
-    # New Testament
-    'Matt': 'MAT', 'Mark': 'MRK', 'Luke': 'LUK', 'John': 'JHN',
-    'Acts': 'ACT', 'Rom': 'ROM',
-    '1Cor': '1CO', '2Cor': '2CO',
-    'Gal': 'GAL', 'Eph': 'EPH', 'Phil': 'PHP', 'Col': 'COL',
-    '1Thess': '1TH', '2Thess': '2TH',
-    '1Tim': '1TI', '2Tim': '2TI', 'Titus': 'TIT', 'Phlm': 'PHM',
-    'Heb': 'HEB', 'Jas': 'JAS',
-    '1Pet': '1PE', '2Pet': '2PE',
-    '1John': '1JN', '2John': '2JN', '3John': '3JN',
-    'Jude': 'JUD', 'Rev': 'REV'
-}
-
-# OT books (use WLC manuscript)
-OT_BOOKS = {'GEN', 'EXO', 'LEV', 'NUM', 'DEU', 'JOS', 'JDG', 'RUT', '1SA', '2SA',
-    '1KI', '2KI', '1CH', '2CH', 'EZR', 'NEH', 'EST', 'JOB', 'PSA', 'PRO', 'ECC', 'SNG',
-    'ISA', 'JER', 'LAM', 'EZK', 'DAN', 'HOS', 'JOL', 'AMO', 'OBA', 'JON', 'MIC', 'NAM',
-    'HAB', 'ZEP', 'HAG', 'ZEC', 'MAL'}
-
 def get_manuscript_ids():
     """Get WLC and SBLGNT manuscript IDs"""
-    # Get WLC
-    response = requests.get(
-        f"{SUPABASE_URL}/rest/v1/manuscripts",
-        headers=headers,
-        params={"select": "id", "code": "eq.WLC"}
-    )
-    wlc_data = response.json()
-    if not wlc_data:
-        print("❌ WLC manuscript not found")
-        sys.exit(1)
-    wlc_id = wlc_data[0]['id']
-    print(f"✅ Found WLC manuscript: {wlc_id}")
-
-    # Get SBLGNT
-    response = requests.get(
-        f"{SUPABASE_URL}/rest/v1/manuscripts",
-        headers=headers,
-        params={"select": "id", "code": "eq.SBLGNT"}
-    )
-    sblgnt_data = response.json()
-    if not sblgnt_data:
-        print("❌ SBLGNT manuscript not found")
-        sys.exit(1)
-    sblgnt_id = sblgnt_data[0]['id']
-    print(f"✅ Found SBLGNT manuscript: {sblgnt_id}")
-
-    return wlc_id, sblgnt_id
+    resolver = open_resolver(SUPABASE_URL, headers)
+    ids = []
+    for code in ('WLC', 'SBLGNT'):
+        manuscript_id = resolver.get(code)
+        if not manuscript_id:
+            print(f"❌ {code} manuscript not found")
+            sys.exit(1)
+        print(f"✅ Found {code} manuscript: {manuscript_id}")
+        ids.append(manuscript_id)
+    return tuple(ids)
 
 def parse_reference(ref, wlc_id, sblgnt_id):
     """Parse reference like 'Gen.1.1' or 'Prov.8.22-Prov.8.30'"""
@@ -105,17 +61,22 @@ def parse_reference(ref, wlc_id, sblgnt_id):
     book_name, chapter, verse = ref_parts
 
     # Map book name to code
-    book_code = BOOK_CODE_MAP.get(book_name)
+    book_code = OSIS_BOOK_CODES.get(book_name)
     if not book_code:
         return None
 
-    # Determine manuscript ID
-    manuscript_id = wlc_id if book_code in OT_BOOKS else sblgnt_id
+    # OpenBible uses English numbering; OT links point at WLC, so remap to MT
+    chapter, verse = int(chapter), int(verse)
+    if book_code in OT_BOOKS:
+        _, chapter, verse = to_canonical('ENG', book_code, chapter, verse)
+        manuscript_id = wlc_id
+    else:
+        manuscript_id = sblgnt_id
 
     return {
         'book': book_code,
-        'chapter': int(chapter),
-        'verse': int(verse),
+        'chapter': chapter,
+        'verse': verse,
         'manuscript_id': manuscript_id
     }
 
@@ -159,59 +120,62 @@ def load_cross_references(file_path, limit=None):
 
     return cross_refs
 
-def import_cross_references(cross_refs, wlc_id, sblgnt_id):
+def link_record(ref, wlc_id, sblgnt_id):
+    """cross_references row for a loaded link, or None if either reference is unparseable"""
+    from_parsed = parse_reference(ref['from'], wlc_id, sblgnt_id)
+    to_parsed = parse_reference(ref['to'], wlc_id, sblgnt_id)
+
+    if not from_parsed or not to_parsed:
+        return None
+
+    return {
+        'source_manuscript_id': from_parsed['manuscript_id'],
+        'source_book': from_parsed['book'],
+        'source_chapter': from_parsed['chapter'],
+        'source_verse': from_parsed['verse'],
+        'target_manuscript_id': to_parsed['manuscript_id'],
+        'target_book': to_parsed['book'],
+        'target_chapter': to_parsed['chapter'],
+        'target_verse': to_parsed['verse'],
+        'link_type': 'reference',
+        'category': 'cross_reference',
+        'direction': 'bidirectional',
+        'notes': f"Votes: {ref['votes']} (OpenBible.info relevance score)"
+    }
+
+def import_cross_references(cross_refs, wlc_id, sblgnt_id, metrics=None):
     """Import cross-references to database"""
     print(f"\n📥 Importing {len(cross_refs)} cross-references to database...")
 
     BATCH_SIZE = 500
-    imported = 0
     failed = 0
+    metrics = metrics or ImportMetrics('import-cross-references')
+    writer = BatchWriter(SUPABASE_URL, "cross_references", headers, metrics=metrics)
 
     for i in range(0, len(cross_refs), BATCH_SIZE):
         batch = cross_refs[i:i + BATCH_SIZE]
         records = []
 
-        for ref in batch:
-            from_parsed = parse_reference(ref['from'], wlc_id, sblgnt_id)
-            to_parsed = parse_reference(ref['to'], wlc_id, sblgnt_id)
-
-            if not from_parsed or not to_parsed:
-                failed += 1
-                continue
-
-            records.append({
-                'source_manuscript_id': from_parsed['manuscript_id'],
-                'source_book': from_parsed['book'],
-                'source_chapter': from_parsed['chapter'],
-                'source_verse': from_parsed['verse'],
-                'target_manuscript_id': to_parsed['manuscript_id'],
-                'target_book': to_parsed['book'],
-                'target_chapter': to_parsed['chapter'],
-                'target_verse': to_parsed['verse'],
-                'link_type': 'reference',
-                'category': 'cross_reference',
-                'direction': 'bidirectional',
-                'notes': f"Votes: {ref['votes']} (OpenBible.info relevance score)"
-            })
+        with metrics.stage('parse', rows=len(batch)):
+            for ref in batch:
+                record = link_record(ref, wlc_id, sblgnt_id)
+                if not record:
+                    failed += 1
+                    continue
+                records.append(record)
 
         if records:
-            response = requests.post(
-                f"{SUPABASE_URL}/rest/v1/cross_references",
-                headers=headers,
-                json=records
-            )
-
-            if response.status_code in [200, 201]:
-                imported += len(records)
-                print(f"\r   Progress: {imported}/{len(cross_refs)} ({int(imported/len(cross_refs)*100)}%)", end='', flush=True)
-            else:
-                print(f"\n❌ Failed batch {i}-{i+len(batch)}: {response.text}")
-                failed += len(records)
+            writer.write(records)
+            print(f"\r   Progress: {writer.written}/{len(cross_refs)} ({int(writer.written/len(cross_refs)*100)}%)", end='', flush=True)
 
         # Small delay to avoid rate limiting
         time.sleep(0.1)
 
-    print(f"\n✅ Import complete: {imported} imported, {failed} failed\n")
+    print()
+    writer.close()
+    imported = writer.written
+    failed += writer.rejected
+    print(f"✅ Import complete: {imported} imported, {failed} failed\n")
     return imported, failed
 
 def verify_import():
@@ -273,10 +237,13 @@ def main():
 
     # Load cross-references
     file_path = "manuscripts/cross-references/openbible-cross-references.txt"
-    cross_refs = load_cross_references(file_path, limit)
+    metrics = ImportMetrics('import-cross-references')
+    with metrics.stage('read', bytes=os.path.getsize(file_path)) as stage:
+        cross_refs = load_cross_references(file_path, limit)
+        stage.rows = len(cross_refs)
 
     # Import
-    imported, failed = import_cross_references(cross_refs, wlc_id, sblgnt_id)
+    imported, failed = import_cross_references(cross_refs, wlc_id, sblgnt_id, metrics)
 
     # Verify
     verify_import()
@@ -291,6 +258,9 @@ def main():
     print(f"❌ Failed: {failed}")
     print("📚 Database now contains biblical cross-references")
     print("\n🎉 Cross-references import complete!")
+    metrics.finish()
 
 if __name__ == "__main__":
+    from profiling import profile_from_argv
+    profile_from_argv()
     main()
@@ -29,6 +29,13 @@ import psycopg2
 from psycopg2.extras import execute_batch
 from datetime import datetime
 
+from versification import LXX_BOOK_IDS, verse_ordinal
+from normalize import normalize_many
+from gematria import verse_values_many
+from import_metrics import ImportMetrics
+from manuscript_ids import get_or_create
+from optional_columns import missing_columns_sql
+
 # =============================================================================
 # Configuration
 # =============================================================================
@@ -44,22 +51,22 @@ LXX_CSV = "manuscripts/lxx-morphology/LXX-Rahlfs-1935/11_end-users_files/MyBible
 BOOKS_CSV = "manuscripts/lxx-morphology/LXX-Rahlfs-1935/11_end-users_files/MyBible/Bibles/books_main.csv"
 TIER_MAP_JSON = "database/books_tier_map.json"
 
-# Book ID mappings (LXX uses numeric IDs)
-BOOK_ID_MAP = {
-    10: "GEN", 20: "EXO", 30: "LEV", 40: "NUM", 50: "DEU",
-    60: "JOS", 70: "JDG", 80: "RUT", 90: "1SA", 100: "2SA",
-    110: "1KI", 120: "2KI", 130: "1CH", 140: "2CH",
-    150: "EZR", 160: "NEH", 190: "EST",
-    220: "JOB", 230: "PSA", 240: "PRO", 250: "ECC", 260: "SNG",
-    290: "ISA", 300: "JER", 310: "LAM", 330: "EZK", 340: "DAN",
-    350: "HOS", 360: "JOL", 370: "AMO", 380: "OBA", 390: "JON",
-    400: "MIC", 410: "NAM", 420: "HAB", 430: "ZEP", 440: "HAG",
-    450: "ZEC", 460: "MAL",
-    # Deuterocanonical books (Tier 2)
-    165: "1ES", 170: "TOB", 180: "JDT", 232: "PSS",
-    462: "1MA", 464: "2MA", 466: "3MA", 467: "4MA",
-    270: "WIS", 280: "SIR", 315: "LJE", 320: "BAR",
-    325: "SUS", 345: "BEL", 800: "ODE"
+# manuscripts row created on first import
+LXX_MANUSCRIPT = {
+    'name': "LXX Septuagint (Rahlfs 1935)",
+    'language': "greek",
+    'date_range': "250 BCE - 100 CE",
+    'license': "CC BY-SA 4.0",
+    'canonical_tier': 1,  # will be updated per book
+    'canonical_status': "canonical",
+    'era': "Hellenistic Judaism (250 BCE - 100 CE)",
+    'provenance_confidence': 1.0,
+    'manuscript_attestation': [
+        "Codex Vaticanus (4th c.)",
+        "Codex Sinaiticus (4th c.)",
+        "Codex Alexandrinus (5th c.)",
+        "Papyri (2nd-4th c.)"
+    ],
 }
 
 # =============================================================================
@@ -119,99 +126,11 @@ def parse_lxx_verse(verse_text):
     cleaned_text = " ".join(words)
     return cleaned_text, morphology
 
-def get_manuscript_id(conn, manuscript_code):
-    """Get or create manuscript record."""
-    cur = conn.cursor()
-
-    # Check if manuscript exists
-    cur.execute(
-        "SELECT id FROM manuscripts WHERE code = %s",
-        (manuscript_code,)
-    )
-    result = cur.fetchone()
-
-    if result:
-        return result[0]
-
-    # Create manuscript record
-    cur.execute("""
-        INSERT INTO manuscripts (
-            code, name, language, date_range, license,
-            canonical_tier, canonical_status, era,
-            provenance_confidence, manuscript_attestation
-        ) VALUES (
-            %s, %s, %s, %s, %s,
-            %s, %s, %s, %s, %s
-        )
-        RETURNING id
-    """, (
-        manuscript_code,
-        "LXX Septuagint (Rahlfs 1935)",
-        "greek",
-        "250 BCE - 100 CE",
-        "CC BY-SA 4.0",
-        1,  # canonical_tier (will be updated per book)
-        "canonical",  # canonical_status
-        "Hellenistic Judaism (250 BCE - 100 CE)",
-        1.0,  # provenance_confidence
-        [
-            "Codex Vaticanus (4th c.)",
-            "Codex Sinaiticus (4th c.)",
-            "Codex Alexandrinus (5th c.)",
-            "Papyri (2nd-4th c.)"
-        ]
-    ))
-
-    manuscript_id = cur.fetchone()[0]
-    conn.commit()
-    cur.close()
-
-    return manuscript_id
-
-# =============================================================================
-# Main Import Function
-# =============================================================================
-
-def import_lxx(tier_filter=None, book_filter=None, test_mode=False):
-    """
-    Import LXX Septuagint verses with canonical tier metadata.
-
-    Args:
-        tier_filter: Only import books from this tier (1 or 2)
-        book_filter: Only import this book code (e.g., "TOB")
-        test_mode: Only import Genesis 1 for testing
-    """
-    print("=" * 80)
-    print("LXX Septuagint Import - All4Yah Phase 1 v1.0")
-    print("=" * 80)
-    print(f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-
-    # Load tier mappings
-    print("Loading canonical tier mappings...")
-    tier_map = load_tier_map()
-    print(f"✓ Loaded {len(tier_map)} book definitions\n")
-
-    # Connect to database
-    print("Connecting to Supabase PostgreSQL...")
-    conn = psycopg2.connect(
-        host=DB_HOST,
-        database=DB_NAME,
-        user=DB_USER,
-        password=DB_PASSWORD,
-        options="-c client_encoding=UTF8"
-    )
-    print("✓ Connected\n")
-
-    # Get manuscript ID
-    print("Setting up LXX manuscript record...")
-    manuscript_id = get_manuscript_id(conn, "LXX")
-    print(f"✓ Manuscript ID: {manuscript_id}\n")
-
-    # Read LXX verses
-    print("Reading LXX CSV data...")
+def load_verses(tier_map, tier_filter=None, book_filter=None, test_mode=False, csv_path=LXX_CSV):
+    """Read and parse the LXX CSV into {book_code: {'tier', 'verses'}}."""
     verses_by_book = {}
 
-    with open(LXX_CSV, 'r', encoding='utf-8') as f:
+    with open(csv_path, 'r', encoding='utf-8') as f:
         reader = csv.reader(f, delimiter='\t')
         for row in reader:
             if len(row) < 4:
@@ -223,7 +142,7 @@ def import_lxx(tier_filter=None, book_filter=None, test_mode=False):
             verse_text = row[3]
 
             # Map book ID to code
-            book_code = BOOK_ID_MAP.get(book_id)
+            book_code = LXX_BOOK_IDS.get(book_id)
             if not book_code:
                 continue
 
@@ -258,11 +177,113 @@ def import_lxx(tier_filter=None, book_filter=None, test_mode=False):
                 'morphology': morphology
             })
 
+    return verses_by_book
+
+def prepare_verses(verses):
+    """Add text_normalized and gematria_values to a book's verses in one pass each."""
+    normalized = normalize_many([v['text'] for v in verses])
+    values = verse_values_many([(v['morphology'], v['text']) for v in verses])
+    for v, text_normalized, gematria_values in zip(verses, normalized, values):
+        v['text_normalized'] = text_normalized
+        v['gematria_values'] = gematria_values
+    return verses
+
+VERSE_COLUMNS = [
+    'manuscript_id', 'book', 'chapter', 'verse',
+    'text', 'text_normalized', 'morphology', 'canonical_tier', 'ordinal',
+    'gematria_values',
+]
+CONFLICT_COLUMNS = ['manuscript_id', 'book', 'chapter', 'verse']
+
+def upsert_sql(columns=VERSE_COLUMNS):
+    """Verse upsert for `columns` (VERSE_COLUMNS minus any optional_columns the database lacks)."""
+    updates = [c for c in columns if c not in CONFLICT_COLUMNS]
+    return f"""
+    INSERT INTO verses ({', '.join(columns)})
+    VALUES ({', '.join(['%s'] * len(columns))})
+    ON CONFLICT ({', '.join(CONFLICT_COLUMNS)})
+    DO UPDATE SET
+        {', '.join(f"{c} = EXCLUDED.{c}" for c in updates)}
+"""
+
+UPSERT_SQL = upsert_sql()
+
+def verse_params(manuscript_id, book_code, canonical_tier, verses, columns=VERSE_COLUMNS):
+    """upsert_sql(columns) parameter tuples for prepared verses."""
+    if columns is not VERSE_COLUMNS:
+        full = verse_params(manuscript_id, book_code, canonical_tier, verses)
+        keep = [VERSE_COLUMNS.index(c) for c in columns]
+        return [tuple(row[i] for i in keep) for row in full]
+    return [
+        (
+            manuscript_id,
+            book_code,
+            v['chapter'],
+            v['verse'],
+            v['text'],
+            v['text_normalized'],
+            json.dumps(v['morphology']),
+            canonical_tier,
+            verse_ordinal(book_code, v['chapter'], v['verse']),
+            v['gematria_values']
+        )
+        for v in verses
+    ]
+
+# =============================================================================
+# Main Import Function
+# =============================================================================
+
+def import_lxx(tier_filter=None, book_filter=None, test_mode=False):
+    """
+    Import LXX Septuagint verses with canonical tier metadata.
+
+    Args:
+        tier_filter: Only import books from this tier (1 or 2)
+        book_filter: Only import this book code (e.g., "TOB")
+        test_mode: Only import Genesis 1 for testing
+    """
+    print("=" * 80)
+    print("LXX Septuagint Import - All4Yah Phase 1 v1.0")
+    print("=" * 80)
+    print(f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+    metrics = ImportMetrics('import-lxx')
+
+    # Load tier mappings
+    print("Loading canonical tier mappings...")
+    tier_map = load_tier_map()
+    print(f"✓ Loaded {len(tier_map)} book definitions\n")
+
+    # Connect to database
+    print("Connecting to Supabase PostgreSQL...")
+    conn = psycopg2.connect(
+        host=DB_HOST,
+        database=DB_NAME,
+        user=DB_USER,
+        password=DB_PASSWORD,
+        options="-c client_encoding=UTF8"
+    )
+    print("✓ Connected\n")
+
+    # Get manuscript ID
+    print("Setting up LXX manuscript record...")
+    manuscript_id = get_or_create(conn, "LXX", LXX_MANUSCRIPT)
+    print(f"✓ Manuscript ID: {manuscript_id}\n")
+
+    # Read LXX verses
+    print("Reading LXX CSV data...")
+    with metrics.stage('parse', bytes=os.path.getsize(LXX_CSV)) as stage:
+        verses_by_book = load_verses(tier_map, tier_filter, book_filter, test_mode)
+        stage.rows = sum(len(b['verses']) for b in verses_by_book.values())
+
     print(f"✓ Loaded {len(verses_by_book)} books\n")
 
     # Insert verses into database
     print("Importing verses to database...")
     cur = conn.cursor()
+    missing = missing_columns_sql(cur, 'verses')
+    columns = [c for c in VERSE_COLUMNS if c not in missing] if missing else VERSE_COLUMNS
+    sql = upsert_sql(columns)
     total_imported = 0
 
     for book_code, book_data in sorted(verses_by_book.items()):
@@ -274,35 +295,20 @@ def import_lxx(tier_filter=None, book_filter=None, test_mode=False):
 
         print(f"  {book_code:5} | Tier {canonical_tier} | {len(verses):5} verses | {book_name}")
 
+        # Accent-insensitive shadow text and word values for the whole book in one pass
+        with metrics.stage('transform', rows=len(verses)):
+            prepare_verses(verses)
+
         # Batch insert verses
         batch_size = 100
         for i in range(0, len(verses), batch_size):
             batch = verses[i:i + batch_size]
-
-            execute_batch(cur, """
-                INSERT INTO verses (
-                    manuscript_id, book, chapter, verse,
-                    text, morphology, canonical_tier
-                ) VALUES (%s, %s, %s, %s, %s, %s, %s)
-                ON CONFLICT (manuscript_id, book, chapter, verse)
-                DO UPDATE SET
-                    text = EXCLUDED.text,
-                    morphology = EXCLUDED.morphology,
-                    canonical_tier = EXCLUDED.canonical_tier
-            """, [
-                (
-                    manuscript_id,
-                    book_code,
-                    v['chapter'],
-                    v['verse'],
-                    v['text'],
-                    json.dumps(v['morphology']),
-                    canonical_tier
-                )
-                for v in batch
-            ])
-
-            conn.commit()
+            with metrics.stage('encode', rows=len(batch)):
+                params = verse_params(manuscript_id, book_code, canonical_tier, batch, columns)
+            with metrics.stage('send', rows=len(batch)):
+                execute_batch(cur, sql, params)
+            with metrics.stage('commit', rows=len(batch)):
+                conn.commit()
 
         total_imported += len(verses)
 
@@ -314,15 +320,18 @@ def import_lxx(tier_filter=None, book_filter=None, test_mode=False):
     print(f"Total verses imported: {total_imported:,}")
     print(f"Total books: {len(verses_by_book)}")
     print(f"Finished: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    print(f"{'=' * 80}\n")
+    print(f"{'=' * 80}")
 
     conn.close()
+    metrics.finish()
 
 # =============================================================================
 # CLI Entry Point
 # =============================================================================
 
 if __name__ == "__main__":
+    from profiling import profile_from_argv
+    profile_from_argv()
     import argparse
 
     parser = argparse.ArgumentParser(description="Import LXX Septuagint with canonical tiers")
@@ -16,10 +16,32 @@ import json
 import requests
 from urllib.parse import quote
 
+from manuscript_ids import open_resolver
+from profiling import stage
+
 # Supabase configuration
-SUPABASE_URL = "https://txeeaekwhkdilycefczq.supabase.co"
+SUPABASE_URL = os.getenv("SUPABASE_URL", "https://txeeaekwhkdilycefczq.supabase.co")
 SUPABASE_SERVICE_KEY = os.environ.get('SUPABASE_SERVICE_ROLE_KEY', 'sb_secret_ga_5t6BceIDCZzm5rJ8FlA_y1wxONOO')
 
+def split_updates(sql_content):
+    """Split an OSHB SQL dump into its UPDATE verses statements"""
+    updates = []
+    current_update = ''
+
+    for line in sql_content.split('\n'):
+        if line.strip().startswith('--'):
+            continue
+        if line.strip() in ('BEGIN;', 'COMMIT;', ''):
+            continue
+
+        current_update += line + '\n'
+
+        if line.strip().endswith(';') and 'UPDATE verses' in current_update:
+            updates.append(current_update.strip())
+            current_update = ''
+
+    return updates
+
 def parse_update_statement(sql):
     """Extract book, chapter, verse, and morphology from UPDATE statement"""
     # Extract morphology JSON
@@ -56,23 +78,12 @@ def parse_update_statement(sql):
     }
 
 def get_wlc_manuscript_id():
-    """Get WLC manuscript ID from Supabase"""
-    url = f"{SUPABASE_URL}/rest/v1/manuscripts"
+    """Get WLC manuscript ID (cached, see manuscript_ids.py)"""
     headers = {
         'apikey': SUPABASE_SERVICE_KEY,
         'Authorization': f'Bearer {SUPABASE_SERVICE_KEY}',
-        'Content-Type': 'application/json'
     }
-    params = {'code': 'eq.WLC', 'select': 'id'}
-
-    response = requests.get(url, headers=headers, params=params)
-    response.raise_for_status()
-
-    data = response.json()
-    if not data:
-        raise Exception("WLC manuscript not found")
-
-    return data[0]['id']
+    return open_resolver(SUPABASE_URL, headers).require('WLC')
 
 def update_verse_morphology(manuscript_id, verse_data):
     """Update verse morphology via Supabase REST API"""
@@ -114,25 +125,10 @@ def main():
 
     # Read SQL file
     print(f"Reading SQL file: {sql_file}")
-    with open(sql_file, 'r', encoding='utf-8') as f:
-        sql_content = f.read()
-
-    # Extract UPDATE statements
-    updates = []
-    current_update = ''
-
-    for line in sql_content.split('\n'):
-        if line.strip().startswith('--'):
-            continue
-        if line.strip() in ('BEGIN;', 'COMMIT;', ''):
-            continue
-
-        current_update += line + '\n'
-
-        if line.strip().endswith(';') and 'UPDATE verses' in current_update:
-            updates.append(current_update.strip())
-            current_update = ''
-
+    with stage('read'):
+        with open(sql_file, 'r', encoding='utf-8') as f:
+            sql_content = f.read()
+        updates = split_updates(sql_content)
     print(f"Found {len(updates)} UPDATE statements\n")
 
     # Get WLC manuscript ID
@@ -145,23 +141,24 @@ def main():
     success_count = 0
     error_count = 0
 
-    for i, update_sql in enumerate(updates):
-        try:
-            verse_data = parse_update_statement(update_sql)
-            if not verse_data:
-                print(f"  ⚠️  Could not parse statement {i + 1}")
-                error_count += 1
-                continue
+    with stage('update'):
+        for i, update_sql in enumerate(updates):
+            try:
+                verse_data = parse_update_statement(update_sql)
+                if not verse_data:
+                    print(f"  ⚠️  Could not parse statement {i + 1}")
+                    error_count += 1
+                    continue
 
-            update_verse_morphology(manuscript_id, verse_data)
-            success_count += 1
+                update_verse_morphology(manuscript_id, verse_data)
+                success_count += 1
 
-            if (i + 1) % 100 == 0:
-                print(f"  Progress: {i + 1}/{len(updates)} verses updated")
+                if (i + 1) % 100 == 0:
+                    print(f"  Progress: {i + 1}/{len(updates)} verses updated")
 
-        except Exception as e:
-            print(f"  ❌ Error updating {verse_data.get('book', '?')} {verse_data.get('chapter', '?')}:{verse_data.get('verse', '?')}: {e}")
-            error_count += 1
+            except Exception as e:
+                print(f"  ❌ Error updating {verse_data.get('book', '?')} {verse_data.get('chapter', '?')}:{verse_data.get('verse', '?')}: {e}")
+                error_count += 1
 
     print()
     print("═" * 65)
@@ -173,4 +170,6 @@ def main():
     print()
 
 if __name__ == '__main__':
+    from profiling import profile_from_argv
+    profile_from_argv()
     main()
@@ -4,14 +4,18 @@ Strong's Lexicon Import - Final Working Version
 Uses Supabase REST API with proper UPSERT handling
 """
 
+import os
 import sys
 import requests
-import re
-import html
 import time
 
+from batch_writer import BatchWriter
+from import_metrics import ImportMetrics
+from optional_columns import missing_columns_rest, drop_columns
+from lexicon_parser import LEXICON_FILES, load_lexicons
+
 # Supabase credentials
-SUPABASE_URL = "https://txeeaekwhkdilycefczq.supabase.co"
+SUPABASE_URL = os.getenv("SUPABASE_URL", "https://txeeaekwhkdilycefczq.supabase.co")
 API_KEY = "sb_secret_ga_5t6BceIDCZzm5rJ8FlA_y1wxONOO"
 
 headers = {
@@ -21,133 +25,28 @@ headers = {
     "Prefer": "resolution=merge-duplicates,return=minimal"
 }
 
-def clean_html(text):
-    """Remove HTML tags and decode entities"""
-    if not text:
-        return ""
-    text = re.sub(r'<ref=[^>]*>.*?</ref>', '', text)
-    text = re.sub(r'<br\s*/?>', '\n', text, flags=re.IGNORECASE)
-    text = re.sub(r'<[^>]+>', '', text)
-    text = html.unescape(text)
-    text = re.sub(r'\n+', '\n', text)
-    text = re.sub(r'  +', ' ', text)
-    return text.strip()
-
-def normalize_strong_number(estrong):
-    """Convert H0001 -> H1"""
-    if not estrong or len(estrong) < 2:
-        return None
-    prefix = estrong[0]
-    number = estrong[1:]
-    try:
-        num_val = int(number)
-        return f"{prefix}{num_val}"
-    except ValueError:
-        clean_num = re.sub(r'^0+', '', number)
-        return f"{prefix}{clean_num}" if clean_num else None
-
-def parse_tsv_file(file_path, language):
-    """Parse STEPBible TSV lexicon file"""
-    print(f"📖 Loading {language} lexicon from: {file_path}")
-
-    entries = []
-    data_started = False
-
-    with open(file_path, 'r', encoding='utf-8') as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-
-            if not data_started:
-                if re.match(r'^[HG]\d', line):
-                    data_started = True
-                else:
-                    continue
-
-            parts = line.split('\t')
-            if len(parts) < 8:
-                continue
-
-            estrong, dstrong, ustrong, original_word, transliteration, morph, gloss, definition = parts[:8]
-
-            if '=' in estrong or not re.match(r'^[HG]\d+$', estrong):
-                continue
-
-            strong_number = normalize_strong_number(estrong)
-            if not strong_number:
-                continue
-
-            definition_clean = clean_html(definition)
-
-            part_of_speech = None
-            if morph and ':' in morph:
-                morph_parts = morph.split(':')
-                if len(morph_parts) > 1:
-                    pos_code = morph_parts[1].split('-')[0]
-                    pos_map = {
-                        'N': 'noun', 'V': 'verb', 'A': 'adjective',
-                        'D': 'adverb', 'C': 'conjunction', 'P': 'preposition',
-                        'R': 'pronoun', 'I': 'interjection', 'T': 'particle',
-                        'X': 'other'
-                    }
-                    part_of_speech = pos_map.get(pos_code)
-
-            entries.append({
-                'strong_number': strong_number,
-                'language': language,
-                'original_word': original_word,
-                'transliteration': transliteration if transliteration else None,
-                'part_of_speech': part_of_speech,
-                'definition': definition_clean,
-                'short_definition': gloss if gloss else None
-            })
-
-    print(f"✅ Loaded {len(entries)} {language} lexicon entries")
-    return entries
-
-def import_lexicon(entries):
+def import_lexicon(entries, metrics=None):
     """Import lexicon entries using UPSERT"""
     print(f"\n📥 Importing {len(entries)} lexicon entries to database...")
+    entries = drop_columns(entries, missing_columns_rest(SUPABASE_URL, headers, 'lexicon'))
     print("Using UPSERT strategy to handle duplicates...")
 
     BATCH_SIZE = 100
-    imported = 0
-    failed = 0
+
+    # Failing batches are bisected down to the bad rows, which go to a rejects file
+    writer = BatchWriter(SUPABASE_URL, "lexicon", headers, params={"on_conflict": "strong_number"}, metrics=metrics)
 
     for i in range(0, len(entries), BATCH_SIZE):
         batch = entries[i:i + BATCH_SIZE]
-
-        # Use POST with resolution=merge-duplicates header
-        response = requests.post(
-            f"{SUPABASE_URL}/rest/v1/lexicon",
-            headers=headers,
-            json=batch
-        )
-
-        if response.status_code in [200, 201]:
-            imported += len(batch)
-            print(f"\r   Progress: {imported}/{len(entries)} ({int(imported/len(entries)*100)}%)", end='', flush=True)
-        else:
-            # If batch fails, try individual inserts with explicit UPSERT
-            for record in batch:
-                # Try using the query parameter for upsert
-                upsert_response = requests.post(
-                    f"{SUPABASE_URL}/rest/v1/lexicon?on_conflict=strong_number",
-                    headers=headers,
-                    json=[record]
-                )
-                if upsert_response.status_code in [200, 201]:
-                    imported += 1
-                else:
-                    failed += 1
-
-            print(f"\r   Progress: {imported}/{len(entries)} ({int(imported/len(entries)*100)}%)", end='', flush=True)
+        writer.write(batch)
+        print(f"\r   Progress: {writer.written}/{len(entries)} ({int(writer.written/len(entries)*100)}%)", end='', flush=True)
 
         time.sleep(0.05)  # Small delay to avoid rate limits
 
-    print(f"\n✅ Import complete: {imported} imported, {failed} failed\n")
-    return imported, failed
+    print()
+    writer.close()
+    print(f"✅ Import complete: {writer.written} imported, {writer.rejected} failed ({writer.requests} requests)\n")
+    return writer.written, writer.rejected
 
 def verify_import():
     """Verify the import"""
@@ -197,20 +96,13 @@ def main():
     print("=" * 70)
     print("🌍 Mode: FULL (Hebrew + Greek) with UPSERT\n")
 
-    all_entries = []
-
-    # Hebrew lexicon
-    hebrew_file = "manuscripts/strongs-lexicon/STEPBible-Data/Lexicons/TBESH - Translators Brief lexicon of Extended Strongs for Hebrew - STEPBible.org CC BY.txt"
-    hebrew_entries = parse_tsv_file(hebrew_file, 'hebrew')
-    all_entries.extend(hebrew_entries)
-
-    # Greek lexicon
-    greek_file = "manuscripts/strongs-lexicon/STEPBible-Data/Lexicons/TBESG - Translators Brief lexicon of Extended Strongs for Greek - STEPBible.org CC BY.txt"
-    greek_entries = parse_tsv_file(greek_file, 'greek')
-    all_entries.extend(greek_entries)
+    metrics = ImportMetrics('import-strongs-final')
+    with metrics.stage('parse', bytes=sum(os.path.getsize(path) for path, _ in LEXICON_FILES)) as stage:
+        all_entries = [entry._asdict() for entry in load_lexicons()]
+        stage.rows = len(all_entries)
 
     # Import
-    imported, failed = import_lexicon(all_entries)
+    imported, failed = import_lexicon(all_entries, metrics)
 
     # Verify
     verify_import()
@@ -225,6 +117,9 @@ def main():
     print(f"❌ Failed: {failed}")
     print("📚 Database now contains Strong's lexicon definitions")
     print("\n🎉 Strong's lexicon import complete!")
+    metrics.finish()
 
 if __name__ == "__main__":
+    from profiling import profile_from_argv
+    profile_from_argv()
     main()
@@ -25,13 +25,17 @@ Usage:
     python3 database/import-strongs-lexicon-rest.py --full      # Both languages
 """
 
+import os
 import sys
 import requests
-import re
-import html
+
+from batch_writer import BatchWriter
+from import_metrics import ImportMetrics
+from optional_columns import missing_columns_rest, drop_columns
+from lexicon_parser import HEBREW_FILE, GREEK_FILE, load_lexicons
 
 # Supabase credentials
-SUPABASE_URL = "https://txeeaekwhkdilycefczq.supabase.co"
+SUPABASE_URL = os.getenv("SUPABASE_URL", "https://txeeaekwhkdilycefczq.supabase.co")
 API_KEY = "sb_secret_ga_5t6BceIDCZzm5rJ8FlA_y1wxONOO"
 
 headers = {
@@ -41,123 +45,6 @@ headers = {
     "Prefer": "return=minimal"
 }
 
-def clean_html(text):
-    """Remove HTML tags and decode entities"""
-    if not text:
-        return ""
-    # Remove <ref> tags and their content
-    text = re.sub(r'<ref=[^>]*>.*?</ref>', '', text)
-    # Remove other HTML tags but keep content
-    text = re.sub(r'<br\s*/?>', '\n', text, flags=re.IGNORECASE)
-    text = re.sub(r'<[^>]+>', '', text)
-    # Decode HTML entities
-    text = html.unescape(text)
-    # Clean up whitespace
-    text = re.sub(r'\n+', '\n', text)
-    text = re.sub(r'  +', ' ', text)
-    return text.strip()
-
-def normalize_strong_number(estrong):
-    """
-    Convert STEPBible format to database format:
-    H0001 -> H1, G0001 -> G1
-    But preserve extended numbers: H9001 -> H9001
-    """
-    if not estrong or len(estrong) < 2:
-        return None
-
-    prefix = estrong[0]  # H or G
-    number = estrong[1:]  # Rest of the string
-
-    # Remove leading zeros but preserve the number
-    try:
-        num_val = int(number)
-        return f"{prefix}{num_val}"
-    except ValueError:
-        # If it contains non-numeric characters, just clean it
-        clean_num = re.sub(r'^0+', '', number)
-        return f"{prefix}{clean_num}" if clean_num else None
-
-def parse_tsv_file(file_path, language, limit=None):
-    """Parse STEPBible TSV lexicon file"""
-    print(f"📖 Loading {language} lexicon from: {file_path}")
-
-    entries = []
-    skipped = 0
-    data_started = False
-
-    with open(file_path, 'r', encoding='utf-8') as f:
-        for line_num, line in enumerate(f, 1):
-            line = line.strip()
-
-            # Skip empty lines
-            if not line:
-                continue
-
-            # Look for start of data (lines beginning with H or G followed by digits)
-            if not data_started:
-                if re.match(r'^[HG]\d', line):
-                    data_started = True
-                else:
-                    continue
-
-            # Parse TSV line
-            parts = line.split('\t')
-            if len(parts) < 8:
-                skipped += 1
-                continue
-
-            estrong, dstrong, ustrong, original_word, transliteration, morph, gloss, definition = parts[:8]
-
-            # Skip if not a primary Strong's number (e.g., skip "G0001G =", keep "G0001")
-            if '=' in estrong or not re.match(r'^[HG]\d+$', estrong):
-                continue
-
-            # Normalize Strong's number
-            strong_number = normalize_strong_number(estrong)
-            if not strong_number:
-                skipped += 1
-                continue
-
-            # Clean definition
-            definition_clean = clean_html(definition)
-
-            # Extract part of speech from morphology code
-            part_of_speech = None
-            if morph and ':' in morph:
-                # Format like "H:N-M" or "G:V-PAI-1S"
-                morph_parts = morph.split(':')
-                if len(morph_parts) > 1:
-                    pos_code = morph_parts[1].split('-')[0]
-                    # Map codes to readable forms
-                    pos_map = {
-                        'N': 'noun', 'V': 'verb', 'A': 'adjective',
-                        'D': 'adverb', 'C': 'conjunction', 'P': 'preposition',
-                        'R': 'pronoun', 'I': 'interjection', 'T': 'particle',
-                        'X': 'other'
-                    }
-                    part_of_speech = pos_map.get(pos_code, pos_code)
-
-            entries.append({
-                'strong_number': strong_number,
-                'language': language,
-                'original_word': original_word,
-                'transliteration': transliteration if transliteration else None,
-                'part_of_speech': part_of_speech,
-                'definition': definition_clean,
-                'short_definition': gloss if gloss else None
-            })
-
-            if limit and len(entries) >= limit:
-                print(f"   Reached limit of {limit} entries")
-                break
-
-    print(f"✅ Loaded {len(entries)} {language} lexicon entries")
-    if skipped > 0:
-        print(f"   ⚠️  Skipped {skipped} invalid lines")
-
-    return entries
-
 def clear_existing_lexicon():
     """Clear existing lexicon data"""
     print("🗑️  Clearing existing lexicon data...")
@@ -173,38 +60,29 @@ def clear_existing_lexicon():
     else:
         print(f"⚠️  Clear operation response: {response.status_code}")
 
-def import_lexicon(entries):
+def import_lexicon(entries, metrics=None):
     """Import lexicon entries to database using UPSERT"""
     print(f"\n📥 Importing {len(entries)} lexicon entries to database...")
+    entries = drop_columns(entries, missing_columns_rest(SUPABASE_URL, headers, 'lexicon'))
 
     BATCH_SIZE = 500
-    imported = 0
-    failed = 0
 
     # Use upsert headers to handle duplicates
     upsert_headers = {
         **headers,
         "Prefer": "resolution=merge-duplicates"
     }
+    writer = BatchWriter(SUPABASE_URL, "lexicon", upsert_headers, params={"on_conflict": "strong_number"}, metrics=metrics)
 
     for i in range(0, len(entries), BATCH_SIZE):
         batch = entries[i:i + BATCH_SIZE]
+        writer.write(batch)
+        print(f"\r   Progress: {writer.written}/{len(entries)} ({int(writer.written/len(entries)*100)}%)", end='', flush=True)
 
-        response = requests.post(
-            f"{SUPABASE_URL}/rest/v1/lexicon",
-            headers=upsert_headers,
-            json=batch
-        )
-
-        if response.status_code in [200, 201]:
-            imported += len(batch)
-            print(f"\r   Progress: {imported}/{len(entries)} ({int(imported/len(entries)*100)}%)", end='', flush=True)
-        else:
-            print(f"\n❌ Failed batch {i}-{i+len(batch)}: {response.status_code} - {response.text[:200]}")
-            failed += len(batch)
-
-    print(f"\n✅ Import complete: {imported} imported, {failed} failed\n")
-    return imported, failed
+    print()
+    writer.close()
+    print(f"✅ Import complete: {writer.written} imported, {writer.rejected} failed\n")
+    return writer.written, writer.rejected
 
 def verify_import():
     """Verify the import"""
@@ -264,28 +142,23 @@ def main():
     mode_str = "TEST (100 entries)" if test_mode else "HEBREW only" if hebrew_only else "GREEK only" if greek_only else "FULL (Hebrew + Greek)"
     print(f"🌍 Mode: {mode_str}\n")
 
-    all_entries = []
-
-    # Hebrew lexicon
+    files = []
     if not greek_only:
-        hebrew_file = "manuscripts/strongs-lexicon/STEPBible-Data/Lexicons/TBESH - Translators Brief lexicon of Extended Strongs for Hebrew - STEPBible.org CC BY.txt"
-        limit = 50 if test_mode else None
-        hebrew_entries = parse_tsv_file(hebrew_file, 'hebrew', limit)
-        all_entries.extend(hebrew_entries)
-
-    # Greek lexicon
+        files.append((HEBREW_FILE, 'hebrew'))
     if not hebrew_only:
-        greek_file = "manuscripts/strongs-lexicon/STEPBible-Data/Lexicons/TBESG - Translators Brief lexicon of Extended Strongs for Greek - STEPBible.org CC BY.txt"
-        limit = 50 if test_mode else None
-        greek_entries = parse_tsv_file(greek_file, 'greek', limit)
-        all_entries.extend(greek_entries)
+        files.append((GREEK_FILE, 'greek'))
+    limit = 50 if test_mode else None
+    metrics = ImportMetrics('import-strongs-lexicon-rest')
+    with metrics.stage('parse', bytes=sum(os.path.getsize(path) for path, _ in files)) as stage:
+        all_entries = [entry._asdict() for entry in load_lexicons(files, limit)]
+        stage.rows = len(all_entries)
 
     # Clear existing data (except in test mode)
     if not test_mode:
         clear_existing_lexicon()
 
     # Import
-    imported, failed = import_lexicon(all_entries)
+    imported, failed = import_lexicon(all_entries, metrics)
 
     # Verify
     verify_import()
@@ -300,6 +173,9 @@ def main():
     print(f"❌ Failed: {failed}")
     print("📚 Database now contains Strong's lexicon definitions")
     print("\n🎉 Strong's lexicon import complete!")
+    metrics.finish()
 
 if __name__ == "__main__":
+    from profiling import profile_from_argv
+    profile_from_argv()
     main()
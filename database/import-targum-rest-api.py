@@ -4,13 +4,19 @@ Import Targum Onkelos via Supabase REST API
 Avoids IPv6 connection issues by using HTTPS
 """
 
+import os
 import sys
 import re
-import requests
 import time
 from collections import defaultdict
 
-SUPABASE_URL = "https://txeeaekwhkdilycefczq.supabase.co"
+from batch_writer import BatchWriter
+from manuscript_ids import open_resolver
+from optional_columns import missing_columns_rest, drop_columns
+from versification import verse_ordinal
+from normalize import normalize_many
+
+SUPABASE_URL = os.getenv("SUPABASE_URL", "https://txeeaekwhkdilycefczq.supabase.co")
 SUPABASE_KEY = "sb_secret_ga_5t6BceIDCZzm5rJ8FlA_y1wxONOO"  # Service role key
 
 headers = {
@@ -24,17 +30,10 @@ def get_manuscript_id():
     """Get ONKELOS manuscript ID"""
     print("🔍 Fetching ONKELOS manuscript ID...")
 
-    url = f"{SUPABASE_URL}/rest/v1/manuscripts"
-    params = {"code": "eq.ONKELOS", "select": "id"}
-
-    response = requests.get(url, headers=headers, params=params)
-    response.raise_for_status()
-
-    data = response.json()
-    if not data:
+    manuscript_id = open_resolver(SUPABASE_URL, headers).get('ONKELOS')
+    if not manuscript_id:
         raise Exception("ONKELOS manuscript not found!")
 
-    manuscript_id = data[0]['id']
     print(f"✅ ONKELOS ID: {manuscript_id}\n")
     return manuscript_id
 
@@ -69,6 +68,21 @@ def parse_sql_file(filename):
     print(f"✅ Parsed {len(verses)} verses\n")
     return verses
 
+def verse_rows(manuscript_id, batch):
+    """verses rows for a batch of parsed verses"""
+    return [
+        {
+            'manuscript_id': manuscript_id,
+            'book': v['book'],
+            'chapter': v['chapter'],
+            'verse': v['verse'],
+            'text': v['text'],
+            'text_normalized': normalized,
+            'ordinal': verse_ordinal(v['book'], v['chapter'], v['verse'])
+        }
+        for v, normalized in zip(batch, normalize_many([v['text'] for v in batch]))
+    ]
+
 def import_verses(manuscript_id, verses, batch_size=100):
     """Import verses via REST API in batches"""
     print(f"📥 Importing {len(verses)} verses in batches of {batch_size}...")
@@ -76,41 +90,31 @@ def import_verses(manuscript_id, verses, batch_size=100):
     stats = defaultdict(int)
     errors = []
 
-    url = f"{SUPABASE_URL}/rest/v1/verses"
+    writer = BatchWriter(SUPABASE_URL, "verses", headers,
+                         params={"on_conflict": "manuscript_id,book,chapter,verse"})
+    missing = missing_columns_rest(SUPABASE_URL, headers, 'verses')
 
     for i in range(0, len(verses), batch_size):
         batch = verses[i:i+batch_size]
 
-        # Prepare batch data
-        batch_data = []
-        for v in batch:
-            batch_data.append({
-                'manuscript_id': manuscript_id,
-                'book': v['book'],
-                'chapter': v['chapter'],
-                'verse': v['verse'],
-                'text': v['text']
-            })
-
-        # Send batch
-        try:
-            response = requests.post(url, headers=headers, json=batch_data)
-            response.raise_for_status()
-
-            stats['imported'] += len(batch)
+        batch_data = drop_columns(verse_rows(manuscript_id, batch), missing)
 
-            # Progress indicator
-            if (i // batch_size) % 10 == 0:
-                print(f"  📊 Progress: {stats['imported']}/{len(verses)} verses...")
+        # Send batch; bad rows are bisected out to the rejects file
+        written = writer.write(batch_data)
+        stats['imported'] += written
+        if written < len(batch_data):
+            stats['errors'] += len(batch_data) - written
+            errors.append(f"Batch {i//batch_size + 1}: {len(batch_data) - written} rows rejected")
+            print(f"  ❌ Batch {i//batch_size + 1}: {len(batch_data) - written} rows rejected")
 
-        except Exception as e:
-            stats['errors'] += len(batch)
-            errors.append(f"Batch {i//batch_size + 1}: {str(e)}")
-            print(f"  ❌ Error in batch {i//batch_size + 1}: {e}")
+        # Progress indicator
+        if (i // batch_size) % 10 == 0:
+            print(f"  📊 Progress: {stats['imported']}/{len(verses)} verses...")
 
         # Rate limiting
         time.sleep(0.05)  # 50ms between batches
 
+    writer.close()
     return stats, errors
 
 def main():
@@ -155,4 +159,6 @@ def main():
         sys.exit(1)
 
 if __name__ == "__main__":
+    from profiling import profile_from_argv
+    profile_from_argv()
     main()
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Import Metrics
+All4Yah Project
+
+Stage-level instrumentation shared by the importers, to tell whether a slow
+load is parse-, network- or database-bound. Each stage (read, parse,
+transform, encode, send, commit - any name works) accumulates its calls,
+time, rows and bytes, and a histogram of per-call latency, so per-batch
+send / commit times show up as a distribution rather than one total.
+
+    metrics = ImportMetrics('import-lxx')
+    with metrics.stage('parse', bytes=os.path.getsize(path)) as stage:
+        verses = load(path)
+        stage.rows = len(verses)
+    with metrics.stage('send', rows=len(batch)):
+        execute_batch(cur, sql, batch)
+    metrics.count('rejected', 3)
+    metrics.finish()
+
+finish() prints a stage table and writes:
+
+- a JSON summary to metrics/<importer>-<timestamp>.json, or to
+  IMPORT_METRICS_JSON if set
+- a Prometheus textfile (histograms, counters and rows/s and bytes/s
+  gauges) when IMPORT_METRICS_PROM is set: a .prom path, or a directory
+  such as node_exporter's textfile collector directory
+
+BatchWriter takes a `metrics` argument and reports its encode and send
+stages itself. Under --profile (profiling.py) every stage is also a
+boundary of the profile's RSS / tracemalloc timeline.
+"""
+
+import os
+import re
+import json
+import time
+import threading
+from datetime import datetime
+from contextlib import contextmanager
+
+import profiling
+
+METRICS_DIR = "metrics"
+METRIC_PREFIX = "all4yah_import"
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+class StageStats:
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.rows = 0
+        self.bytes = 0
+        self.min = None
+        self.max = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)   # last is +Inf
+
+    def observe(self, seconds, rows=0, size=0):
+        self.calls += 1
+        self.seconds += seconds
+        self.rows += rows
+        self.bytes += size
+        self.min = seconds if self.min is None else min(self.min, seconds)
+        self.max = max(self.max, seconds)
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+                return
+        self.buckets[-1] += 1
+
+    def summary(self):
+        cumulative, total = {}, 0
+        for bound, count in zip(LATENCY_BUCKETS + ('+Inf',), self.buckets):
+            total += count
+            cumulative[str(bound)] = total
+        return {
+            'calls': self.calls,
+            'seconds': round(self.seconds, 6),
+            'rows': self.rows,
+            'bytes': self.bytes,
+            'rows_per_sec': round(self.rows / self.seconds, 1) if self.seconds else None,
+            'bytes_per_sec': round(self.bytes / self.seconds, 1) if self.seconds else None,
+            'latency': {
+                'min': round(self.min or 0.0, 6),
+                'mean': round(self.seconds / self.calls, 6) if self.calls else 0.0,
+                'max': round(self.max, 6),
+                'buckets': cumulative,
+            },
+        }
+
+class Span:
+    """Handle yielded by ImportMetrics.stage(); set or add to rows / bytes inside the block."""
+
+    def __init__(self, rows, size):
+        self.rows = rows
+        self.bytes = size
+
+class ImportMetrics:
+    def __init__(self, importer):
+        self.importer = importer
+        self.started = time.perf_counter()
+        self.started_at = datetime.now()
+        self.stages = {}
+        self.counters = {}
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name, rows=0, bytes=0):
+        """Time the block as one call of stage `name`."""
+        span = Span(rows, bytes)
+        start = time.perf_counter()
+        try:
+            with profiling.stage(name):
+                yield span
+        finally:
+            self.observe(name, time.perf_counter() - start, span.rows, span.bytes)
+
+    def observe(self, name, seconds, rows=0, bytes=0):
+        with self.lock:
+            if name not in self.stages:
+                self.stages[name] = StageStats()
+            self.stages[name].observe(seconds, rows, bytes)
+
+    def count(self, name, n=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def summary(self):
+        with self.lock:
+            return {
+                'importer': self.importer,
+                'started_at': self.started_at.isoformat(timespec='seconds'),
+                'wall_seconds': round(time.perf_counter() - self.started, 6),
+                'stages': {name: stats.summary() for name, stats in self.stages.items()},
+                'counters': dict(self.counters),
+            }
+
+    # =========================================================================
+    # Output
+    # =========================================================================
+
+    def write_json(self, path=None, summary=None):
+        path = path or os.getenv('IMPORT_METRICS_JSON') or os.path.join(
+            METRICS_DIR, f"{self.importer}-{self.started_at.strftime('%Y%m%d-%H%M%S')}.json")
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(summary or self.summary(), f, indent=2)
+            f.write('\n')
+        return path
+
+    def prometheus(self, summary=None):
+        """Prometheus text exposition format."""
+        summary = summary or self.summary()
+        importer = re.sub(r'[\\"\n]', '_', self.importer)
+        lines = []
+
+        def family(name, kind, help_text):
+            lines.append(f"# HELP {METRIC_PREFIX}_{name} {help_text}")
+            lines.append(f"# TYPE {METRIC_PREFIX}_{name} {kind}")
+
+        def sample(name, labels, value):
+            label_text = ','.join(f'{k}="{v}"' for k, v in {'importer': importer, **labels}.items())
+            lines.append(f"{METRIC_PREFIX}_{name}{{{label_text}}} {value}")
+
+        stages = summary['stages']
+        family('stage_seconds', 'histogram', 'Latency of one call of an import stage (e.g. one batch)')
+        for stage, s in stages.items():
+            for bound, count in s['latency']['buckets'].items():
+                sample('stage_seconds_bucket', {'stage': stage, 'le': bound}, count)
+            sample('stage_seconds_sum', {'stage': stage}, s['seconds'])
+            sample('stage_seconds_count', {'stage': stage}, s['calls'])
+        for name, key, kind, help_text in (
+            ('stage_rows_total', 'rows', 'counter', 'Rows processed by an import stage'),
+            ('stage_bytes_total', 'bytes', 'counter', 'Bytes processed by an import stage'),
+            ('stage_rows_per_second', 'rows_per_sec', 'gauge', 'Rows per second of stage time'),
+            ('stage_bytes_per_second', 'bytes_per_sec', 'gauge', 'Bytes per second of stage time'),
+        ):
+            family(name, kind, help_text)
+            for stage, s in stages.items():
+                sample(name, {'stage': stage}, s[key] or 0)
+        family('events_total', 'counter', 'Importer event counters (rejected rows, retries, ...)')
+        for name, value in summary['counters'].items():
+            sample('events_total', {'event': name}, value)
+        family('wall_seconds', 'gauge', 'Wall-clock duration of the import run')
+        sample('wall_seconds', {}, summary['wall_seconds'])
+        family('last_run_timestamp_seconds', 'gauge', 'Unix time the import run finished')
+        sample('last_run_timestamp_seconds', {}, round(time.time()))
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path, summary=None):
+        """Write atomically, as the textfile collector requires; a directory gets <importer>.prom."""
+        if os.path.isdir(path):
+            path = os.path.join(path, f"{re.sub(r'[^A-Za-z0-9_-]', '_', self.importer)}.prom")
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.prometheus(summary))
+        os.replace(tmp_path, path)
+        return path
+
+    def print_table(self, summary=None):
+        summary = summary or self.summary()
+        print(f"\n📊 Stage timings ({self.importer}, {summary['wall_seconds']:.1f}s wall)")
+        for name, s in summary['stages'].items():
+            rate = f"{s['rows_per_sec']:>10,.0f} rows/s" if s['rows_per_sec'] else ' ' * 17
+            size = f" | {s['bytes_per_sec'] / 1e6:7.2f} MB/s" if s['bytes_per_sec'] else ''
+            print(f"  {name:10} | {s['calls']:6} calls | {s['seconds']:8.2f} s | {s['rows']:>9,} rows | {rate} | "
+                  f"max {s['latency']['max'] * 1000:7.1f} ms{size}")
+        for name, value in summary['counters'].items():
+            print(f"  {name:10} | {value:,}")
+
+    def finish(self):
+        """Print the stage table and write the JSON (and Prometheus) output. Returns the summary."""
+        summary = self.summary()
+        self.print_table(summary)
+        print(f"   Metrics: {self.write_json(summary=summary)}")
+        prom_path = os.getenv('IMPORT_METRICS_PROM')
+        if prom_path:
+            print(f"   Prometheus: {self.write_prometheus(prom_path, summary)}")
+        return summary
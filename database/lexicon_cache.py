@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Local Lexicon Cache
+All4Yah Project
+
+A compact SQLite copy of the Strong's lexicon (~14k entries) so lookups do
+not go through PostgREST. Definitions are stored zlib-compressed; the file
+is a few MB and a point lookup is a single primary-key probe.
+
+- get(strong_number)           entry dict or None
+- prefix(strong_prefix)        entries whose number starts with e.g. "H30"
+- transliteration(query)       entries whose transliteration starts with the
+                               query, ignoring case, diacritics and ʼ/ʻ marks
+
+The cache is read-through: numbers not in the file are fetched from the
+lexicon table (when SUPABASE_URL and a key are set), stored, and served
+locally from then on. Misses are remembered for the life of the process.
+A cache built from a full source is marked complete, and its misses are
+final - they never reach the network.
+
+Build it from the STEPBible TSVs (via lexicon_parser.py), or from the
+lexicon table when the TSVs are not checked out:
+
+Usage:
+  python3 database/lexicon_cache.py --build
+  python3 database/lexicon_cache.py --build --from-rest
+  python3 database/lexicon_cache.py --lookup H3068
+  python3 database/lexicon_cache.py --prefix H306
+  python3 database/lexicon_cache.py --translit yhwh
+"""
+
+import os
+import re
+import sys
+import zlib
+import sqlite3
+import argparse
+import unicodedata
+from datetime import datetime
+from functools import lru_cache
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_PATH = os.getenv('ALL4YAH_LEXICON_CACHE', os.path.join(BASE_DIR, 'data', 'cache', 'lexicon.sqlite'))
+REST_PAGE_SIZE = 1000
+ENTRY_CACHE_SIZE = 4096
+
+COLUMNS = ['strong_number', 'language', 'original_word', 'transliteration',
+           'part_of_speech', 'definition', 'short_definition']
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS entries (
+        strong_number TEXT PRIMARY KEY,
+        language TEXT,
+        original_word TEXT,
+        transliteration TEXT,
+        part_of_speech TEXT,
+        definition BLOB,
+        short_definition TEXT,
+        translit_key TEXT
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS idx_entries_translit ON entries (translit_key);
+    CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+TRANSLIT_DROP_RE = re.compile(r"[^a-z0-9]+")
+
+def translit_key(text):
+    """'yᵊhôwâh' / "ʼĕlôhîym" -> 'yhowah' / 'elohiym' - lowercase ASCII letters and digits."""
+    decomposed = unicodedata.normalize('NFD', text or '')
+    stripped = ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return TRANSLIT_DROP_RE.sub('', stripped.lower())
+
+def prefix_bounds(prefix):
+    """Half-open [low, high) text range covering every string that starts with prefix."""
+    return prefix, prefix + '\U0010ffff'
+
+# =============================================================================
+# Cache
+# =============================================================================
+
+class LexiconCache:
+    def __init__(self, path=CACHE_PATH, read_through=True):
+        self.path = path
+        self.read_through = read_through
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.executescript(SCHEMA)
+        self.misses = set()
+        self.get = lru_cache(maxsize=ENTRY_CACHE_SIZE)(self._get)
+
+    @property
+    def complete(self):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'complete'").fetchone()
+        return bool(row and row[0] == '1')
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def _row_to_entry(self, row):
+        entry = dict(zip(COLUMNS, row))
+        if entry['definition'] is not None:
+            entry['definition'] = zlib.decompress(entry['definition']).decode('utf-8')
+        return entry
+
+    def _select(self, where, params, limit=None):
+        sql = f"SELECT {', '.join(COLUMNS)} FROM entries WHERE {where} ORDER BY strong_number"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        return [self._row_to_entry(row) for row in self.conn.execute(sql, params)]
+
+    def _get(self, strong_number):
+        rows = self._select("strong_number = ?", (strong_number,))
+        if rows:
+            return rows[0]
+        if not self.read_through or strong_number in self.misses or self.complete:
+            return None
+        fetched = fetch_entries({"strong_number": f"eq.{strong_number}"})
+        if fetched:
+            self.store(fetched)
+            return self._select("strong_number = ?", (strong_number,))[0]
+        self.misses.add(strong_number)
+        return None
+
+    def prefix(self, strong_prefix, limit=50):
+        low, high = prefix_bounds(strong_prefix.upper())
+        return self._select("strong_number >= ? AND strong_number < ?", (low, high), limit)
+
+    def transliteration(self, query, limit=50):
+        key = translit_key(query)
+        if not key:
+            return []
+        low, high = prefix_bounds(key)
+        return self._select("translit_key >= ? AND translit_key < ?", (low, high), limit)
+
+    def entries(self):
+        """Every cached entry, in strong_number order."""
+        return self._select("1 = 1", ())
+
+    def headwords(self):
+        """(strong_number, original_word, short_definition) for every entry - no definitions decoded."""
+        return self.conn.execute(
+            "SELECT strong_number, original_word, short_definition FROM entries ORDER BY strong_number"
+        ).fetchall()
+
+    def store(self, entries):
+        """Insert or replace entry dicts (lexicon columns)."""
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [(
+                e['strong_number'], e.get('language'), e.get('original_word'), e.get('transliteration'),
+                e.get('part_of_speech'),
+                zlib.compress((e.get('definition') or '').encode('utf-8'), 9),
+                e.get('short_definition'), translit_key(e.get('transliteration')),
+            ) for e in entries]
+        )
+        self.conn.commit()
+        self.get.cache_clear()
+
+    def rebuild(self, entries, source):
+        """Replace the whole cache with `entries` and record where they came from."""
+        self.conn.execute("DELETE FROM entries")
+        self.store(entries)
+        self.conn.executemany("INSERT OR REPLACE INTO meta VALUES (?, ?)", [
+            ('source', source),
+            ('built_at', datetime.now().isoformat(timespec='seconds')),
+            ('complete', '1'),
+        ])
+        self.conn.commit()
+        self.conn.execute("VACUUM")
+        self.misses.clear()
+
+    def close(self):
+        self.conn.close()
+
+@lru_cache(maxsize=None)
+def open_cache(path=CACHE_PATH):
+    """
+    Process-wide shared cache instance. An empty cache is built from the
+    STEPBible TSVs on first use when they are checked out.
+    """
+    cache = LexiconCache(path)
+    if not len(cache):
+        from lexicon_parser import LEXICON_FILES, load_lexicons
+        files = [(os.path.join(BASE_DIR, p), language) for p, language in LEXICON_FILES]
+        if all(os.path.exists(p) for p, _ in files):
+            cache.rebuild([entry._asdict() for entry in load_lexicons(files)], 'stepbible-tsv')
+    return cache
+
+# =============================================================================
+# Sources
+# =============================================================================
+
+def rest_config():
+    """(supabase_url, headers) from the environment, or (None, None) when not configured."""
+    from dotenv import load_dotenv
+    load_dotenv()
+    key = os.getenv('SUPABASE_SERVICE_ROLE_KEY') or os.getenv('SUPABASE_ANON_KEY')
+    url = os.getenv('SUPABASE_URL') or (
+        f"https://{os.getenv('SUPABASE_PROJECT_REF')}.supabase.co" if os.getenv('SUPABASE_PROJECT_REF') else None)
+    if not url or not key:
+        return None, None
+    return url, {"apikey": key, "Authorization": f"Bearer {key}"}
+
+def fetch_entries(params):
+    """GET lexicon rows from Supabase; [] when no credentials are configured."""
+    url, headers = rest_config()
+    if not url:
+        return []
+
+    import requests
+    rows = []
+    offset = 0
+    while True:
+        response = requests.get(
+            f"{url}/rest/v1/lexicon",
+            headers=headers,
+            params={**params, "select": ','.join(COLUMNS), "order": "strong_number.asc",
+                    "offset": offset, "limit": REST_PAGE_SIZE},
+        )
+        response.raise_for_status()
+        page = response.json()
+        rows.extend(page)
+        if len(page) < REST_PAGE_SIZE:
+            return rows
+        offset += REST_PAGE_SIZE
+
+def build(path=CACHE_PATH, from_rest=False):
+    cache = LexiconCache(path, read_through=False)
+    if from_rest:
+        print("📥 Fetching lexicon table from Supabase...")
+        entries = fetch_entries({})
+        source = 'rest'
+    else:
+        from lexicon_parser import load_lexicons
+        entries = [entry._asdict() for entry in load_lexicons()]
+        source = 'stepbible-tsv'
+    if not entries:
+        print("❌ No lexicon entries found")
+        sys.exit(1)
+    cache.rebuild(entries, source)
+    print(f"✅ Cached {len(cache)} entries in {path} ({os.path.getsize(path) / 1024:.0f} KB)")
+    cache.close()
+
+# =============================================================================
+# CLI Entry Point
+# =============================================================================
+
+def print_entry(entry):
+    print(f"   {entry['strong_number']}: {entry['original_word']} ({entry['transliteration']}) - {entry['short_definition']}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Strong's lexicon cache")
+    parser.add_argument("--path", default=CACHE_PATH, help="Cache file")
+    parser.add_argument("--build", action="store_true", help="(Re)build the cache")
+    parser.add_argument("--from-rest", action="store_true", help="Build from the lexicon table instead of the TSVs")
+    parser.add_argument("--lookup", help="Strong's number to look up")
+    parser.add_argument("--prefix", help="Strong's number prefix")
+    parser.add_argument("--translit", help="Transliteration prefix")
+    args = parser.parse_args()
+
+    if args.build:
+        build(args.path, args.from_rest)
+    cache = LexiconCache(args.path)
+    if args.lookup:
+        entry = cache.get(args.lookup.upper())
+        if entry:
+            print_entry(entry)
+            print(f"\n{entry['definition']}")
+        else:
+            print(f"❌ {args.lookup} not found")
+    for entry in cache.prefix(args.prefix) if args.prefix else []:
+        print_entry(entry)
+    for entry in cache.transliteration(args.translit) if args.translit else []:
+        print_entry(entry)
+
+if __name__ == "__main__":
+    from profiling import profile_from_argv
+    profile_from_argv()
+    main()
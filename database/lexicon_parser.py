@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+STEPBible Lexicon Parser
+All4Yah Project
+
+Streaming parser for the STEPBible Translators Brief lexicons (TBESH/TBESG),
+shared by import-strongs-lexicon-rest.py, import-strongs-final.py and
+import-strongs-lexicon-sql.py.
+
+- All patterns are compiled once at import time
+- iter_entries() yields LexiconEntry records one line at a time
+- load_lexicons() parses the Hebrew and Greek files in parallel processes
+  (on a single CPU the process hand-off costs more than it saves, so it
+  falls back to sequential parsing - see --benchmark)
+
+LexiconEntry is a NamedTuple in lexicon column order, so it can go straight
+into execute_values(); REST importers send entry._asdict(). Its gematria
+field is the headword's gematria / isopsephy (gematria.py).
+
+Usage:
+  python3 database/lexicon_parser.py                  # Parse both files, print counts
+  python3 database/lexicon_parser.py --benchmark      # Time sequential vs parallel parsing
+"""
+
+import os
+import re
+import sys
+import html
+import time
+import argparse
+from typing import NamedTuple, Optional
+from concurrent.futures import ProcessPoolExecutor
+
+from gematria import value as gematria_value
+
+# =============================================================================
+# Configuration
+# =============================================================================
+
+LEXICON_DIR = "manuscripts/strongs-lexicon/STEPBible-Data/Lexicons"
+HEBREW_FILE = f"{LEXICON_DIR}/TBESH - Translators Brief lexicon of Extended Strongs for Hebrew - STEPBible.org CC BY.txt"
+GREEK_FILE = f"{LEXICON_DIR}/TBESG - Translators Brief lexicon of Extended Strongs for Greek - STEPBible.org CC BY.txt"
+LEXICON_FILES = [(HEBREW_FILE, 'hebrew'), (GREEK_FILE, 'greek')]
+
+# Morphology code ("H:N-M", "G:V-PAI-1S") -> readable part of speech
+POS_MAP = {
+    'N': 'noun', 'V': 'verb', 'A': 'adjective',
+    'D': 'adverb', 'C': 'conjunction', 'P': 'preposition',
+    'R': 'pronoun', 'I': 'interjection', 'T': 'particle',
+    'X': 'other'
+}
+
+DATA_START_RE = re.compile(r'^[HG]\d')
+PRIMARY_RE = re.compile(r'^[HG]\d+$')
+REF_RE = re.compile(r'<ref=[^>]*>.*?</ref>')
+BR_RE = re.compile(r'<br\s*/?>', re.IGNORECASE)
+TAG_RE = re.compile(r'<[^>]+>')
+NEWLINES_RE = re.compile(r'\n+')
+SPACES_RE = re.compile(r'  +')
+LEADING_ZEROS_RE = re.compile(r'^0+')
+
+class LexiconEntry(NamedTuple):
+    strong_number: str
+    language: str
+    original_word: str
+    transliteration: Optional[str]
+    part_of_speech: Optional[str]
+    definition: str
+    short_definition: Optional[str]
+    gematria: Optional[int]
+
+# =============================================================================
+# Field cleanup
+# =============================================================================
+
+def clean_html(text):
+    """Remove HTML tags and decode entities"""
+    if not text:
+        return ""
+    if '<' in text:
+        # Remove <ref> tags and their content, keep the content of other tags
+        text = REF_RE.sub('', text)
+        text = BR_RE.sub('\n', text)
+        text = TAG_RE.sub('', text)
+    if '&' in text:
+        text = html.unescape(text)
+    text = NEWLINES_RE.sub('\n', text)
+    text = SPACES_RE.sub(' ', text)
+    return text.strip()
+
+def normalize_strong_number(estrong):
+    """
+    Convert STEPBible format to database format:
+    H0001 -> H1, G0001 -> G1
+    But preserve extended numbers: H9001 -> H9001
+    """
+    if not estrong or len(estrong) < 2:
+        return None
+
+    prefix = estrong[0]
+    number = estrong[1:]
+    try:
+        return f"{prefix}{int(number)}"
+    except ValueError:
+        clean_num = LEADING_ZEROS_RE.sub('', number)
+        return f"{prefix}{clean_num}" if clean_num else None
+
+def part_of_speech(morph):
+    """'H:N-M' -> 'noun'; unknown codes are kept as-is."""
+    if not morph or ':' not in morph:
+        return None
+    pos_code = morph.split(':', 2)[1].split('-', 1)[0]
+    return POS_MAP.get(pos_code, pos_code)
+
+# =============================================================================
+# Parsing
+# =============================================================================
+
+def iter_entries(file_path, language, limit=None, stats=None):
+    """
+    Yield a LexiconEntry per primary Strong's number in a STEPBible TSV
+    lexicon. Lines before the first H/G entry are the file's preamble.
+    `stats`, if given, receives a 'skipped' count of malformed lines.
+    """
+    skipped = 0
+    count = 0
+    data_started = False
+
+    with open(file_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+
+            if not data_started:
+                if not DATA_START_RE.match(line):
+                    continue
+                data_started = True
+
+            parts = line.split('\t')
+            if len(parts) < 8:
+                skipped += 1
+                continue
+
+            estrong, _, _, original_word, transliteration, morph, gloss, definition = parts[:8]
+
+            # Skip disambiguation rows (e.g. "G0001G =") - keep "G0001"
+            if '=' in estrong or not PRIMARY_RE.match(estrong):
+                continue
+
+            strong_number = normalize_strong_number(estrong)
+            if not strong_number:
+                skipped += 1
+                continue
+
+            yield LexiconEntry(
+                strong_number,
+                language,
+                original_word,
+                transliteration or None,
+                part_of_speech(morph),
+                clean_html(definition),
+                gloss or None,
+                gematria_value(original_word) or None,
+            )
+
+            count += 1
+            if limit and count >= limit:
+                break
+
+    if stats is not None:
+        stats['skipped'] = skipped
+
+def parse_file(file_path, language, limit=None):
+    """Parse a whole lexicon file; returns (entries, skipped)."""
+    stats = {}
+    entries = list(iter_entries(file_path, language, limit, stats))
+    return entries, stats.get('skipped', 0)
+
+def load_lexicons(files=LEXICON_FILES, limit=None, parallel=None):
+    """
+    Parse each (file_path, language) pair - in separate processes when
+    `parallel` (default: when more than one CPU is available) - and return
+    all entries in the order the files were given.
+    """
+    if parallel is None:
+        parallel = (os.cpu_count() or 1) > 1
+    for file_path, language in files:
+        print(f"📖 Loading {language} lexicon from: {file_path}")
+
+    if parallel and len(files) > 1:
+        with ProcessPoolExecutor(max_workers=len(files)) as pool:
+            futures = [pool.submit(parse_file, path, language, limit) for path, language in files]
+            results = [future.result() for future in futures]
+    else:
+        results = [parse_file(path, language, limit) for path, language in files]
+
+    all_entries = []
+    for (_, language), (entries, skipped) in zip(files, results):
+        print(f"✅ Loaded {len(entries)} {language} lexicon entries")
+        if skipped > 0:
+            print(f"   ⚠️  Skipped {skipped} invalid lines")
+        all_entries.extend(entries)
+    return all_entries
+
+# =============================================================================
+# Benchmark
+# =============================================================================
+
+def benchmark(files, rounds):
+    """Time sequential and parallel parsing of the lexicon files."""
+    timings = {}
+    for label, parallel in (('sequential', False), ('parallel', True)):
+        best = None
+        for _ in range(rounds):
+            start = time.perf_counter()
+            if parallel:
+                with ProcessPoolExecutor(max_workers=len(files)) as pool:
+                    results = list(pool.map(parse_file, *zip(*files)))
+            else:
+                results = [parse_file(path, language) for path, language in files]
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        entries = sum(len(r[0]) for r in results)
+        timings[label] = best
+        print(f"  {label:10} | {best * 1000:8.1f} ms | {entries / best:10,.0f} entries/s")
+    print(f"\n  Parallel speedup: {timings['sequential'] / timings['parallel']:.2f}x (best of {rounds})")
+
+# =============================================================================
+# CLI Entry Point
+# =============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Parse the STEPBible Strong's lexicons")
+    parser.add_argument("--hebrew", default=HEBREW_FILE, help="Hebrew lexicon TSV")
+    parser.add_argument("--greek", default=GREEK_FILE, help="Greek lexicon TSV")
+    parser.add_argument("--limit", type=int, help="Entries per language")
+    parser.add_argument("--benchmark", action="store_true", help="Time sequential vs parallel parsing")
+    parser.add_argument("--rounds", type=int, default=5, help="Benchmark rounds (best is reported)")
+    args = parser.parse_args()
+
+    files = [(args.hebrew, 'hebrew'), (args.greek, 'greek')]
+    try:
+        if args.benchmark:
+            print("⏱️  Lexicon parse benchmark\n")
+            benchmark(files, args.rounds)
+        else:
+            entries = load_lexicons(files, args.limit)
+            print(f"\nTotal: {len(entries)} entries")
+    except FileNotFoundError as e:
+        print(f"❌ Lexicon file not found: {e.filename}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    from profiling import profile_from_argv
+    profile_from_argv()
+    main()
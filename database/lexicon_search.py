@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Lexicon Headword Search
+All4Yah Project
+
+Fuzzy search over every Strong's headword and transliteration, so a lexicon
+entry can be found from pointed or unpointed Hebrew, accented or bare Greek,
+or a rough romanization - none of which the english tsvector index in
+add-search-indexes.sql can serve.
+
+Each entry contributes two keys: its headword folded by normalize.fold()
+(no niqqud, cantillation, accents or final forms) and its transliteration
+folded to ASCII (lexicon_cache.translit_key). Keys are padded and split into
+character trigrams; the inverted index maps each trigram to an array('I') of
+key ids. A query is scored against every key sharing one of its trigrams by
+Dice similarity (2 * shared / (|query| + |key|)), so misspellings and
+missing vowels still rank the right entry first.
+
+Entries come from the local lexicon cache (lexicon_cache.py).
+
+Usage:
+  python3 database/lexicon_search.py "אלהים"
+  python3 database/lexicon_search.py "logos" --limit 5
+  python3 database/lexicon_search.py --benchmark
+"""
+
+import time
+import argparse
+from array import array
+from collections import Counter
+
+from normalize import fold
+from lexicon_cache import open_cache, translit_key
+
+NGRAM = 3
+PAD = '\x02'
+MIN_SCORE = 0.3
+DEFAULT_LIMIT = 10
+
+def ngrams(key, n=NGRAM):
+    """Distinct padded n-grams of a key ('אב' -> {'\\x02\\x02א', '\\x02אב', 'אב\\x02'})."""
+    padded = PAD * (n - 1) + key + PAD
+    return {padded[i:i + n] for i in range(len(padded) - n + 1)}
+
+def query_keys(query):
+    """The folded forms a query can match: headword fold and ASCII transliteration."""
+    keys = {fold(query).replace(' ', '')}
+    ascii_key = translit_key(query)
+    if ascii_key:
+        keys.add(ascii_key)
+    return {k for k in keys if k}
+
+class LexiconSearchIndex:
+    def __init__(self, entries):
+        self.entries = []          # (strong_number, original_word, transliteration, short_definition)
+        self.key_entry = array('I')
+        self.key_sizes = array('H')
+        self.keys = []
+        postings = {}
+        for entry in entries:
+            entry_id = len(self.entries)
+            self.entries.append((entry['strong_number'], entry['original_word'],
+                                 entry['transliteration'], entry['short_definition']))
+            for key in {fold(entry['original_word']).replace(' ', ''), translit_key(entry['transliteration'])}:
+                if not key:
+                    continue
+                key_id = len(self.keys)
+                self.keys.append(key)
+                self.key_entry.append(entry_id)
+                grams = ngrams(key)
+                self.key_sizes.append(len(grams))
+                for gram in grams:
+                    postings.setdefault(gram, array('I')).append(key_id)
+        self.postings = postings
+
+    @classmethod
+    def from_cache(cls, cache=None):
+        return cls((cache or open_cache()).entries())
+
+    def search(self, query, limit=DEFAULT_LIMIT, min_score=MIN_SCORE):
+        """Entries ranked by best trigram similarity of any of their keys to the query."""
+        best = {}
+        for key in query_keys(query):
+            grams = ngrams(key)
+            shared = Counter()
+            for gram in grams:
+                posting = self.postings.get(gram)
+                if posting is not None:
+                    shared.update(posting)
+            size = len(grams)
+            for key_id, common in shared.items():
+                score = 2.0 * common / (size + self.key_sizes[key_id])
+                if self.keys[key_id] == key:
+                    score = 1.0
+                entry_id = self.key_entry[key_id]
+                if score >= min_score and score > best.get(entry_id, 0.0):
+                    best[entry_id] = score
+        ranked = sorted(best.items(), key=lambda item: (-item[1], item[0]))[:limit]
+        return [
+            {
+                'strong_number': strong, 'original_word': word, 'transliteration': translit,
+                'short_definition': gloss, 'score': round(score, 3),
+            }
+            for entry_id, score in ranked
+            for strong, word, translit, gloss in [self.entries[entry_id]]
+        ]
+
+# =============================================================================
+# CLI Entry Point
+# =============================================================================
+
+def benchmark(index, rounds=200):
+    sample = [e[1] for e in index.entries[::max(1, len(index.entries) // 50)]]
+    sample += [e[2] for e in index.entries[::max(1, len(index.entries) // 50)] if e[2]]
+    start = time.perf_counter()
+    for _ in range(rounds // len(sample) + 1):
+        for query in sample:
+            index.search(query)
+    runs = (rounds // len(sample) + 1) * len(sample)
+    elapsed = time.perf_counter() - start
+    print(f"  {runs} queries | {elapsed / runs * 1e6:8.1f} µs/query | {len(index.keys)} keys, {len(index.postings)} trigrams")
+
+def main():
+    parser = argparse.ArgumentParser(description="Fuzzy Strong's headword search")
+    parser.add_argument("query", nargs="?", help="Hebrew, Greek or transliterated headword")
+    parser.add_argument("--limit", type=int, default=DEFAULT_LIMIT, help="Results to show")
+    parser.add_argument("--benchmark", action="store_true", help="Time queries over a sample of headwords")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    index = LexiconSearchIndex.from_cache()
+    print(f"✅ Indexed {len(index.entries)} entries in {(time.perf_counter() - start) * 1000:.0f} ms\n")
+
+    if args.benchmark:
+        benchmark(index)
+    elif args.query:
+        for hit in index.search(args.query, args.limit):
+            print(f"   {hit['score']:.2f}  {hit['strong_number']}: {hit['original_word']} "
+                  f"({hit['transliteration']}) - {hit['short_definition']}")
+    else:
+        parser.error("a query or --benchmark is required")
+
+if __name__ == "__main__":
+    from profiling import profile_from_argv
+    profile_from_argv()
+    main()
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Manuscript Id Resolver
+All4Yah Project
+
+Shared code -> UUID lookup for the manuscripts table, so scripts do not each
+make their own round trip for the WLC / SBLGNT / ONKELOS / DSS ids. The
+whole table (a few dozen rows) is fetched with one PostgREST request and
+kept in data/cache/manuscript_ids.json; lookups are served from that file
+until it is older than ALL4YAH_MANUSCRIPT_IDS_TTL seconds (default one day),
+and offline once the file exists.
+
+    from manuscript_ids import open_resolver
+    ids = open_resolver(SUPABASE_URL, headers)
+    wlc_id = ids.require('WLC')       # LookupError if there is no WLC row
+    ids.get('ONKELOS')                # None if there is no ONKELOS row
+
+A code missing from a fresh cache triggers one refresh, in case the row was
+created since. When a refresh fails (offline, 5xx) a stale file is still
+served. The file records the Supabase URL it came from and is ignored by
+resolvers for any other URL, so ids from the local PostgREST stub never
+leak into a run against the real project.
+
+get_or_create() is the psycopg2 path for importers that create their own
+manuscript row (import-lxx.py): INSERT ... ON CONFLICT (code) DO NOTHING,
+then SELECT, so parallel imports of one manuscript end up with the same row
+instead of racing on the UNIQUE code.
+
+Usage:
+  python3 database/manuscript_ids.py                  # list cached ids
+  python3 database/manuscript_ids.py --refresh
+  python3 database/manuscript_ids.py WLC SBLGNT
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+
+from lexicon_cache import rest_config
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_PATH = os.getenv('ALL4YAH_MANUSCRIPT_IDS', os.path.join(BASE_DIR, 'data', 'cache', 'manuscript_ids.json'))
+TTL_SECONDS = int(os.getenv('ALL4YAH_MANUSCRIPT_IDS_TTL', str(24 * 3600)))
+COLUMNS = ['id', 'code', 'name', 'language']
+
+_resolvers = {}
+
+# =============================================================================
+# Resolver
+# =============================================================================
+
+class ManuscriptIds:
+    def __init__(self, url=None, headers=None, path=CACHE_PATH, ttl=TTL_SECONDS):
+        if url is None:
+            url, headers = rest_config()
+        self.url = url.rstrip('/') if url else None
+        self.headers = headers
+        self.path = path
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.refreshed = False
+        self.data = self._read()
+
+    def _read(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if self.url and data.get('source') != self.url:
+            return None
+        return data
+
+    @property
+    def stale(self):
+        return self.data is None or time.time() - self.data['fetched_at'] > self.ttl
+
+    def refresh(self):
+        """Re-fetch the whole manuscripts table and rewrite the cache file."""
+        if not self.url:
+            raise LookupError("No Supabase URL configured to fetch manuscript ids from")
+        rows = fetch_manuscripts(self.url, self.headers)
+        self.data = {
+            'source': self.url,
+            'fetched_at': time.time(),
+            'manuscripts': {row['code']: {k: row.get(k) for k in COLUMNS if k != 'code'} for row in rows},
+        }
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.data, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+        self.refreshed = True
+
+    def _load(self, force=False):
+        if self.refreshed or not self.url or not (force or self.stale):
+            return
+        import requests
+        try:
+            self.refresh()
+        except requests.RequestException as e:
+            if self.data is None:
+                raise
+            print(f"⚠️  Could not refresh manuscript ids ({e}); using the cached copy", file=sys.stderr)
+
+    def manuscripts(self):
+        """{code: {'id', 'name', 'language'}} for every manuscript."""
+        with self.lock:
+            self._load()
+            if self.data is None:
+                raise LookupError(f"No manuscript id cache at {self.path} and no Supabase URL configured")
+            return dict(self.data['manuscripts'])
+
+    def get(self, code):
+        """Id of manuscript `code`, or None."""
+        with self.lock:
+            self._load()
+            entry = self.data['manuscripts'].get(code) if self.data else None
+            if entry is None:
+                self._load(force=True)
+                entry = self.data['manuscripts'].get(code) if self.data else None
+        return entry['id'] if entry else None
+
+    def require(self, code):
+        manuscript_id = self.get(code)
+        if manuscript_id is None:
+            raise LookupError(f"{code} manuscript not found")
+        return manuscript_id
+
+def open_resolver(url=None, headers=None):
+    """Process-wide resolver per Supabase URL (from the environment by default)."""
+    key = url.rstrip('/') if url else None
+    if key not in _resolvers:
+        _resolvers[key] = ManuscriptIds(url, headers)
+    return _resolvers[key]
+
+def fetch_manuscripts(url, headers):
+    import requests
+    response = requests.get(
+        f"{url}/rest/v1/manuscripts",
+        headers=headers,
+        params={"select": ','.join(COLUMNS), "order": "code.asc"},
+    )
+    response.raise_for_status()
+    return response.json()
+
+# =============================================================================
+# Direct SQL
+# =============================================================================
+
+def get_or_create(conn, code, fields):
+    """
+    Id of manuscript `code`, inserting it with `fields` (column -> value) if
+    it does not exist. Safe to run from parallel imports: a concurrent insert
+    of the same code makes ours a no-op and both read back the same row.
+    """
+    columns = ['code'] + list(fields)
+    with conn.cursor() as cur:
+        cur.execute(f"""
+            INSERT INTO manuscripts ({', '.join(columns)})
+            VALUES ({', '.join(['%s'] * len(columns))})
+            ON CONFLICT (code) DO NOTHING
+            RETURNING id
+        """, [code] + list(fields.values()))
+        row = cur.fetchone()
+        if row is None:
+            cur.execute("SELECT id FROM manuscripts WHERE code = %s", (code,))
+            row = cur.fetchone()
+    conn.commit()
+    return row[0]
+
+# =============================================================================
+# CLI Entry Point
+# =============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Cached manuscript code -> id lookups")
+    parser.add_argument("codes", nargs='*', help="Manuscript codes to resolve (default: list all)")
+    parser.add_argument("--refresh", action="store_true", help="Re-fetch the manuscripts table first")
+    args = parser.parse_args()
+
+    resolver = open_resolver()
+    if args.refresh:
+        resolver.refresh()
+        print(f"✅ Cached {len(resolver.data['manuscripts'])} manuscripts in {resolver.path}")
+    if args.codes:
+        for code in args.codes:
+            print(f"   {code:10} {resolver.get(code) or '❌ not found'}")
+        return
+    for code, entry in sorted(resolver.manuscripts().items()):
+        print(f"   {code:10} {entry['id']}  {entry.get('language') or '':8} {entry.get('name') or ''}")
+
+if __name__ == "__main__":
+    from profiling import profile_from_argv
+    profile_from_argv()
+    main()
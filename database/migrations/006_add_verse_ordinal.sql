@@ -0,0 +1,124 @@
+-- Integer verse ordinals
+-- Run this against the All4Yah Supabase project via SQL Editor
+--
+-- verses.ordinal packs (book, chapter, verse) into one INTEGER:
+--   ordinal = ((chapter_base(book) + chapter) << 8) | verse
+-- using the book order and chapter slots in database/versification.py, so
+-- range queries, sorting and joins on a reference compare a single integer.
+-- The ordinal is the verse's own numbering; versification.canonical_ordinal()
+-- remaps LXX/English numbering onto MT where joins need it.
+--
+-- Importers fill the column on insert; the UPDATE below backfills existing
+-- rows. The VALUES list mirrors versification.BOOK_ORDER / CHAPTER_BASE and,
+-- like them, may only ever be appended to.
+
+ALTER TABLE verses ADD COLUMN IF NOT EXISTS ordinal INTEGER;
+
+CREATE INDEX IF NOT EXISTS idx_verses_manuscript_ordinal
+ON verses (manuscript_id, ordinal);
+
+CREATE INDEX IF NOT EXISTS idx_verses_ordinal
+ON verses (ordinal);
+
+UPDATE verses v
+SET ordinal = ((b.chapter_base + v.chapter) << 8) | v.verse
+FROM (VALUES
+    ('GEN', 0, 50),
+    ('EXO', 51, 40),
+    ('LEV', 92, 27),
+    ('NUM', 120, 36),
+    ('DEU', 157, 34),
+    ('JOS', 192, 24),
+    ('JDG', 217, 21),
+    ('RUT', 239, 4),
+    ('1SA', 244, 31),
+    ('2SA', 276, 24),
+    ('1KI', 301, 22),
+    ('2KI', 324, 25),
+    ('1CH', 350, 29),
+    ('2CH', 380, 36),
+    ('EZR', 417, 10),
+    ('NEH', 428, 13),
+    ('EST', 442, 10),
+    ('JOB', 453, 42),
+    ('PSA', 496, 151),
+    ('PRO', 648, 31),
+    ('ECC', 680, 12),
+    ('SNG', 693, 8),
+    ('ISA', 702, 66),
+    ('JER', 769, 52),
+    ('LAM', 822, 5),
+    ('EZK', 828, 48),
+    ('DAN', 877, 12),
+    ('HOS', 890, 14),
+    ('JOL', 905, 4),
+    ('AMO', 910, 9),
+    ('OBA', 920, 1),
+    ('JON', 922, 4),
+    ('MIC', 927, 7),
+    ('NAM', 935, 3),
+    ('HAB', 939, 3),
+    ('ZEP', 943, 3),
+    ('HAG', 947, 2),
+    ('ZEC', 950, 14),
+    ('MAL', 965, 4),
+    ('MAT', 970, 28),
+    ('MRK', 999, 16),
+    ('LUK', 1016, 24),
+    ('JHN', 1041, 21),
+    ('ACT', 1063, 28),
+    ('ROM', 1092, 16),
+    ('1CO', 1109, 16),
+    ('2CO', 1126, 13),
+    ('GAL', 1140, 6),
+    ('EPH', 1147, 6),
+    ('PHP', 1154, 4),
+    ('COL', 1159, 4),
+    ('1TH', 1164, 5),
+    ('2TH', 1170, 3),
+    ('1TI', 1174, 6),
+    ('2TI', 1181, 4),
+    ('TIT', 1186, 3),
+    ('PHM', 1190, 1),
+    ('HEB', 1192, 13),
+    ('JAS', 1206, 5),
+    ('1PE', 1212, 5),
+    ('2PE', 1218, 3),
+    ('1JN', 1222, 5),
+    ('2JN', 1228, 1),
+    ('3JN', 1230, 1),
+    ('JUD', 1232, 1),
+    ('REV', 1234, 22),
+    ('TOB', 1257, 14),
+    ('JDT', 1272, 16),
+    ('ESG', 1289, 16),
+    ('WIS', 1306, 19),
+    ('SIR', 1326, 51),
+    ('BAR', 1378, 5),
+    ('LJE', 1384, 1),
+    ('S3Y', 1386, 1),
+    ('SUS', 1388, 1),
+    ('BEL', 1390, 1),
+    ('1MA', 1392, 16),
+    ('2MA', 1409, 15),
+    ('3MA', 1425, 7),
+    ('4MA', 1433, 18),
+    ('PS2', 1452, 1),
+    ('MAN', 1454, 1),
+    ('1ES', 1456, 9),
+    ('2ES', 1466, 16),
+    ('ENO', 1483, 108),
+    ('JUB', 1592, 50),
+    ('PSS', 1643, 18),
+    ('ODE', 1662, 14),
+    ('MEQ', 1677, 150),
+    ('TGO', 1828, 150),
+    ('GMA', 1979, 150),
+    ('KNG', 2130, 150)
+) AS b(book, chapter_base, chapters)
+WHERE v.book = b.book
+  AND v.chapter BETWEEN 0 AND b.chapters
+  AND v.verse BETWEEN 0 AND 255
+  AND v.ordinal IS DISTINCT FROM ((b.chapter_base + v.chapter) << 8) | v.verse;
+
+COMMENT ON COLUMN verses.ordinal IS 'Packed (book, chapter, verse) ordinal - see database/versification.py';
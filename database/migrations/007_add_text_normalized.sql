@@ -0,0 +1,30 @@
+-- Normalized verse text
+-- Run this against the All4Yah Supabase project via SQL Editor
+--
+-- verses.text_normalized holds the verse with niqqud, cantillation, Greek
+-- accents and breathings stripped, final forms mapped to medial letters and
+-- Hebrew punctuation removed (database/normalize.py), so accent-insensitive
+-- concordance queries compare stored, indexed text instead of calling
+-- translate()/unaccent() on every row:
+--
+--   .ilike('text_normalized', '%אלהימ%')         -> trigram index
+--   .textSearch('text_normalized', 'λογοσ', { config: 'simple' })
+--
+-- Query terms must be folded the same way (normalize.fold) before matching.
+-- Importers fill the column on insert; existing rows are backfilled with
+--   python3 database/backfill-normalized-text.py
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+ALTER TABLE verses ADD COLUMN IF NOT EXISTS text_normalized TEXT;
+
+-- Substring / fuzzy matches (LIKE, ILIKE, similarity)
+CREATE INDEX IF NOT EXISTS idx_verses_text_normalized_trgm
+ON verses USING GIN (text_normalized gin_trgm_ops);
+
+-- Whole-word matches; 'simple' does no English stemming or stop words
+CREATE INDEX IF NOT EXISTS idx_verses_text_normalized_search
+ON verses USING GIN (to_tsvector('simple', text_normalized));
+
+COMMENT ON COLUMN verses.text_normalized IS
+    'Verse text folded by database/normalize.py: no diacritics or cantillation, final forms mapped, lowercase';
@@ -0,0 +1,30 @@
+-- Precomputed gematria / isopsephy values
+-- Run this against the All4Yah Supabase project via SQL Editor
+--
+-- Stores the numeric value of every lexicon headword and of every word in a
+-- verse (database/gematria.py, same letter values as add_gematria_tables.sql),
+-- so "all words with value N" is an index lookup instead of a scan that
+-- recomputes values:
+--
+--   lexicon:  .eq('gematria', 26)                      -> btree
+--   verses:   .contains('gematria_values', [26])       -> GIN
+--
+-- The Strong's importers and the LXX importers fill the columns on insert;
+-- existing rows (and the JS-imported WLC / SBLGNT) are backfilled with
+--   python3 database/backfill-gematria.py
+
+ALTER TABLE lexicon ADD COLUMN IF NOT EXISTS gematria INTEGER;
+
+CREATE INDEX IF NOT EXISTS idx_lexicon_gematria
+ON lexicon (gematria);
+
+-- Sorted distinct values of the verse's words (one per morphology token)
+ALTER TABLE verses ADD COLUMN IF NOT EXISTS gematria_values INTEGER[];
+
+CREATE INDEX IF NOT EXISTS idx_verses_gematria_values_gin
+ON verses USING GIN (gematria_values);
+
+COMMENT ON COLUMN lexicon.gematria IS
+    'Gematria (Hebrew) or isopsephy (Greek) of original_word, standard values - study aid only';
+COMMENT ON COLUMN verses.gematria_values IS
+    'Distinct gematria / isopsephy values of the verse''s words, from database/gematria.py';
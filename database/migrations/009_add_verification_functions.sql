@@ -0,0 +1,98 @@
+-- Server-side verification reports
+-- Run this against the All4Yah Supabase project via SQL Editor
+--
+-- Quality checks used to page every verse of a manuscript into Python and
+-- count there (verify-dss-quality-rest.py pulled all 52k DSS rows to find
+-- duplicates). These functions aggregate in the database and return one row
+-- per book, so checking the whole corpus transfers kilobytes:
+--
+--   POST /rest/v1/rpc/verse_anomalies    {"p_manuscript_id": "<uuid>"}
+--   POST /rest/v1/rpc/verse_tier_counts  {"p_manuscript_id": "<uuid>"}
+--
+-- python3 database/verify_corpus.py runs them for every manuscript in parallel.
+--
+-- verse_anomalies columns, per book of one manuscript:
+--   duplicates        rows beyond the first with the same reference - the same
+--                     ordinal (006) or, without one, the same book/chapter/verse
+--   invalid_chapters  chapter <= 0
+--   invalid_verses    verse <= 0
+--   empty_text        NULL or blank text
+--   missing_ordinal   ordinal not set (book outside versification.py, or not backfilled)
+--   verse_gaps        verse numbers missing below a chapter's highest verse
+--                     (includes omissions a critical text makes on purpose)
+--   untiered          canonical_tier not set
+--   tier_mismatches   canonical_tier differs from canonical_books.canonical_tier
+
+CREATE OR REPLACE FUNCTION verse_anomalies(p_manuscript_id UUID)
+RETURNS TABLE (
+    book TEXT,
+    verses BIGINT,
+    chapters BIGINT,
+    duplicates BIGINT,
+    invalid_chapters BIGINT,
+    invalid_verses BIGINT,
+    empty_text BIGINT,
+    missing_ordinal BIGINT,
+    verse_gaps BIGINT,
+    untiered BIGINT,
+    tier_mismatches BIGINT
+)
+LANGUAGE sql STABLE
+AS $$
+    WITH v AS (
+        SELECT v.book::TEXT AS book, v.chapter, v.verse, v.text, v.ordinal, v.canonical_tier
+        FROM verses v
+        WHERE v.manuscript_id = p_manuscript_id
+    ),
+    duplicate_refs AS (
+        SELECT MIN(v.book) AS book, COUNT(*) - 1 AS extra
+        FROM v
+        GROUP BY COALESCE(v.ordinal::TEXT, v.book || ' ' || v.chapter || ':' || v.verse)
+        HAVING COUNT(*) > 1
+    ),
+    chapter_gaps AS (
+        SELECT v.book, MAX(v.verse) - COUNT(DISTINCT v.verse) AS missing
+        FROM v
+        WHERE v.chapter > 0 AND v.verse > 0
+        GROUP BY v.book, v.chapter
+    )
+    SELECT
+        v.book,
+        COUNT(*),
+        COUNT(DISTINCT v.chapter),
+        COALESCE((SELECT SUM(d.extra) FROM duplicate_refs d WHERE d.book = v.book), 0)::BIGINT,
+        COUNT(*) FILTER (WHERE v.chapter IS NULL OR v.chapter <= 0),
+        COUNT(*) FILTER (WHERE v.verse IS NULL OR v.verse <= 0),
+        COUNT(*) FILTER (WHERE v.text IS NULL OR btrim(v.text) = ''),
+        COUNT(*) FILTER (WHERE v.ordinal IS NULL),
+        COALESCE((SELECT SUM(g.missing) FROM chapter_gaps g WHERE g.book = v.book), 0)::BIGINT,
+        COUNT(*) FILTER (WHERE v.canonical_tier IS NULL),
+        COUNT(*) FILTER (WHERE v.canonical_tier <> cb.canonical_tier)
+    FROM v
+    LEFT JOIN canonical_books cb ON cb.book_code = v.book
+    GROUP BY v.book
+    ORDER BY v.book;
+$$;
+
+CREATE OR REPLACE FUNCTION verse_tier_counts(p_manuscript_id UUID)
+RETURNS TABLE (
+    canonical_tier INTEGER,
+    books BIGINT,
+    verses BIGINT
+)
+LANGUAGE sql STABLE
+AS $$
+    SELECT v.canonical_tier, COUNT(DISTINCT v.book), COUNT(*)
+    FROM verses v
+    WHERE v.manuscript_id = p_manuscript_id
+    GROUP BY v.canonical_tier
+    ORDER BY v.canonical_tier NULLS LAST;
+$$;
+
+COMMENT ON FUNCTION verse_anomalies(UUID) IS
+    'Per-book verse anomaly counts for one manuscript (duplicates, invalid numbers, gaps, tiers) - database/verify_corpus.py';
+COMMENT ON FUNCTION verse_tier_counts(UUID) IS
+    'Books and verses per canonical tier for one manuscript - database/verify_corpus.py';
+
+-- Make the functions visible to PostgREST without a restart
+NOTIFY pgrst, 'reload schema';
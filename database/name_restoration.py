@@ -0,0 +1,430 @@
+#!/usr/bin/env python3
+"""
+Divine Name Restoration Engine - All4Yah Project
+
+Applies every rule in `name_mappings` to a whole manuscript in one streaming
+pass and writes the restored verses to `translations` in bulk.
+
+All mappings are compiled into a single Aho-Corasick automaton over their
+surface forms (original_text plus the inflected forms spelled out by simple
+context_rules patterns such as '/Ἰησοῦ[ςνᾶ]/gu'). Matching runs on a
+consonantal skeleton of the verse - combining marks (niqqud, cantillation,
+Greek accents) removed - so pointed WLC text matches unpointed rules. Verse
+morphology adds a second key: a token whose Strong's number has a mapping is
+restored even when its spelling is not in the automaton, and surface matches
+confirmed by morphology get full confidence.
+
+Per-book occurrence counts are recomputed on every run and written as JSON.
+
+Usage:
+    python3 database/name_restoration.py --manuscript WLC --dry-run
+    python3 database/name_restoration.py --manuscript WEB
+    python3 database/name_restoration.py --manuscript SBLGNT --include-optional
+"""
+
+import os
+import re
+import sys
+import json
+import argparse
+import unicodedata
+from collections import Counter, defaultdict, deque
+
+import requests
+from dotenv import load_dotenv
+
+from batch_writer import BatchWriter, newest_created_at, finish_replacement
+
+load_dotenv()
+
+SUPABASE_URL = os.getenv('SUPABASE_URL') or f"https://{os.getenv('SUPABASE_PROJECT_REF')}.supabase.co"
+SUPABASE_SERVICE_ROLE_KEY = os.getenv('SUPABASE_SERVICE_ROLE_KEY')
+
+headers = {
+    "apikey": SUPABASE_SERVICE_ROLE_KEY,
+    "Authorization": f"Bearer {SUPABASE_SERVICE_ROLE_KEY}",
+    "Content-Type": "application/json",
+    "Prefer": "return=minimal"
+}
+
+PAGE_SIZE = 1000
+BATCH_SIZE = 500
+MAX_EXPANSIONS = 256
+ENGINE_NAME = "name-restoration"
+
+# =============================================================================
+# Surface keys
+# =============================================================================
+
+def skeleton(text, fold):
+    """
+    Strip combining marks (and, when folding, case and final sigma).
+
+    Returns (skeleton, offsets) where offsets[i] is the index in `text` of
+    skeleton character i, plus a sentinel len(text), so skeleton spans map
+    back to the original string including any trailing marks.
+    """
+    chars = []
+    offsets = []
+    for i, ch in enumerate(text):
+        for part in unicodedata.normalize('NFD', ch):
+            if unicodedata.combining(part) or part == '/':
+                continue
+            if fold:
+                lowered = part.lower()
+                part = 'σ' if lowered == 'ς' else lowered if len(lowered) == 1 else part
+            chars.append(part)
+            offsets.append(i)
+    offsets.append(len(text))
+    return ''.join(chars), offsets
+
+PATTERN_TOKEN_RE = re.compile(r'\\b|\[([^\]]+)\](\?)?|\\(.)|([^\\\[\]()|*+{}.^$?])(\?)?')
+
+def expand_pattern(pattern):
+    """
+    Spell out a regex from context_rules as the finite set of strings it matches.
+
+    Only literals, character classes, optional '?' and '\\b' are supported -
+    the shapes the name-mapping importers store. Returns None for anything else.
+    """
+    match = re.match(r'^/(.*)/([a-z]*)$', pattern or '')
+    body = match.group(1) if match else (pattern or '')
+    if not body:
+        return None
+
+    forms = ['']
+    position = 0
+    for token in PATTERN_TOKEN_RE.finditer(body):
+        if token.start() != position:
+            return None
+        position = token.end()
+        char_class, class_optional, escaped, literal, literal_optional = token.groups()
+        if char_class is not None:
+            options = list(char_class) + ([''] if class_optional else [])
+        elif escaped is not None:
+            options = [escaped]
+        elif literal is not None:
+            options = [literal] + ([''] if literal_optional else [])
+        else:
+            continue  # \b - whole_word handles boundaries
+        forms = [f + o for f in forms for o in options]
+        if len(forms) > MAX_EXPANSIONS:
+            return None
+    if position != len(body):
+        return None
+    return {f for f in forms if f}
+
+class Automaton:
+    """Aho-Corasick automaton over skeleton keys; each key carries payloads."""
+
+    def __init__(self):
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [[]]
+
+    def add(self, key, payload):
+        state = 0
+        for ch in key:
+            nxt = self.goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[state][ch] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.out.append([])
+            state = nxt
+        self.out[state].append((len(key), payload))
+
+    def build(self):
+        queue = deque(self.goto[0].values())  # depth-1 states fail to the root
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                f = self.fail[state]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                if state:
+                    self.fail[nxt] = self.goto[f].get(ch, 0)
+                self.out[nxt] = self.out[nxt] + self.out[self.fail[nxt]]
+        return self
+
+    def search(self, text):
+        """Yield (start, end, payload) for every key occurrence in text."""
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(ch, 0)
+            for length, payload in self.out[state]:
+                yield i + 1 - length, i + 1, payload
+
+# =============================================================================
+# Rule compilation
+# =============================================================================
+
+def load_context_rules(mapping):
+    rules = mapping.get('context_rules') or {}
+    if isinstance(rules, str):
+        rules = json.loads(rules)
+    return rules
+
+def applies_to(mapping, manuscript):
+    rules = load_context_rules(mapping)
+    targets = rules.get('apply_to')
+    if targets:
+        return manuscript['code'] in targets
+    return rules.get('language') == manuscript['language']
+
+class RestorationEngine:
+    def __init__(self, mappings, manuscript, include_optional=False):
+        self.mappings = [
+            m for m in mappings
+            if applies_to(m, manuscript) and (include_optional or not load_context_rules(m).get('optional'))
+        ]
+        self.automaton = Automaton()
+        self.by_strong = {}
+        for index, mapping in enumerate(self.mappings):
+            rules = load_context_rules(mapping)
+            case_sensitive = bool(rules.get('case_sensitive', False))
+            forms = {mapping['original_text']}
+            forms |= expand_pattern(rules.get('pattern')) or set()
+            for form in forms:
+                strict, _ = skeleton(form, fold=False)
+                folded, _ = skeleton(form, fold=True)
+                if folded:
+                    self.automaton.add(folded, (index, case_sensitive, strict))
+            if mapping.get('strong_number'):
+                self.by_strong.setdefault(mapping['strong_number'], index)
+        self.automaton.build()
+
+    def whole_word(self, index):
+        return load_context_rules(self.mappings[index]).get('whole_word', True)
+
+    def surface_matches(self, strict, folded):
+        for start, end, (index, case_sensitive, key) in self.automaton.search(folded):
+            if case_sensitive and strict[start:end] != key:
+                continue
+            if self.whole_word(index) and (
+                (start > 0 and folded[start - 1].isalnum()) or (end < len(folded) and folded[end].isalnum())
+            ):
+                continue
+            yield start, end, index
+
+    def strong_matches(self, folded, morphology):
+        """Skeleton spans of morphology tokens whose Strong's number has a mapping."""
+        cursor = 0
+        for raw in morphology or []:
+            surface = raw.get('text') or raw.get('word') or ''
+            token, _ = skeleton(surface.replace('/', ''), fold=True)
+            if not token:
+                continue
+            found = folded.find(token, cursor)
+            if found < 0:
+                continue
+            cursor = found + len(token)
+            for segment, strong in token_strongs(raw):
+                index = self.by_strong.get(strong)
+                if index is None:
+                    continue
+                start, end = segment_span(surface, segment, found, found + len(token))
+                yield start, end, index, strong
+
+    def restore(self, text, morphology=None):
+        """Return (restored_text, restorations) for one verse."""
+        strict, offsets = skeleton(text, fold=False)
+        folded, _ = skeleton(text, fold=True)
+
+        candidates = {}
+        for start, end, index in self.surface_matches(strict, folded):
+            candidates[(start, end)] = [index, None]
+        for start, end, index, strong in self.strong_matches(folded, morphology):
+            overlapping = [span for span in candidates if span[0] < end and start < span[1]]
+            if overlapping:
+                for span in overlapping:
+                    if self.mappings[candidates[span][0]].get('strong_number') == strong:
+                        candidates[span][1] = strong
+            else:
+                candidates[(start, end)] = [index, strong]
+
+        # Leftmost-longest, non-overlapping
+        chosen = []
+        last_end = -1
+        for (start, end), (index, strong) in sorted(candidates.items(), key=lambda c: (c[0][0], -c[0][1])):
+            if start >= last_end:
+                chosen.append((start, end, index, strong))
+                last_end = end
+
+        pieces = []
+        restorations = []
+        position = 0
+        for start, end, index, strong in chosen:
+            mapping = self.mappings[index]
+            begin, finish = offsets[start], offsets[end]
+            pieces.append(text[position:begin])
+            pieces.append(mapping['restored_rendering'])
+            restorations.append({
+                'original': text[begin:finish],
+                'restored': mapping['restored_rendering'],
+                'strong_number': mapping.get('strong_number'),
+                'confirmed_by_morphology': strong is not None,
+            })
+            position = finish
+        pieces.append(text[position:])
+        return ''.join(pieces), restorations
+
+def token_strongs(raw):
+    """(segment index, Strong's number) pairs for one stored morphology entry."""
+    if raw.get('strongs'):
+        return [(None, s) for s in raw['strongs']]
+    pairs = []
+    for i, lemma in enumerate((raw.get('lemma') or '').split('/')):
+        digits = re.match(r'\s*(\d+)', lemma)
+        if digits:
+            pairs.append((i, f"H{int(digits.group(1))}"))
+    return pairs
+
+def segment_span(surface, segment, start, end):
+    """Narrow a token's skeleton span to one '/'-separated OSHB morpheme."""
+    parts = surface.split('/')
+    if segment is None or len(parts) < 2 or segment >= len(parts):
+        return start, end
+    lengths = [len(skeleton(p, fold=True)[0]) for p in parts]
+    begin = start + sum(lengths[:segment])
+    return begin, begin + lengths[segment]
+
+# =============================================================================
+# Supabase I/O
+# =============================================================================
+
+def get_manuscript(code):
+    response = requests.get(
+        f"{SUPABASE_URL}/rest/v1/manuscripts",
+        headers=headers,
+        params={"select": "id,code,language", "code": f"eq.{code}"}
+    )
+    response.raise_for_status()
+    rows = response.json()
+    if not rows:
+        print(f"❌ {code} manuscript not found")
+        sys.exit(1)
+    return rows[0]
+
+def load_name_mappings():
+    response = requests.get(
+        f"{SUPABASE_URL}/rest/v1/name_mappings",
+        headers=headers,
+        params={"select": "original_text,restored_rendering,strong_number,context_rules"}
+    )
+    response.raise_for_status()
+    return response.json()
+
+def stream_verses(manuscript_id):
+    """Yield every verse of a manuscript, paging by id so memory stays flat."""
+    last_id = None
+    while True:
+        params = {
+            "select": "id,book,chapter,verse,text,morphology",
+            "manuscript_id": f"eq.{manuscript_id}",
+            "order": "id.asc",
+            "limit": PAGE_SIZE,
+        }
+        if last_id:
+            params["id"] = f"gt.{last_id}"
+        response = requests.get(f"{SUPABASE_URL}/rest/v1/verses", headers=headers, params=params)
+        response.raise_for_status()
+        page = response.json()
+        yield from page
+        if len(page) < PAGE_SIZE:
+            return
+        last_id = page[-1]['id']
+
+# =============================================================================
+# Main pass
+# =============================================================================
+
+def restore_manuscript(code, include_optional=False, dry_run=False):
+    manuscript = get_manuscript(code)
+    engine = RestorationEngine(load_name_mappings(), manuscript, include_optional)
+    print(f"✅ Compiled {len(engine.mappings)} mappings for {code} "
+          f"({len(engine.automaton.goto)} automaton states, {len(engine.by_strong)} Strong's keys)")
+    if not engine.mappings:
+        return {}, 0, 0
+
+    # The previous run is only deleted once this one is fully written
+    translator = f"{ENGINE_NAME}:{code}"
+    run_filter = {"translator": f"eq.{translator}"}
+    writer = cutoff = None
+    if not dry_run:
+        cutoff = newest_created_at(SUPABASE_URL, headers, "translations", run_filter)
+        writer = BatchWriter(SUPABASE_URL, "translations", headers)
+
+    counts = defaultdict(Counter)
+    scanned = written = 0
+    batch = []
+    for verse in stream_verses(manuscript['id']):
+        scanned += 1
+        morphology = verse.get('morphology')
+        if isinstance(morphology, str):
+            morphology = json.loads(morphology)
+        restored, restorations = engine.restore(verse.get('text') or '', morphology)
+        if not restorations:
+            continue
+
+        for r in restorations:
+            counts[verse['book']][r['strong_number'] or r['restored']] += 1
+        confirmed = all(r['confirmed_by_morphology'] for r in restorations)
+        batch.append({
+            'verse_id': verse['id'],
+            'translation_type': 'ai',
+            'text': restored,
+            'names_restored': True,
+            'translator': translator,
+            'confidence_score': 1.0 if confirmed or not morphology else 0.9,
+            'notes': ', '.join(f"{r['original']} → {r['restored']}" for r in restorations),
+        })
+        if len(batch) >= BATCH_SIZE:
+            written += len(batch) if dry_run else writer.write(batch)
+            batch = []
+        if scanned % 5000 == 0:
+            print(f"\r   Progress: {scanned} verses scanned, {written + len(batch)} restored", end='', flush=True)
+
+    if batch:
+        written += len(batch) if dry_run else writer.write(batch)
+    print(f"\r   Progress: {scanned} verses scanned, {written} restored")
+    if writer:
+        writer.close()
+        if not finish_replacement(SUPABASE_URL, headers, "translations", run_filter, cutoff, writer):
+            print(f"⚠️  {writer.rejected} rows rejected - kept the previous {translator} run and removed this one")
+    return {book: dict(c) for book, c in counts.items()}, scanned, written
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply name_mappings to a whole manuscript")
+    parser.add_argument("--manuscript", required=True, help="Manuscript code (e.g. WLC, WEB, SBLGNT)")
+    parser.add_argument("--include-optional", action="store_true", help="Also apply mappings marked optional (e.g. God → Elohim)")
+    parser.add_argument("--dry-run", action="store_true", help="Compute restorations and counts without writing translations")
+    parser.add_argument("--counts-output", default="name_restoration_counts.json", help="Per-book occurrence counts file")
+    args = parser.parse_args()
+
+    print("🔥 Divine Name Restoration Engine - All4Yah Project")
+    print("=" * 70)
+    print(f"📖 Manuscript: {args.manuscript}{' (dry run)' if args.dry_run else ''}\n")
+
+    counts, scanned, written = restore_manuscript(args.manuscript, args.include_optional, args.dry_run)
+
+    with open(args.counts_output, 'w', encoding='utf-8') as f:
+        json.dump({'manuscript': args.manuscript, 'books': counts}, f, indent=2, ensure_ascii=False)
+
+    print("\n" + "=" * 70)
+    print("📊 RESTORATION SUMMARY")
+    print("=" * 70)
+    print(f"✅ Verses scanned: {scanned}")
+    print(f"✅ Verses restored: {written}")
+    for book, book_counts in counts.items():
+        print(f"   {book}: " + ', '.join(f"{k}×{v}" for k, v in sorted(book_counts.items())))
+    print(f"📁 Per-book counts saved to {args.counts_output}")
+
+if __name__ == "__main__":
+    from profiling import profile_from_argv
+    profile_from_argv()
+    main()
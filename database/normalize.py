@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Hebrew / Greek Text Normalization
+All4Yah Project
+
+Folds pointed Hebrew and polytonic Greek to a bare, comparable form:
+
+- NFD, then drop every combining mark (niqqud, cantillation, accents,
+  breathings, iota subscript)
+- map final forms to their medial letter (ך ם ן ף ץ -> כ מ נ פ צ, ς -> σ)
+- drop Hebrew punctuation (paseq, sof pasuq, geresh) and Greek spacing
+  accents, turn maqaf into a space, and lowercase
+
+The whole pipeline is precomputed per code point into one str.translate()
+table, so folding a string is a single C-level pass with no per-call
+unicodedata work. Already-decomposed input folds the same way because the
+combining marks themselves map to ''.
+
+normalize_many() folds a whole manuscript at once: the verses are joined
+on NUL (which Postgres text cannot contain), translated in one call and
+split back. Its output is what the importers store in
+verses.text_normalized (migration 007).
+
+    from normalize import fold, normalize_many
+    fold('בְּרֵאשִׁ֖ית')   -> 'בראשית'
+    fold('Ἰησοῦς')        -> 'ιησουσ'
+    normalize_many(['וַיֹּ֣אמֶר אֱלֹהִ֑ים', 'ἐν ἀρχῇ'])  -> ['ויאמר אלהימ', 'εν αρχη']
+"""
+
+import unicodedata
+
+FINAL_FORMS = {'ך': 'כ', 'ם': 'מ', 'ן': 'נ', 'ף': 'פ', 'ץ': 'צ', 'ς': 'σ'}
+
+PUNCTUATION = {
+    '־': ' ',   # maqaf joins words
+    '׀': '',    # paseq
+    '׃': '',    # sof pasuq
+    '׆': '',    # nun hafukha
+    '׳': '',    # geresh
+    '״': '',    # gershayim
+}
+
+# Blocks whose characters can change under folding
+FOLD_RANGES = [
+    (0x0041, 0x005A),    # ASCII capitals
+    (0x00C0, 0x024F),    # Latin-1 / Latin Extended (transliterations)
+    (0x0300, 0x036F),    # combining diacritics
+    (0x0370, 0x03FF),    # Greek
+    (0x0590, 0x05FF),    # Hebrew
+    (0x1DC0, 0x1DFF),    # combining diacritics supplement
+    (0x1E00, 0x1EFF),    # Latin Extended Additional
+    (0x1F00, 0x1FFF),    # Greek Extended (polytonic)
+    (0xFB1D, 0xFB4F),    # Hebrew presentation forms
+]
+
+def _fold_char(ch):
+    if ch in PUNCTUATION:
+        return PUNCTUATION[ch]
+    # Presentation forms (wide letters, alef-lamed) only decompose under NFKD
+    form = 'NFKD' if 0xFB1D <= ord(ch) <= 0xFB4F else 'NFD'
+    decomposed = unicodedata.normalize(form, ch)
+    if unicodedata.category(ch) == 'Sk':
+        return ''
+    base = ''.join(c for c in decomposed if not unicodedata.combining(c))
+    return ''.join(FINAL_FORMS.get(c, c) for c in base).lower()
+
+def _build_table():
+    # A dense list indexed by code point translates ~2x faster than a dict;
+    # characters past its end raise IndexError, which translate() treats as
+    # "leave unchanged".
+    table = list(range(FOLD_RANGES[-1][1] + 1))
+    for low, high in FOLD_RANGES:
+        for cp in range(low, high + 1):
+            ch = chr(cp)
+            folded = _fold_char(ch)
+            if folded != ch:
+                table[cp] = folded
+    return table
+
+FOLD_TABLE = _build_table()
+SEPARATOR = '\x00'
+
+def fold(text):
+    """Pointed Hebrew / polytonic Greek / accented Latin -> bare lowercase letters."""
+    return (text or '').translate(FOLD_TABLE)
+
+def normalize_text(text):
+    """Shadow-column form of one verse: folded, whitespace collapsed."""
+    return ' '.join(fold(text).split())
+
+def normalize_many(texts):
+    """normalize_text() over a whole list of verses in one translate() pass."""
+    joined = SEPARATOR.join((t or '').replace(SEPARATOR, '') for t in texts)
+    if not joined:
+        return [''] * len(texts)
+    return [' '.join(part.split()) for part in joined.translate(FOLD_TABLE).split(SEPARATOR)]
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Optional Column Probe
+All4Yah Project
+
+Some columns the importers fill only exist once a later migration has been
+applied:
+
+    verses.ordinal            006_add_verse_ordinal.sql
+    verses.text_normalized    007_add_text_normalized.sql
+    verses.gematria_values    008_add_gematria_values.sql
+    lexicon.gematria          008_add_gematria_values.sql
+
+Writing a column that is not there fails every row (PostgREST PGRST204 /
+PostgreSQL 42703), so the importers probe the target table once and leave
+out the columns it lacks, with one warning naming the migration. The
+matching backfill script fills the column after the migration is applied.
+
+    from optional_columns import missing_columns_rest, drop_columns
+    missing = missing_columns_rest(SUPABASE_URL, headers, 'verses')
+    rows = drop_columns(rows, missing)
+
+    missing = missing_columns_sql(cur, 'verses')     # psycopg2
+
+Usage:
+  python3 database/optional_columns.py               # which migrations are applied
+"""
+
+import sys
+
+OPTIONAL_COLUMNS = {
+    'verses': {
+        'ordinal': '006_add_verse_ordinal.sql',
+        'text_normalized': '007_add_text_normalized.sql',
+        'gematria_values': '008_add_gematria_values.sql',
+    },
+    'lexicon': {
+        'gematria': '008_add_gematria_values.sql',
+    },
+}
+
+_probed = {}
+
+def _warn(table, missing):
+    for column in sorted(missing):
+        print(f"⚠️  {table}.{column} does not exist (apply migrations/{OPTIONAL_COLUMNS[table][column]}); "
+              f"importing without it", file=sys.stderr)
+
+def missing_columns_rest(url, headers, table):
+    """Optional columns of `table` the PostgREST endpoint at `url` lacks (probed once per process)."""
+    import requests
+    key = (url, table)
+    if key not in _probed:
+        missing = set()
+        for column in OPTIONAL_COLUMNS.get(table, {}):
+            response = requests.get(f"{url}/rest/v1/{table}", headers=headers,
+                                    params={"select": column, "limit": 0})
+            if response.status_code == 400:
+                missing.add(column)
+            else:
+                response.raise_for_status()
+        _warn(table, missing)
+        _probed[key] = missing
+    return _probed[key]
+
+def missing_columns_sql(cur, table):
+    """Optional columns of `table` missing from the database behind the psycopg2 cursor."""
+    optional = list(OPTIONAL_COLUMNS.get(table, {}))
+    cur.execute("""
+        SELECT column_name FROM information_schema.columns
+        WHERE table_schema = current_schema() AND table_name = %s AND column_name = ANY(%s)
+    """, (table, optional))
+    missing = set(optional) - {row[0] for row in cur.fetchall()}
+    _warn(table, missing)
+    return missing
+
+def drop_columns(rows, missing):
+    """Rows (dicts) without the `missing` keys; the rows themselves when nothing is missing."""
+    if not missing:
+        return rows
+    return [{k: v for k, v in row.items() if k not in missing} for row in rows]
+
+# =============================================================================
+# CLI Entry Point
+# =============================================================================
+
+def main():
+    from lexicon_cache import rest_config
+    url, headers = rest_config()
+    if not url:
+        print("❌ Set SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY")
+        sys.exit(1)
+    for table, columns in OPTIONAL_COLUMNS.items():
+        missing = missing_columns_rest(url, headers, table)
+        for column, migration in columns.items():
+            print(f"   {'❌' if column in missing else '✅'} {table}.{column:16} {migration}")
+
+if __name__ == "__main__":
+    from profiling import profile_from_argv
+    profile_from_argv()
+    main()
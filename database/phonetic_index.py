@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+Phonetic Lexicon Index
+All4Yah Project
+
+Matches a detected phoneme sequence ("ru-ach", "sha-la-ma") against every
+Strong's transliteration and returns the closest Hebrew/Greek words with a
+similarity score, for linguistic_echoes rows (schema-lsi.sql).
+
+Both sides are reduced to the same phoneme key: ASCII letters only
+(lexicon_cache.translit_key), one symbol per sound for the digraphs
+(sh -> S, ch/kh -> X, ts/tz -> C, th -> t, ph -> f), STEPBible's long-vowel
+spellings folded (iy -> i, uw -> u, ow -> o before a consonant) and Greek
+ou -> u, doubled letters collapsed and a silent final h dropped. So rûwach,
+"ruach" and "ru-ach" all key to "ruaX", shâlôwm and "sha-lom" to "Salom".
+
+The keys are indexed by bigram (lexicon_search.ngrams). A query visits the
+keys of the requested language in order of bigrams shared with it and
+scores them by Levenshtein distance, with the same similarity the
+frontend's PhoneticMatcher uses: 1 - distance / max(len). By the q-gram
+lemma a key sharing s of the query's bigrams is at most
+1/2 + (s + repeats - 1) / (2 * len(query)) similar, so the walk stops once
+that bound falls below the threshold or the limit-th match: the results are
+exact, not a sample. The threshold also bounds the distance, so candidates
+too different in length are skipped and the rest stop computing as soon as
+they exceed it. Sessions are matched in batch, and each distinct phoneme
+key is looked up only once.
+
+Usage:
+  python3 database/phonetic_index.py "ru-ach"
+  python3 database/phonetic_index.py "sha-la-ma" --language hebrew --limit 5
+  python3 database/phonetic_index.py --session <uuid>            # print matches
+  python3 database/phonetic_index.py --session <uuid> --write    # replace its linguistic_echoes
+  python3 database/phonetic_index.py --benchmark
+"""
+
+import re
+import sys
+import time
+import argparse
+from collections import Counter, defaultdict
+
+from lexicon_cache import open_cache, translit_key, rest_config
+from lexicon_search import ngrams
+from gematria import value as gematria_value
+
+BIGRAM = 2
+DEFAULT_LIMIT = 3
+DEFAULT_THRESHOLD = 0.6
+DETECTED_BY = 'phonetic-index-v1'
+PAGE_SIZE = 1000
+BATCH_SIZE = 500
+
+PHONEME_MAP = {
+    'sh': 'S', 'ch': 'X', 'kh': 'X', 'ts': 'C', 'tz': 'C', 'th': 't', 'ph': 'f',
+    'iy': 'i', 'uw': 'u', 'ou': 'u',
+    'q': 'k', 'c': 'k', 'w': 'v', 'j': 'y', 'x': 'ks',
+}
+PHONEME_RE = re.compile('|'.join(sorted(PHONEME_MAP, key=len, reverse=True)))
+HOLEM_VAV_RE = re.compile(r'ow(?![aeiou])')
+DOUBLED_RE = re.compile(r'(.)\1+')
+FINAL_H_RE = re.compile(r'(?<=[aeiou])h$')
+
+def phoneme_key(text):
+    """"rûwach" / "ru-ach" -> "ruaX" (see module docstring)."""
+    key = HOLEM_VAV_RE.sub('o', translit_key(text))
+    key = PHONEME_RE.sub(lambda m: PHONEME_MAP[m.group()], key)
+    return FINAL_H_RE.sub('', DOUBLED_RE.sub(r'\1', key))
+
+def levenshtein(a, b, max_distance=None):
+    """Edit distance; stops early with max_distance + 1 once it must exceed max_distance."""
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if max_distance is not None and min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+    return previous[-1]
+
+def similarity(a, b):
+    """1 - distance / max(len) - the frontend PhoneticMatcher's score."""
+    if a == b:
+        return 1.0
+    longest = max(len(a), len(b))
+    return 1 - levenshtein(a, b) / longest if longest else 0.0
+
+# =============================================================================
+# Index
+# =============================================================================
+
+class PhoneticIndex:
+    def __init__(self, entries):
+        self.entries = []
+        key_ids = {}
+        self.keys = []
+        self.key_entries = []
+        self.key_languages = []
+        self.postings = defaultdict(list)
+        for entry in entries:
+            key = phoneme_key(entry['transliteration'])
+            if not key:
+                continue
+            entry_id = len(self.entries)
+            self.entries.append({k: entry[k] for k in (
+                'strong_number', 'language', 'original_word', 'transliteration', 'short_definition')})
+            if key not in key_ids:
+                key_ids[key] = len(self.keys)
+                self.keys.append(key)
+                self.key_entries.append([])
+                self.key_languages.append(Counter())
+                for gram in ngrams(key, BIGRAM):
+                    self.postings[gram].append(key_ids[key])
+            self.key_entries[key_ids[key]].append(entry_id)
+            self.key_languages[key_ids[key]][entry['language']] += 1
+        self.key_ids = key_ids
+        self._memo = {}
+
+    @classmethod
+    def from_cache(cls, cache=None):
+        return cls((cache or open_cache()).entries())
+
+    def _entry_count(self, key_id, language):
+        return len(self.key_entries[key_id]) if not language else self.key_languages[key_id][language]
+
+    def _candidates(self, key, threshold, limit, language=None):
+        """
+        (similarity, key_id) above threshold, best first, covering the top
+        `limit` entries of `language` exactly (see module docstring).
+        """
+        memo_key = (key, threshold, limit, language)
+        cached = self._memo.get(memo_key)
+        if cached is not None:
+            return cached
+        grams = ngrams(key, BIGRAM)
+        repeats = len(key) + 1 - len(grams)
+        shared = Counter()
+        for gram in grams:
+            shared.update(self.postings.get(gram, ()))
+        by_shared = defaultdict(list)
+        for key_id, count in shared.items():
+            if self._entry_count(key_id, language):
+                by_shared[count].append(key_id)
+        if 0.5 + (repeats - 1) / (2 * len(key)) >= threshold:
+            # Keys sharing no bigram could still pass a threshold this low
+            by_shared[0] = [key_id for key_id in range(len(self.keys))
+                            if key_id not in shared and self._entry_count(key_id, language)]
+
+        scored = []
+        floor = threshold
+        for count in sorted(by_shared, reverse=True):
+            if 0.5 + (count + repeats - 1) / (2 * len(key)) < floor:
+                break
+            for key_id in by_shared[count]:
+                other = self.keys[key_id]
+                longest = max(len(key), len(other))
+                # similarity >= threshold  <=>  distance <= (1 - threshold) * longest
+                max_distance = int((1 - threshold) * longest + 1e-9)
+                if abs(len(key) - len(other)) > max_distance:
+                    continue
+                distance = levenshtein(key, other, max_distance)
+                if distance <= max_distance:
+                    scored.append((1 - distance / longest, key_id))
+            scored.sort(reverse=True)
+            # Once `limit` entries score at least s, no key bounded below s can enter the top
+            entries = 0
+            for score, key_id in scored:
+                entries += self._entry_count(key_id, language)
+                if entries >= limit:
+                    floor = max(floor, score)
+                    break
+        self._memo[memo_key] = scored
+        return scored
+
+    def match(self, phonemes, limit=DEFAULT_LIMIT, threshold=DEFAULT_THRESHOLD, language=None):
+        """Top `limit` lexicon entries whose transliteration sounds like `phonemes`."""
+        key = phoneme_key(phonemes)
+        if not key:
+            return []
+        results = []
+        for score, key_id in self._candidates(key, threshold, limit, language):
+            for entry_id in self.key_entries[key_id]:
+                entry = self.entries[entry_id]
+                if language and entry['language'] != language:
+                    continue
+                results.append({**entry, 'phonetic_key': self.keys[key_id], 'similarity': round(score, 4)})
+                if len(results) >= limit:
+                    return results
+        return results
+
+    def match_patterns(self, patterns, limit=DEFAULT_LIMIT, threshold=DEFAULT_THRESHOLD, language=None):
+        """linguistic_echoes rows for prayer_patterns dicts (id, session_id, phoneme_sequence)."""
+        rows = []
+        for pattern in patterns:
+            sequence = pattern.get('phoneme_sequence')
+            if not sequence:
+                continue
+            for m in self.match(sequence, limit, threshold, language):
+                rows.append({
+                    'pattern_id': pattern['id'],
+                    'session_id': pattern['session_id'],
+                    'source_language': m['language'],
+                    'phonetic_match': sequence,
+                    'strongs_number': m['strong_number'],
+                    'hebrew_word': m['original_word'] if m['language'] == 'hebrew' else None,
+                    'greek_word': m['original_word'] if m['language'] == 'greek' else None,
+                    'transliteration': m['transliteration'],
+                    'primary_meaning': m['short_definition'],
+                    'phonetic_similarity_score': m['similarity'],
+                    'hebrew_gematria': gematria_value(m['original_word']) if m['language'] == 'hebrew' else None,
+                    'greek_isopsephy': gematria_value(m['original_word']) if m['language'] == 'greek' else None,
+                    'detected_by': DETECTED_BY,
+                })
+        return rows
+
+# =============================================================================
+# Sessions
+# =============================================================================
+
+def fetch_patterns(url, headers, session_id):
+    import requests
+    patterns = []
+    offset = 0
+    while True:
+        response = requests.get(
+            f"{url}/rest/v1/prayer_patterns",
+            headers=headers,
+            params={"session_id": f"eq.{session_id}", "select": "id,session_id,phoneme_sequence",
+                    "order": "timestamp_offset_ms.asc", "offset": offset, "limit": PAGE_SIZE},
+        )
+        response.raise_for_status()
+        page = response.json()
+        patterns.extend(page)
+        if len(page) < PAGE_SIZE:
+            return patterns
+        offset += PAGE_SIZE
+
+def write_echoes(url, headers, session_id, rows):
+    """
+    Replace this index's previous echoes for the session with `rows`. The
+    old echoes are deleted only after every new row is written.
+    """
+    from batch_writer import BatchWriter, newest_created_at, finish_replacement
+    run_filter = {"session_id": f"eq.{session_id}", "detected_by": f"eq.{DETECTED_BY}"}
+    cutoff = newest_created_at(url, headers, "linguistic_echoes", run_filter)
+    writer = BatchWriter(url, "linguistic_echoes", {**headers, "Content-Type": "application/json"})
+    for i in range(0, len(rows), BATCH_SIZE):
+        writer.write(rows[i:i + BATCH_SIZE])
+    writer.close()
+    if not finish_replacement(url, headers, "linguistic_echoes", run_filter, cutoff, writer):
+        print(f"⚠️  {writer.rejected} echoes rejected - kept the session's previous echoes", file=sys.stderr)
+        return 0
+    return writer.written
+
+# =============================================================================
+# CLI Entry Point
+# =============================================================================
+
+def print_match(m):
+    print(f"   {m['similarity']:.4f}  {m['strong_number']}: {m['original_word']} "
+          f"({m['transliteration']}) - {m['short_definition']}")
+
+def benchmark(index, rounds=2000):
+    sample = [e['transliteration'] for e in index.entries[::max(1, len(index.entries) // rounds)]]
+    start = time.perf_counter()
+    for phonemes in sample:
+        index.match(phonemes)
+    elapsed = time.perf_counter() - start
+    print(f"  {len(sample)} distinct queries | {elapsed / len(sample) * 1000:.3f} ms/query | "
+          f"{len(index.keys)} phoneme keys, {len(index.postings)} bigrams")
+
+def main():
+    parser = argparse.ArgumentParser(description="Phonetic match index over the Strong's lexicon")
+    parser.add_argument("phonemes", nargs="?", help="Phoneme sequence, e.g. ru-ach")
+    parser.add_argument("--limit", type=int, default=DEFAULT_LIMIT, help="Matches per sequence")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Minimum similarity (0-1)")
+    parser.add_argument("--language", choices=['hebrew', 'greek'], help="Only match this language")
+    parser.add_argument("--session", help="Match every prayer_pattern of a prayer session")
+    parser.add_argument("--write", action="store_true", help="With --session: replace its linguistic_echoes")
+    parser.add_argument("--benchmark", action="store_true", help="Time matches over a sample of transliterations")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    index = PhoneticIndex.from_cache()
+    print(f"✅ Indexed {len(index.entries)} transliterations in {(time.perf_counter() - start) * 1000:.0f} ms\n")
+
+    if args.benchmark:
+        benchmark(index)
+    elif args.session:
+        url, headers = rest_config()
+        if not url:
+            print("❌ SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY must be set")
+            sys.exit(1)
+        patterns = fetch_patterns(url, headers, args.session)
+        start = time.perf_counter()
+        rows = index.match_patterns(patterns, args.limit, args.threshold, args.language)
+        print(f"🔍 {len(patterns)} patterns -> {len(rows)} echoes in {(time.perf_counter() - start) * 1000:.0f} ms")
+        if args.write:
+            written = write_echoes(url, headers, args.session, rows)
+            print(f"✅ Wrote {written} linguistic_echoes rows")
+        else:
+            for strong, count in Counter(r['strongs_number'] for r in rows).most_common(10):
+                print(f"   {strong}: {count}")
+    elif args.phonemes:
+        for m in index.match(args.phonemes, args.limit, args.threshold, args.language):
+            print_match(m)
+    else:
+        parser.error("phonemes, --session or --benchmark is required")
+
+if __name__ == "__main__":
+    from profiling import profile_from_argv
+    profile_from_argv()
+    main()
@@ -0,0 +1,389 @@
+#!/usr/bin/env python3
+"""
+Profiling Mode
+All4Yah Project
+
+Shared --profile option for the database/ and scripts/agents/ entry points,
+so memory spikes (LXX's verses_by_book, the whole-file sql_content read in
+the OSHB importer, ...) and slow calls can be found without wrapping scripts
+by hand. A profiled run records:
+
+- cProfile call stats (the functions with the largest cumulative and own time)
+- a per-stage timeline: wall time, RSS at the start and end of each stage,
+  the peak RSS seen during it (sampled every ALL4YAH_PROFILE_INTERVAL
+  seconds, default 0.05) and the peak traced Python allocation
+- tracemalloc top allocators at stage boundaries: for each stage, the
+  allocation sites holding the most memory when its largest call ended
+
+and writes them as one JSON report with sorted keys and repo-relative paths,
+so two runs can be compared with any diff tool or with the `diff` command.
+
+Stages are the ImportMetrics stages (import_metrics.py) of the importers,
+plus any block wrapped in profiling.stage(). Entry points call
+profile_from_argv() first thing in their __main__ block:
+
+    if __name__ == "__main__":
+        from profiling import profile_from_argv
+        profile_from_argv()
+        main()
+
+cProfile only sees the main thread; work done in worker threads or
+processes shows up in the stage timeline and RSS, not in the call stats.
+tracemalloc slows a run down two to three times, so compare profiled runs
+with profiled runs. Its snapshots are taken between stages and their own
+memory can show up in the RSS of later stages; traced peaks are unaffected.
+
+Usage:
+  python3 database/import-lxx.py --tier 1 --profile                # profiles/import-lxx-<timestamp>.json
+  python3 database/gematria.py λόγος --profile=/tmp/gematria.json
+  ALL4YAH_PROFILE=1 python3 scripts/agents/variance_spotter.py ...
+  python3 database/profiling.py run database/import-oshb-rest-api.py database/oshb-genesis.sql
+  python3 database/profiling.py diff profiles/a.json profiles/b.json
+"""
+
+import os
+import sys
+import json
+import time
+import atexit
+import pstats
+import cProfile
+import argparse
+import threading
+import tracemalloc
+from datetime import datetime
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:         # Windows
+    resource = None
+
+PROFILING_FILE = os.path.abspath(__file__)
+BASE_DIR = os.path.dirname(os.path.dirname(PROFILING_FILE))
+STDLIB_DIR = os.path.dirname(os.__file__)
+PROFILES_DIR = "profiles"
+SAMPLE_INTERVAL = float(os.getenv('ALL4YAH_PROFILE_INTERVAL', '0.05'))
+TOP_FUNCTIONS = 40
+TOP_ALLOCATORS = 10
+TIMELINE_LIMIT = 500
+
+_active = None
+
+# =============================================================================
+# Memory readings
+# =============================================================================
+
+def current_rss():
+    """Resident set size in bytes, or None where /proc is unavailable."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+def max_rss():
+    """Process high-water RSS in bytes (ru_maxrss is KiB on Linux, bytes on macOS)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+def relative_path(path):
+    """Repo-relative path, or the part after site-packages, so reports from different checkouts diff cleanly."""
+    if path.startswith(BASE_DIR + os.sep):
+        return os.path.relpath(path, BASE_DIR)
+    marker = 'site-packages' + os.sep
+    if marker in path:
+        return path.split(marker, 1)[1]
+    if path.startswith(STDLIB_DIR + os.sep):
+        return '<stdlib>/' + os.path.relpath(path, STDLIB_DIR)
+    return path
+
+# =============================================================================
+# Profiler
+# =============================================================================
+
+class StageRecord:
+    """One open stage: its start readings and the peaks seen while it runs."""
+
+    def __init__(self, name):
+        self.name = name
+        self.start = time.perf_counter()
+        self.rss_start = current_rss()
+        self.rss_peak = self.rss_start or 0
+        self.traced_peak = 0
+
+class Profiler:
+    def __init__(self, script, report_path=None, argv=None):
+        self.script = script
+        self.argv = list(argv if argv is not None else sys.argv[1:])
+        self.started_at = datetime.now()
+        self.report_path = report_path or os.path.join(
+            PROFILES_DIR, f"{script}-{self.started_at.strftime('%Y%m%d-%H%M%S')}.json")
+        self.lock = threading.Lock()
+        self.open_stages = []
+        self.stages = {}
+        self.timeline = []
+        self.timeline_dropped = 0
+        self.allocators = {}
+        self.rss_peak = 0
+        self.profiler = cProfile.Profile()
+        self.stopping = threading.Event()
+        self.sampler = threading.Thread(target=self._sample, name='profiling-rss', daemon=True)
+
+    def start(self):
+        self.started = time.perf_counter()
+        self.rss_start = current_rss()
+        tracemalloc.start()
+        self.sampler.start()
+        self.profiler.enable()
+
+    def _sample(self):
+        while not self.stopping.wait(SAMPLE_INTERVAL):
+            self._note_rss(current_rss())
+
+    def _note_rss(self, rss):
+        if rss is None:
+            return
+        with self.lock:
+            self.rss_peak = max(self.rss_peak, rss)
+            for record in self.open_stages:
+                record.rss_peak = max(record.rss_peak, rss)
+
+    def _note_traced_peak(self):
+        """Fold tracemalloc's peak into every open stage, then reset it for the next interval."""
+        peak = tracemalloc.get_traced_memory()[1]
+        for record in self.open_stages:
+            record.traced_peak = max(record.traced_peak, peak)
+        tracemalloc.reset_peak()
+
+    @contextmanager
+    def stage(self, name):
+        # Worker threads run inside a main-thread stage; only the main thread draws boundaries
+        if threading.current_thread() is not threading.main_thread():
+            yield
+            return
+        self._note_rss(current_rss())
+        with self.lock:
+            self._note_traced_peak()
+            record = StageRecord(name)
+            self.open_stages.append(record)
+        try:
+            yield
+        finally:
+            rss_end = current_rss()
+            self._note_rss(rss_end)
+            with self.lock:
+                self._note_traced_peak()
+                self.open_stages.remove(record)
+            self._close(record, rss_end)
+
+    def _close(self, record, rss_end):
+        end = time.perf_counter()
+        seconds = end - record.start
+        totals = self.stages.setdefault(record.name, {
+            'calls': 0, 'seconds': 0.0, 'rss_peak': 0, 'traced_peak': 0, 'rss_growth': 0})
+        totals['calls'] += 1
+        totals['seconds'] += seconds
+        if record.rss_start is not None and rss_end is not None:
+            totals['rss_growth'] += rss_end - record.rss_start
+        totals['rss_peak'] = max(totals['rss_peak'], record.rss_peak)
+        if record.traced_peak > totals['traced_peak'] or totals['calls'] == 1:
+            totals['traced_peak'] = max(totals['traced_peak'], record.traced_peak)
+            self.allocators[record.name] = top_allocators(tracemalloc.take_snapshot())
+
+        # Consecutive calls of one stage (per-batch send, ...) share a timeline entry
+        last = self.timeline[-1] if self.timeline else None
+        if last and last['stage'] == record.name:
+            last['calls'] += 1
+            last['end'] = round(end - self.started, 3)
+            last['rss_end'] = rss_end
+            last['rss_peak'] = max(last['rss_peak'], record.rss_peak)
+            last['traced_peak'] = max(last['traced_peak'], record.traced_peak)
+        elif len(self.timeline) < TIMELINE_LIMIT:
+            self.timeline.append({
+                'stage': record.name,
+                'calls': 1,
+                'start': round(record.start - self.started, 3),
+                'end': round(end - self.started, 3),
+                'rss_start': record.rss_start,
+                'rss_end': rss_end,
+                'rss_peak': record.rss_peak,
+                'traced_peak': record.traced_peak,
+            })
+        else:
+            self.timeline_dropped += 1
+
+    def stop(self):
+        self.profiler.disable()
+        self.stopping.set()
+        self.sampler.join()
+        rss_end = current_rss()
+        self._note_rss(rss_end)
+        final_allocators = top_allocators(tracemalloc.take_snapshot())
+        traced_current, traced_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return {
+            'script': self.script,
+            'argv': self.argv,
+            'started_at': self.started_at.isoformat(timespec='seconds'),
+            'wall_seconds': round(time.perf_counter() - self.started, 3),
+            'memory': {
+                'rss_start': self.rss_start,
+                'rss_end': rss_end,
+                'rss_peak': max(self.rss_peak, max_rss() or 0),
+                'traced_end': traced_current,
+                'traced_peak_since_last_stage': traced_peak,
+            },
+            'stages': {name: dict(s, seconds=round(s['seconds'], 6)) for name, s in self.stages.items()},
+            'timeline': self.timeline,
+            'timeline_dropped': self.timeline_dropped,
+            'allocators': dict(self.allocators, _exit=final_allocators),
+            'functions': top_functions(self.profiler),
+        }
+
+    def write_report(self):
+        report = self.stop()
+        os.makedirs(os.path.dirname(self.report_path) or '.', exist_ok=True)
+        with open(self.report_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, sort_keys=True, ensure_ascii=False)
+            f.write('\n')
+        print(f"\n🔬 Profile: {self.report_path}", file=sys.stderr)
+        return self.report_path
+
+def top_allocators(snapshot, limit=TOP_ALLOCATORS):
+    own_files = (tracemalloc.__file__, PROFILING_FILE)
+    stats = [stat for stat in snapshot.statistics('lineno') if stat.traceback[0].filename not in own_files]
+    return [{
+        'site': f"{relative_path(stat.traceback[0].filename)}:{stat.traceback[0].lineno}",
+        'size': stat.size,
+        'count': stat.count,
+    } for stat in stats[:limit]]
+
+def top_functions(profiler, limit=TOP_FUNCTIONS):
+    """Union of the top functions by cumulative and by own time, keyed 'file:line(name)'."""
+    stats = pstats.Stats(profiler).stats
+    rows = {}
+    for (filename, lineno, name), (primitive, calls, own, cumulative, _) in stats.items():
+        key = f"{relative_path(filename)}:{lineno}({name})" if filename != '~' else name
+        rows[key] = {'calls': calls, 'primitive_calls': primitive,
+                     'tottime': round(own, 6), 'cumtime': round(cumulative, 6)}
+    by_cumulative = sorted(rows, key=lambda k: -rows[k]['cumtime'])[:limit]
+    by_own = sorted(rows, key=lambda k: -rows[k]['tottime'])[:limit]
+    return {key: rows[key] for key in sorted(set(by_cumulative) | set(by_own))}
+
+# =============================================================================
+# Entry points
+# =============================================================================
+
+def active():
+    return _active
+
+@contextmanager
+def stage(name):
+    """Mark a stage boundary; does nothing unless profiling is on."""
+    if _active is None:
+        yield
+    else:
+        with _active.stage(name):
+            yield
+
+def start(script, report_path=None, argv=None):
+    """Start profiling this process and write the report at exit. Returns the Profiler."""
+    global _active
+    if _active is None:
+        _active = Profiler(script, report_path, argv)
+        _active.start()
+        atexit.register(_active.write_report)
+    return _active
+
+def profile_from_argv(argv=None):
+    """
+    Strip --profile / --profile=PATH from sys.argv (so the script's own
+    argument parsing never sees it) and start profiling if it was given or
+    ALL4YAH_PROFILE is set ('1', or a report path).
+    """
+    argv = sys.argv if argv is None else argv
+    report_path = None
+    enabled = False
+    for arg in list(argv[1:]):
+        if arg == '--profile' or arg.startswith('--profile='):
+            argv.remove(arg)
+            enabled = True
+            report_path = arg.partition('=')[2] or report_path
+    env = os.getenv('ALL4YAH_PROFILE')
+    if env and env not in ('0', 'false'):
+        enabled = True
+        report_path = report_path or (env if env not in ('1', 'true') else None)
+    if not enabled:
+        return None
+    script = os.path.splitext(os.path.basename(argv[0]))[0] or 'python'
+    return start(script, report_path, argv[1:])
+
+# =============================================================================
+# CLI
+# =============================================================================
+
+def diff_reports(a, b):
+    """Print stage, memory and function changes from report a to report b."""
+    def size(n):
+        return f"{(n or 0) / 2**20:8.1f} MB"
+
+    def change(old, new):
+        if not old:
+            return '     new' if new else ''
+        return f"{(new - old) / old:+8.0%}"
+
+    print(f"{a['script']} {a['started_at']}  ->  {b['script']} {b['started_at']}")
+    print(f"  wall          {a['wall_seconds']:8.2f} s -> {b['wall_seconds']:8.2f} s {change(a['wall_seconds'], b['wall_seconds'])}")
+    print(f"  peak RSS      {size(a['memory']['rss_peak'])} -> {size(b['memory']['rss_peak'])} "
+          f"{change(a['memory']['rss_peak'], b['memory']['rss_peak'])}")
+
+    print("\nStages (seconds | peak RSS | peak traced)")
+    for name in sorted(set(a['stages']) | set(b['stages'])):
+        old, new = a['stages'].get(name, {}), b['stages'].get(name, {})
+        print(f"  {name:12} {old.get('seconds', 0):8.2f} -> {new.get('seconds', 0):8.2f} s "
+              f"{change(old.get('seconds'), new.get('seconds', 0))} | "
+              f"{size(old.get('rss_peak'))} -> {size(new.get('rss_peak'))} | "
+              f"{size(old.get('traced_peak'))} -> {size(new.get('traced_peak'))}")
+
+    print("\nFunctions (cumulative seconds, largest changes)")
+    keys = set(a['functions']) | set(b['functions'])
+    deltas = sorted(keys, key=lambda k: -abs(b['functions'].get(k, {}).get('cumtime', 0)
+                                             - a['functions'].get(k, {}).get('cumtime', 0)))
+    for key in deltas[:20]:
+        old = a['functions'].get(key, {}).get('cumtime', 0)
+        new = b['functions'].get(key, {}).get('cumtime', 0)
+        print(f"  {old:8.3f} -> {new:8.3f} s {change(old, new)}  {key}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile a database/agent script, or compare two profile reports")
+    sub = parser.add_subparsers(dest='command', required=True)
+    run = sub.add_parser('run', help="Run a script under the profiler")
+    run.add_argument('--output', help="Report path (default: profiles/<script>-<timestamp>.json)")
+    run.add_argument('script')
+    run.add_argument('args', nargs=argparse.REMAINDER)
+    diff = sub.add_parser('diff', help="Compare two reports")
+    diff.add_argument('before')
+    diff.add_argument('after')
+    args = parser.parse_args()
+
+    if args.command == 'diff':
+        with open(args.before, encoding='utf-8') as f:
+            before = json.load(f)
+        with open(args.after, encoding='utf-8') as f:
+            after = json.load(f)
+        diff_reports(before, after)
+        return
+
+    # Start the profiler in the importable module, the one the script's stages see
+    import runpy
+    import profiling
+    sys.argv = [args.script] + args.args
+    sys.path[0] = os.path.dirname(os.path.abspath(args.script))
+    profiling.start(os.path.splitext(os.path.basename(args.script))[0], args.output, args.args)
+    runpy.run_path(args.script, run_name='__main__')
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+BatchWriter bisection tests
+All4Yah Project
+
+Usage:
+  python3 -m unittest database/test_batch_writer.py
+"""
+
+import os
+import sys
+import json
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import requests
+
+from batch_writer import BatchWriter, BatchWriteError
+
+INVALID_INTEGER = json.dumps({
+    "code": "22P02", "details": None, "hint": None,
+    "message": 'invalid input syntax for type integer: ""',
+})
+
+class Response:
+    def __init__(self, status_code, text=''):
+        self.status_code = status_code
+        self.text = text
+        self.headers = {}
+
+class StubSession(requests.Session):
+    """Answers 400 / 22P02 for any batch containing v == "", like PostgREST would."""
+
+    def __init__(self, status=400, error=INVALID_INTEGER):
+        super().__init__()
+        self.status = status
+        self.error = error
+        self.stored = []
+
+    def post(self, url, params=None, data=None):
+        records = json.loads(data)
+        if any(record['v'] == "" for record in records):
+            return Response(self.status, self.error)
+        self.stored.extend(records)
+        return Response(201)
+
+class BisectTest(unittest.TestCase):
+    def writer(self, session):
+        rejects = tempfile.NamedTemporaryFile(suffix='.jsonl', delete=False)
+        rejects.close()
+        self.addCleanup(os.remove, rejects.name)
+        writer = BatchWriter("http://stub", "verses", {}, rejects_path=rejects.name)
+        writer.session = session
+        return writer
+
+    def test_identical_bad_values_in_both_halves_reject_only_those_rows(self):
+        session = StubSession()
+        writer = self.writer(session)
+        records = [{'id': i, 'v': "" if i in (10, 90) else i} for i in range(100)]
+        self.assertEqual(writer.write(records), 98)
+        writer.close()
+        self.assertEqual((writer.written, writer.rejected), (98, 2))
+        self.assertEqual(sorted(r['id'] for r in session.stored), [i for i in range(100) if i not in (10, 90)])
+        with open(writer.rejects_path, encoding='utf-8') as f:
+            self.assertEqual([json.loads(line)['record']['id'] for line in f], [10, 90])
+
+    def test_non_row_error_raises_without_bisecting(self):
+        session = StubSession(status=401, error='{"code": "PGRST301", "message": "JWT expired"}')
+        writer = self.writer(session)
+        with self.assertRaises(BatchWriteError):
+            writer.write([{'id': 1, 'v': ""}, {'id': 2, 'v': 2}])
+        self.assertEqual((writer.requests, writer.rejected), (1, 0))
+
+if __name__ == "__main__":
+    unittest.main()
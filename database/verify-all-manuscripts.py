@@ -6,9 +6,13 @@ Verify all manuscripts and get verse counts via REST API
 import requests
 import os
 
-SUPABASE_URL = "https://txeeaekwhkdilycefczq.supabase.co"
+from profiling import profile_from_argv
+
+SUPABASE_URL = os.getenv("SUPABASE_URL", "https://txeeaekwhkdilycefczq.supabase.co")
 API_KEY = "sb_secret_ga_5t6BceIDCZzm5rJ8FlA_y1wxONOO"
 
+profile_from_argv()
+
 headers = {
     "apikey": API_KEY,
     "Authorization": f"Bearer {API_KEY}"
@@ -1,13 +1,22 @@
 #!/usr/bin/env python3
 """
 Verify DSS Database Quality via REST API
+
+The checks run in the database (verse_anomalies, migration 009); only the
+per-book counts are transferred. verify_corpus.py checks every manuscript.
 """
 
-import requests
+import os
+
+from manuscript_ids import open_resolver
+from profiling import profile_from_argv
+from verify_corpus import rpc
 
-SUPABASE_URL = "https://txeeaekwhkdilycefczq.supabase.co"
+SUPABASE_URL = os.getenv("SUPABASE_URL", "https://txeeaekwhkdilycefczq.supabase.co")
 API_KEY = "sb_secret_ga_5t6BceIDCZzm5rJ8FlA_y1wxONOO"
 
+profile_from_argv()
+
 headers = {
     "apikey": API_KEY,
     "Authorization": f"Bearer {API_KEY}"
@@ -19,72 +28,29 @@ print("═" * 70)
 print()
 
 # Get DSS manuscript ID
-manuscripts_response = requests.get(
-    f"{SUPABASE_URL}/rest/v1/manuscripts",
-    headers=headers,
-    params={"select": "id,code", "code": "eq.DSS"}
-)
-
-manuscripts = manuscripts_response.json()
-if not manuscripts:
+manuscript_id = open_resolver(SUPABASE_URL, headers).get('DSS')
+if not manuscript_id:
     print("❌ DSS manuscript not found")
     exit(1)
 
-manuscript_id = manuscripts[0]['id']
 print(f"✅ Found DSS manuscript: {manuscript_id}\n")
 
-# Get all DSS verses
-print("📊 Fetching DSS verses from database...")
-
-all_verses = []
-offset = 0
-limit = 1000
-
-while True:
-    verses_response = requests.get(
-        f"{SUPABASE_URL}/rest/v1/verses",
-        headers=headers,
-        params={
-            "select": "book,chapter,verse",
-            "manuscript_id": f"eq.{manuscript_id}",
-            "offset": offset,
-            "limit": limit
-        }
-    )
-    
-    verses = verses_response.json()
-    if not verses:
-        break
-        
-    all_verses.extend(verses)
-    offset += limit
-    print(f"\r   Fetched {len(all_verses)} verses...", end="", flush=True)
-
-print(f"\n   ✅ Total verses: {len(all_verses)}\n")
-
-# Check for duplicates
-print("🔍 Checking for duplicates...")
-seen = set()
-duplicates = []
-
-for verse in all_verses:
-    key = f"{verse['book']}|{verse['chapter']}|{verse['verse']}"
-    if key in seen:
-        duplicates.append(verse)
-    else:
-        seen.add(key)
-
-print(f"   Found {len(duplicates)} duplicates")
-
-# Check invalid verse numbers
-print("\n🔍 Checking for invalid verse numbers (≤ 0)...")
-invalid_verses = [v for v in all_verses if v['verse'] <= 0]
-print(f"   Found {len(invalid_verses)} invalid verse numbers")
-
-# Check invalid chapter numbers
-print("\n🔍 Checking for invalid chapter numbers (≤ 0)...")
-invalid_chapters = [v for v in all_verses if v['chapter'] <= 0]
-print(f"   Found {len(invalid_chapters)} invalid chapter numbers")
+# Aggregate on the server (migration 009) instead of paging every verse here
+print("📊 Checking DSS verses in the database...")
+books, _ = rpc(SUPABASE_URL, headers, 'verse_anomalies', p_manuscript_id=manuscript_id)
+total_verses = sum(book['verses'] for book in books)
+print(f"   ✅ Total verses: {total_verses}\n")
+
+duplicates = sum(book['duplicates'] for book in books)
+invalid_verses = sum(book['invalid_verses'] for book in books)
+invalid_chapters = sum(book['invalid_chapters'] for book in books)
+print(f"🔍 Duplicates: {duplicates}")
+print(f"🔍 Invalid verse numbers (≤ 0): {invalid_verses}")
+print(f"🔍 Invalid chapter numbers (≤ 0): {invalid_chapters}")
+for book in books:
+    if book['duplicates'] or book['invalid_verses'] or book['invalid_chapters']:
+        print(f"   {book['book']}: {book['duplicates']} duplicates, "
+              f"{book['invalid_verses']} invalid verses, {book['invalid_chapters']} invalid chapters")
 
 # Summary
 print("\n" + "═" * 70)
@@ -92,12 +58,12 @@ print("SUMMARY")
 print("═" * 70)
 print()
 print(f"📊 Database Quality:")
-print(f"   - Total verses: {len(all_verses)}")
-print(f"   - Duplicates: {len(duplicates)} {'✅' if len(duplicates) == 0 else '❌'}")
-print(f"   - Invalid verses: {len(invalid_verses)} {'✅' if len(invalid_verses) == 0 else '❌'}")
-print(f"   - Invalid chapters: {len(invalid_chapters)} {'✅' if len(invalid_chapters) == 0 else '❌'}")
+print(f"   - Total verses: {total_verses}")
+print(f"   - Duplicates: {duplicates} {'✅' if duplicates == 0 else '❌'}")
+print(f"   - Invalid verses: {invalid_verses} {'✅' if invalid_verses == 0 else '❌'}")
+print(f"   - Invalid chapters: {invalid_chapters} {'✅' if invalid_chapters == 0 else '❌'}")
 
-if len(duplicates) == 0 and len(invalid_verses) == 0 and len(invalid_chapters) == 0:
+if duplicates == 0 and invalid_verses == 0 and invalid_chapters == 0:
     print("\n✅ DATABASE IS CLEAN! No re-import needed.")
     print("\nℹ️  The database appears to already have cleaned data.")
     print("   The 52,153 verse count matches the cleaned file.")
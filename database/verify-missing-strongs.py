@@ -15,6 +15,9 @@ import os
 import requests
 from dotenv import load_dotenv
 
+from lexicon_cache import open_cache
+from manuscript_ids import open_resolver
+
 # Load environment variables
 load_dotenv()
 
@@ -42,17 +45,11 @@ def check_manuscript_usage(missing_numbers, language):
     manuscript_code = 'WLC' if language == 'Hebrew' else 'SBLGNT'
 
     # Get manuscript ID
-    response = requests.get(
-        f"{SUPABASE_URL}/rest/v1/manuscripts",
-        headers=headers,
-        params={"select": "id", "code": f"eq.{manuscript_code}"}
-    )
-
-    if response.status_code != 200 or not response.json():
+    manuscript_id = open_resolver(SUPABASE_URL, headers).get(manuscript_code)
+    if not manuscript_id:
         print(f"❌ Could not find {manuscript_code} manuscript in database")
         return
 
-    manuscript_id = response.json()[0]['id']
     print(f"✅ Found {manuscript_code} manuscript (ID: {manuscript_id})")
 
     # Check if morphology column exists and has data
@@ -117,6 +114,12 @@ def main():
     missing_hebrew = load_missing_numbers('database/missing-strongs-hebrew.txt')
     missing_greek = load_missing_numbers('database/missing-strongs-greek.txt')
 
+    # Drop numbers the lexicon has gained since the lists were written
+    cache = open_cache()
+    if cache.complete:
+        missing_hebrew = [n for n in missing_hebrew if cache.get(n) is None]
+        missing_greek = [n for n in missing_greek if cache.get(n) is None]
+
     print(f"\n📊 Summary:")
     print(f"   Missing Hebrew numbers: {len(missing_hebrew)}")
     print(f"   Missing Greek numbers: {len(missing_greek)}")
@@ -151,4 +154,6 @@ def main():
         print("\n   The All4Yah database is complete for all practical purposes.")
 
 if __name__ == "__main__":
+    from profiling import profile_from_argv
+    profile_from_argv()
     main()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Corpus Verification
+All4Yah Project
+
+Runs the server-side verification functions of migration 009
+(verse_anomalies, verse_tier_counts) over PostgREST RPC for every
+manuscript at once, instead of paging each manuscript's verses into Python.
+Each manuscript's report is one row per book, so checking the whole corpus
+transfers kilobytes.
+
+A manuscript fails verification when it has no verses at all, or on
+duplicates, invalid chapter / verse numbers, empty text or tier
+mismatches. Verse gaps, missing ordinals and
+untiered verses are reported but do not fail it: critical texts omit verses
+on purpose, and books outside versification.py have no ordinal.
+
+    from verify_corpus import verify_manuscripts
+    for report in verify_manuscripts(['WLC', 'DSS']):
+        print(report['code'], report['totals']['duplicates'])
+
+Manuscript ids come from the shared cache (manuscript_ids.py); credentials
+from SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY (see lexicon_cache.rest_config).
+
+Usage:
+  python3 database/verify_corpus.py                        # every manuscript
+  python3 database/verify_corpus.py --manuscripts WLC DSS --books
+  python3 database/verify_corpus.py --json verification.json
+"""
+
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from lexicon_cache import rest_config
+from manuscript_ids import open_resolver
+
+DEFAULT_WORKERS = 8
+FAILING_CHECKS = ['duplicates', 'invalid_chapters', 'invalid_verses', 'empty_text', 'tier_mismatches']
+INFO_CHECKS = ['verse_gaps', 'missing_ordinal', 'untiered']
+
+# =============================================================================
+# RPC client
+# =============================================================================
+
+def rpc(url, headers, function, **args):
+    """POST /rest/v1/rpc/<function>. Returns (rows, response bytes)."""
+    response = requests.post(f"{url}/rest/v1/rpc/{function}", headers=headers, json=args)
+    response.raise_for_status()
+    return response.json(), len(response.content)
+
+def manuscript_report(url, headers, code, manuscript_id):
+    """Anomalies per book, verse counts per tier and totals for one manuscript."""
+    start = time.perf_counter()
+    books, book_bytes = rpc(url, headers, 'verse_anomalies', p_manuscript_id=manuscript_id)
+    tiers, tier_bytes = rpc(url, headers, 'verse_tier_counts', p_manuscript_id=manuscript_id)
+    totals = {key: sum(book[key] for book in books)
+              for key in ['verses'] + FAILING_CHECKS + INFO_CHECKS}
+    return {
+        'code': code,
+        'manuscript_id': manuscript_id,
+        'books': books,
+        'tiers': tiers,
+        'totals': totals,
+        'failed': (['no_verses'] if not totals['verses'] else []) + [key for key in FAILING_CHECKS if totals[key]],
+        'bytes': book_bytes + tier_bytes,
+        'seconds': round(time.perf_counter() - start, 3),
+    }
+
+def verify_manuscripts(codes=None, workers=DEFAULT_WORKERS, url=None, headers=None):
+    """Reports for `codes` (default: every manuscript), in code order, fetched in parallel."""
+    if url is None:
+        url, headers = rest_config()
+        if not url:
+            raise LookupError("Set SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY to verify the corpus")
+    manuscripts = open_resolver(url, headers).manuscripts()
+    codes = sorted(codes or manuscripts)
+    missing = [code for code in codes if code not in manuscripts]
+    if missing:
+        raise LookupError(f"Unknown manuscripts: {', '.join(missing)}")
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(manuscript_report, url, headers, code, manuscripts[code]['id']) for code in codes]
+        return [future.result() for future in futures]
+
+# =============================================================================
+# CLI Entry Point
+# =============================================================================
+
+def print_report(report, all_books=False):
+    totals = report['totals']
+    status = '❌' if report['failed'] else '✅'
+    parts = [f"{totals['verses']:>8,} verses", f"{len(report['books']):3} books"]
+    if not totals['verses']:
+        parts.append("no verses imported")
+    parts += [f"{key} {totals[key]:,}" for key in FAILING_CHECKS + INFO_CHECKS if totals[key]]
+    print(f"{status} {report['code']:10} {' | '.join(parts)}")
+    if report['tiers']:
+        print("   " + ', '.join(f"tier {t['canonical_tier'] if t['canonical_tier'] is not None else '-'}: "
+                              f"{t['verses']:,} verses / {t['books']} books" for t in report['tiers']))
+    for book in report['books']:
+        flagged = [key for key in FAILING_CHECKS + INFO_CHECKS if book[key]]
+        if all_books or any(key in FAILING_CHECKS for key in flagged):
+            details = ', '.join(f"{key} {book[key]}" for key in flagged) or 'clean'
+            print(f"      {book['book']:4} {book['verses']:>6} verses: {details}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Verify every manuscript with the server-side RPC checks")
+    parser.add_argument("--manuscripts", nargs='+', help="Manuscript codes (default: all)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Manuscripts checked at once")
+    parser.add_argument("--books", action="store_true", help="List every book, not only failing ones")
+    parser.add_argument("--json", help="Also write the reports to this file")
+    args = parser.parse_args()
+
+    print("═" * 80)
+    print("Corpus Verification (server-side) - All4Yah")
+    print("═" * 80)
+    print()
+
+    start = time.perf_counter()
+    try:
+        reports = verify_manuscripts(args.manuscripts, args.workers)
+    except LookupError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    except requests.HTTPError as e:
+        print(f"❌ {e}")
+        if e.response is not None and e.response.status_code == 404:
+            print("   The verification functions are missing: apply migrations/009_add_verification_functions.sql")
+        sys.exit(1)
+    elapsed = time.perf_counter() - start
+
+    for report in reports:
+        print_report(report, args.books)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(reports, f, indent=2)
+            f.write('\n')
+
+    failed = [r['code'] for r in reports if r['failed']]
+    transferred = sum(r['bytes'] for r in reports)
+    print(f"\n{len(reports)} manuscripts, {sum(r['totals']['verses'] for r in reports):,} verses checked "
+          f"in {elapsed:.1f}s ({transferred / 1024:.1f} KB transferred)")
+    if failed:
+        print(f"❌ Quality issues in: {', '.join(failed)}")
+        sys.exit(1)
+    print("✅ No quality issues")
+
+if __name__ == "__main__":
+    from profiling import profile_from_argv
+    profile_from_argv()
+    main()
@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+Versification Mapping
+All4Yah Project
+
+Remaps verse references between the numbering systems used by the imported
+manuscripts and the canonical (Masoretic) numbering used to join them:
+
+- MT:  WLC, DSS                - canonical
+- LXX: LXX (Rahlfs)            - Psalms 9-147 shifted, split and merged
+- ENG: WEB, SBLGNT             - English chapter breaks, unnumbered Psalm titles
+
+Each difference is a rule (book, chapters, verses) -> (chapter delta, verse
+delta). Rules are compiled once into per-(system, book, chapter) tables in
+both directions, so a remap is a dict lookup plus a scan of the one or two
+ranges in that chapter.
+
+Jeremiah's LXX chapter order (LXX 26-51) and partial-verse splits are not
+remapped; those verses keep their own numbering. The exception is a split
+whose second half would otherwise land on the next canonical verse (ENG
+Isaiah 64:1 = second half of MT 63:19): it maps onto the verse it continues
+and is listed in SPLIT_VERSES, so consumers indexing by canonical verse can
+merge the two halves (is_split_continuation) instead of treating them as a
+collision.
+
+Verses are also addressable as integer ordinals: every book in BOOK_ORDER
+gets a block of chapter slots in a packed array('I'), and a verse is
+(chapter slot << 8) | verse. Ordinals fit comfortably in a signed 32-bit
+INTEGER (verses.ordinal, migration 006), sort in canonical order, and the
+remapped verses of each system are precomputed into ordinal dicts, so
+converting a column of references between systems is one lookup per verse.
+Ordinals are stored, so BOOK_ORDER is append-only and fully literal - a
+book's slots never depend on books_tier_map.json. A tier-map book missing
+from BOOK_ORDER is an error at import: append it here (with its chapter
+slots) and to the VALUES list of migration 006 before importing it.
+
+This module is also the single home of the book-code maps shared by the
+importers (LXX numeric IDs, OpenBible/OSIS abbreviations, OT/NT sets).
+"""
+
+import os
+import json
+from array import array
+from bisect import bisect_right
+
+TIER_MAP_JSON = os.path.join(os.path.dirname(os.path.abspath(__file__)), "books_tier_map.json")
+
+MANUSCRIPT_SYSTEMS = {
+    'WLC': 'MT',
+    'DSS': 'MT',
+    'LXX': 'LXX',
+    'WEB': 'ENG',
+    'SBLGNT': 'ENG',
+}
+
+# =============================================================================
+# Books
+# =============================================================================
+
+# (code, chapter slots) in canonical order. Slots cover the longest numbering
+# of any imported system: Psalms 151 (LXX), Joel 4 (MT/LXX), Malachi 4 (ENG)
+BOOK_ORDER = [
+    ('GEN', 50), ('EXO', 40), ('LEV', 27), ('NUM', 36), ('DEU', 34),
+    ('JOS', 24), ('JDG', 21), ('RUT', 4), ('1SA', 31), ('2SA', 24),
+    ('1KI', 22), ('2KI', 25), ('1CH', 29), ('2CH', 36), ('EZR', 10),
+    ('NEH', 13), ('EST', 10), ('JOB', 42), ('PSA', 151), ('PRO', 31),
+    ('ECC', 12), ('SNG', 8), ('ISA', 66), ('JER', 52), ('LAM', 5),
+    ('EZK', 48), ('DAN', 12), ('HOS', 14), ('JOL', 4), ('AMO', 9),
+    ('OBA', 1), ('JON', 4), ('MIC', 7), ('NAM', 3), ('HAB', 3),
+    ('ZEP', 3), ('HAG', 2), ('ZEC', 14), ('MAL', 4),
+    ('MAT', 28), ('MRK', 16), ('LUK', 24), ('JHN', 21), ('ACT', 28),
+    ('ROM', 16), ('1CO', 16), ('2CO', 13), ('GAL', 6), ('EPH', 6),
+    ('PHP', 4), ('COL', 4), ('1TH', 5), ('2TH', 3), ('1TI', 6),
+    ('2TI', 4), ('TIT', 3), ('PHM', 1), ('HEB', 13), ('JAS', 5),
+    ('1PE', 5), ('2PE', 3), ('1JN', 5), ('2JN', 1), ('3JN', 1),
+    ('JUD', 1), ('REV', 22),
+    ('TOB', 14), ('JDT', 16), ('ESG', 16), ('WIS', 19), ('SIR', 51),
+    ('BAR', 5), ('LJE', 1), ('S3Y', 1), ('SUS', 1), ('BEL', 1),
+    ('1MA', 16), ('2MA', 15), ('3MA', 7), ('4MA', 18), ('PS2', 1),
+    ('MAN', 1), ('1ES', 9), ('2ES', 16), ('ENO', 108), ('JUB', 50),
+    ('PSS', 18), ('ODE', 14),
+    # Tier-map books without a known chapter count get 150 slots
+    ('MEQ', 150), ('TGO', 150), ('GMA', 150), ('KNG', 150),
+]
+
+OT_BOOKS = frozenset(code for code, _ in BOOK_ORDER[:39])
+NT_BOOKS = frozenset(code for code, _ in BOOK_ORDER[39:66])
+
+def load_tier_books(path=TIER_MAP_JSON):
+    """Book codes from books_tier_map.json, in file order."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return [book['code'] for book in json.load(f).get('books', [])]
+    except FileNotFoundError:
+        return []
+
+def check_tier_map(path=TIER_MAP_JSON):
+    """Raise ValueError if books_tier_map.json lists a book BOOK_ORDER has no ordinal slots for."""
+    known = {code for code, _ in BOOK_ORDER}
+    unknown = [code for code in load_tier_books(path) if code not in known]
+    if unknown:
+        raise ValueError(f"{os.path.basename(path)} lists books without ordinal slots: {', '.join(unknown)} - "
+                         f"append them to versification.BOOK_ORDER and migration 006")
+
+check_tier_map()
+
+# LXX (Rahlfs, MyBible export) numeric book IDs
+LXX_BOOK_IDS = {
+    10: "GEN", 20: "EXO", 30: "LEV", 40: "NUM", 50: "DEU",
+    60: "JOS", 70: "JDG", 80: "RUT", 90: "1SA", 100: "2SA",
+    110: "1KI", 120: "2KI", 130: "1CH", 140: "2CH",
+    150: "EZR", 160: "NEH", 190: "EST",
+    220: "JOB", 230: "PSA", 240: "PRO", 250: "ECC", 260: "SNG",
+    290: "ISA", 300: "JER", 310: "LAM", 330: "EZK", 340: "DAN",
+    350: "HOS", 360: "JOL", 370: "AMO", 380: "OBA", 390: "JON",
+    400: "MIC", 410: "NAM", 420: "HAB", 430: "ZEP", 440: "HAG",
+    450: "ZEC", 460: "MAL",
+    # Deuterocanonical books (Tier 2)
+    165: "1ES", 170: "TOB", 180: "JDT", 232: "PSS",
+    462: "1MA", 464: "2MA", 466: "3MA", 467: "4MA",
+    270: "WIS", 280: "SIR", 315: "LJE", 320: "BAR",
+    325: "SUS", 345: "BEL", 800: "ODE"
+}
+
+# OpenBible.info / OSIS book abbreviations
+OSIS_BOOK_CODES = {
+    # Old Testament
+    'Gen': 'GEN', 'Exod': 'EXO', 'Lev': 'LEV', 'Num': 'NUM', 'Deut': 'DEU',
+    'Josh': 'JOS', 'Judg': 'JDG', 'Ruth': 'RUT',
+    '1Sam': '1SA', '2Sam': '2SA', '1Kgs': '1KI', '2Kgs': '2KI',
+    '1Chr': '1CH', '2Chr': '2CH',
+    'Ezra': 'EZR', 'Neh': 'NEH', 'Esth': 'EST',
+    'Job': 'JOB', 'Ps': 'PSA', 'Prov': 'PRO', 'Eccl': 'ECC', 'Song': 'SNG',
+    'Isa': 'ISA', 'Jer': 'JER', 'Lam': 'LAM', 'Ezek': 'EZK', 'Dan': 'DAN',
+    'Hos': 'HOS', 'Joel': 'JOL', 'Amos': 'AMO', 'Obad': 'OBA', 'Jon': 'JON',
+    'Mic': 'MIC', 'Nah': 'NAM', 'Hab': 'HAB', 'Zeph': 'ZEP',
+    'Hag': 'HAG', 'Zech': 'ZEC', 'Mal': 'MAL',
+
+    # New Testament
+    'Matt': 'MAT', 'Mark': 'MRK', 'Luke': 'LUK', 'John': 'JHN',
+    'Acts': 'ACT', 'Rom': 'ROM',
+    '1Cor': '1CO', '2Cor': '2CO',
+    'Gal': 'GAL', 'Eph': 'EPH', 'Phil': 'PHP', 'Col': 'COL',
+    '1Thess': '1TH', '2Thess': '2TH',
+    '1Tim': '1TI', '2Tim': '2TI', 'Titus': 'TIT', 'Phlm': 'PHM',
+    'Heb': 'HEB', 'Jas': 'JAS',
+    '1Pet': '1PE', '2Pet': '2PE',
+    '1John': '1JN', '2John': '2JN', '3John': '3JN',
+    'Jude': 'JUD', 'Rev': 'REV'
+}
+
+# =============================================================================
+# Numbering systems
+# =============================================================================
+
+# (book, first chapter, last chapter, first verse, last verse or None,
+#  chapter delta, verse delta) - applied as canonical = (ch + dc, v + dv)
+LXX_RULES = [
+    ('PSA', 9, 9, 22, None, 1, -21),      # LXX 9:22-39 = MT 10:1-18
+    ('PSA', 10, 112, 1, None, 1, 0),
+    ('PSA', 113, 113, 9, None, 2, -8),    # LXX 113:9-26 = MT 115:1-18
+    ('PSA', 113, 113, 1, 8, 1, 0),        # LXX 113:1-8 = MT 114
+    ('PSA', 114, 114, 1, None, 2, 0),     # LXX 114 = MT 116:1-9
+    ('PSA', 115, 115, 1, None, 1, 9),     # LXX 115 = MT 116:10-19
+    ('PSA', 116, 145, 1, None, 1, 0),
+    ('PSA', 146, 146, 1, None, 1, 0),     # LXX 146 = MT 147:1-11
+    ('PSA', 147, 147, 1, None, 0, 11),    # LXX 147 = MT 147:12-20
+]
+
+ENG_RULES = [
+    ('GEN', 31, 31, 55, 55, 1, -54), ('GEN', 32, 32, 1, None, 0, 1),
+    ('EXO', 8, 8, 1, 4, -1, 25), ('EXO', 8, 8, 5, None, 0, -4),
+    ('EXO', 22, 22, 1, 1, -1, 36), ('EXO', 22, 22, 2, None, 0, -1),
+    ('LEV', 6, 6, 1, 7, -1, 19), ('LEV', 6, 6, 8, None, 0, -7),
+    ('NUM', 16, 16, 36, None, 1, -35), ('NUM', 17, 17, 1, None, 0, 15),
+    ('NUM', 29, 29, 40, 40, 1, -39), ('NUM', 30, 30, 1, None, 0, 1),
+    ('DEU', 12, 12, 32, 32, 1, -31), ('DEU', 13, 13, 1, None, 0, 1),
+    ('DEU', 22, 22, 30, 30, 1, -29), ('DEU', 23, 23, 1, None, 0, 1),
+    ('DEU', 29, 29, 1, 1, -1, 68), ('DEU', 29, 29, 2, None, 0, -1),
+    ('1SA', 23, 23, 29, 29, 1, -28), ('1SA', 24, 24, 1, None, 0, 1),
+    ('2SA', 18, 18, 33, 33, 1, -32), ('2SA', 19, 19, 1, None, 0, 1),
+    ('1KI', 4, 4, 21, None, 1, -20), ('1KI', 5, 5, 1, None, 0, 14),
+    ('2KI', 11, 11, 21, 21, 1, -20), ('2KI', 12, 12, 1, None, 0, 1),
+    ('1CH', 6, 6, 1, 15, -1, 26), ('1CH', 6, 6, 16, None, 0, -15),
+    ('2CH', 2, 2, 1, 1, -1, 17), ('2CH', 2, 2, 2, None, 0, -1),
+    ('2CH', 14, 14, 1, 1, -1, 22), ('2CH', 14, 14, 2, None, 0, -1),
+    ('NEH', 4, 4, 1, 6, -1, 32), ('NEH', 4, 4, 7, None, 0, -6),
+    ('NEH', 9, 9, 38, 38, 1, -37), ('NEH', 10, 10, 1, None, 0, 1),
+    ('JOB', 41, 41, 1, 8, -1, 24), ('JOB', 41, 41, 9, None, 0, -8),
+    ('ECC', 5, 5, 1, 1, -1, 16), ('ECC', 5, 5, 2, None, 0, -1),
+    ('SNG', 6, 6, 13, 13, 1, -12), ('SNG', 7, 7, 1, None, 0, 1),
+    ('ISA', 9, 9, 1, 1, -1, 22), ('ISA', 9, 9, 2, None, 0, -1),
+    ('ISA', 64, 64, 1, 1, -1, 18), ('ISA', 64, 64, 2, None, 0, -1),   # ENG 64:1 = MT 63:19b
+    ('JER', 9, 9, 1, 1, -1, 22), ('JER', 9, 9, 2, None, 0, -1),
+    ('EZK', 20, 20, 45, None, 1, -44), ('EZK', 21, 21, 1, None, 0, 5),
+    ('DAN', 4, 4, 1, 3, -1, 30), ('DAN', 4, 4, 4, None, 0, -3),
+    ('DAN', 5, 5, 31, 31, 1, -30), ('DAN', 6, 6, 1, None, 0, 1),
+    ('HOS', 1, 1, 10, None, 1, -9), ('HOS', 2, 2, 1, None, 0, 2),
+    ('HOS', 11, 11, 12, 12, 1, -11), ('HOS', 12, 12, 1, None, 0, 1),
+    ('HOS', 13, 13, 16, 16, 1, -15), ('HOS', 14, 14, 1, None, 0, 1),
+    ('JOL', 2, 2, 28, None, 1, -27), ('JOL', 3, 3, 1, None, 1, 0),
+    ('JON', 1, 1, 17, 17, 1, -16), ('JON', 2, 2, 1, None, 0, 1),
+    ('MIC', 5, 5, 1, 1, -1, 13), ('MIC', 5, 5, 2, None, 0, -1),
+    ('NAM', 1, 1, 15, 15, 1, -14), ('NAM', 2, 2, 1, None, 0, 1),
+    ('ZEC', 1, 1, 18, None, 1, -17), ('ZEC', 2, 2, 1, None, 0, 4),
+    ('MAL', 4, 4, 1, None, -1, 18),
+]
+
+# Psalms whose Hebrew title is numbered as its own verse (two verses for 51,
+# 52, 54, 60); English Bibles leave the title unnumbered
+PSALM_TITLE_VERSES = {
+    3: 1, 4: 1, 5: 1, 6: 1, 7: 1, 8: 1, 9: 1, 12: 1, 13: 1, 18: 1, 19: 1, 20: 1,
+    21: 1, 22: 1, 30: 1, 31: 1, 34: 1, 36: 1, 38: 1, 39: 1, 40: 1, 41: 1, 42: 1,
+    44: 1, 45: 1, 46: 1, 47: 1, 48: 1, 49: 1, 51: 2, 52: 2, 53: 1, 54: 2, 55: 1,
+    56: 1, 57: 1, 58: 1, 59: 1, 60: 2, 61: 1, 62: 1, 63: 1, 64: 1, 65: 1, 67: 1,
+    68: 1, 69: 1, 70: 1, 75: 1, 76: 1, 77: 1, 80: 1, 81: 1, 83: 1, 84: 1, 85: 1,
+    88: 1, 89: 1, 92: 1, 102: 1, 108: 1, 140: 1, 142: 1,
+}
+ENG_RULES += [('PSA', ps, ps, 1, None, 0, shift) for ps, shift in PSALM_TITLE_VERSES.items()]
+
+SYSTEM_RULES = {'MT': [], 'LXX': LXX_RULES, 'ENG': ENG_RULES}
+
+# Verses that continue the canonical verse of the one before them: both map
+# to the same MT verse, and the canonical verse maps back to the first half
+SPLIT_VERSES = {
+    'ENG': {('ISA', 64, 1)},     # MT Isa 63:19 = ENG 63:19 + 64:1
+}
+
+# =============================================================================
+# Compiled tables
+# =============================================================================
+
+def compile_rules(rules, splits=()):
+    """
+    Return ({(book, ch): [(v_from, v_to, dc, dv)]} to canonical, and the
+    inverse). Single-verse rules for `splits` are not inverted.
+    """
+    forward, inverse = {}, {}
+    for book, ch_from, ch_to, v_from, v_to, dc, dv in rules:
+        for ch in range(ch_from, ch_to + 1):
+            forward.setdefault((book, ch), []).append((v_from, v_to, dc, dv))
+            if v_from == v_to and (book, ch, v_from) in splits:
+                continue
+            inverse.setdefault((book, ch + dc), []).append(
+                (v_from + dv, None if v_to is None else v_to + dv, -dc, -dv))
+    # Open-ended ranges overlap later ones; the range starting highest wins
+    for table in (forward, inverse):
+        for ranges in table.values():
+            ranges.sort(key=lambda r: -r[0])
+    return forward, inverse
+
+TO_CANONICAL = {}
+FROM_CANONICAL = {}
+for _system, _rules in SYSTEM_RULES.items():
+    TO_CANONICAL[_system], FROM_CANONICAL[_system] = compile_rules(_rules, SPLIT_VERSES.get(_system, ()))
+
+def _apply(table, book, chapter, verse):
+    for v_from, v_to, dc, dv in table.get((book, chapter), ()):
+        if verse >= v_from and (v_to is None or verse <= v_to):
+            return book, chapter + dc, verse + dv
+    return book, chapter, verse
+
+def is_split_continuation(system, book, chapter, verse):
+    """Whether `system`'s reference is the second half of a canonical verse split across two verses."""
+    return (book, chapter, verse) in SPLIT_VERSES.get(system, ())
+
+def system_for(manuscript):
+    return MANUSCRIPT_SYSTEMS.get(manuscript, 'MT')
+
+def to_canonical(system, book, chapter, verse):
+    """(book, chapter, verse) in `system` -> canonical (MT) reference."""
+    return _apply(TO_CANONICAL[system], book, chapter, verse)
+
+def from_canonical(system, book, chapter, verse):
+    """Canonical (MT) reference -> (book, chapter, verse) in `system`."""
+    return _apply(FROM_CANONICAL[system], book, chapter, verse)
+
+# =============================================================================
+# Verse ordinals
+# =============================================================================
+
+VERSE_BITS = 8                       # 256 verse slots; the longest chapter (PSA 119) has 176
+VERSE_SLOTS = 1 << VERSE_BITS
+
+BOOK_INDEX = {code: i for i, (code, _) in enumerate(BOOK_ORDER)}
+
+# First chapter slot of each book; a book owns chapters 0..n (0 = prologue)
+CHAPTER_BASE = array('I')
+_slot = 0
+for _code, _chapters in BOOK_ORDER:
+    CHAPTER_BASE.append(_slot)
+    _slot += _chapters + 1
+CHAPTER_BASE.append(_slot)           # sentinel: end of the last book
+
+def ordinal(book, chapter, verse):
+    """Pack a reference into its integer ordinal (no versification remap)."""
+    i = BOOK_INDEX[book]
+    if not 0 <= chapter <= CHAPTER_BASE[i + 1] - CHAPTER_BASE[i] - 1 or not 0 <= verse < VERSE_SLOTS:
+        raise ValueError(f"{book} {chapter}:{verse} is outside the ordinal range")
+    return ((CHAPTER_BASE[i] + chapter) << VERSE_BITS) | verse
+
+def reference(value):
+    """Unpack an ordinal into (book, chapter, verse)."""
+    slot = value >> VERSE_BITS
+    i = bisect_right(CHAPTER_BASE, slot) - 1
+    return BOOK_ORDER[i][0], slot - CHAPTER_BASE[i], value & (VERSE_SLOTS - 1)
+
+def verse_ordinal(book, chapter, verse):
+    """Like ordinal(), but None for references outside the ordinal space (for nullable columns)."""
+    try:
+        return ordinal(book, chapter, verse)
+    except (KeyError, ValueError):
+        return None
+
+def compile_ordinals(table):
+    """Expand a compiled rule table into {ordinal: remapped ordinal} for every remapped verse."""
+    remap = {}
+    for (book, chapter) in table:
+        for verse in range(VERSE_SLOTS):
+            target = _apply(table, book, chapter, verse)
+            if target != (book, chapter, verse):
+                try:
+                    remap[ordinal(book, chapter, verse)] = ordinal(*target)
+                except ValueError:
+                    continue
+    return remap
+
+TO_CANONICAL_ORDINALS = {system: compile_ordinals(table) for system, table in TO_CANONICAL.items()}
+FROM_CANONICAL_ORDINALS = {system: compile_ordinals(table) for system, table in FROM_CANONICAL.items()}
+
+def canonical_ordinal(system, book, chapter, verse):
+    """Ordinal of the canonical (MT) verse that `system`'s reference denotes."""
+    value = ordinal(book, chapter, verse)
+    return TO_CANONICAL_ORDINALS[system].get(value, value)
+
+def convert(values, from_system, to_system):
+    """Remap a sequence of ordinals from one numbering system to another."""
+    to_canonical_map = TO_CANONICAL_ORDINALS[from_system]
+    from_canonical_map = FROM_CANONICAL_ORDINALS[to_system]
+    out = array('I')
+    for value in values:
+        value = to_canonical_map.get(value, value)
+        out.append(from_canonical_map.get(value, value))
+    return out
+
+def to_ordinals(system, references, canonical=True):
+    """Pack (book, chapter, verse) triples into an array('I') of ordinals, remapped to MT by default."""
+    out = array('I', (ordinal(*ref) for ref in references))
+    return convert(out, system, 'MT') if canonical else out
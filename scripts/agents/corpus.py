@@ -0,0 +1,361 @@
+"""
+Shared corpus access for the agents.
+
+Verses are read lazily, one book at a time, from local snapshots of the
+verses table (data/corpus/<MANUSCRIPT>/<BOOK>.json, a JSON array of PostgREST
+rows). A missing book is fetched once from Supabase when SUPABASE_URL is set
+and written back as a snapshot. Decoded books are kept in an LRU cache so
+agents can iterate, look up and tokenize verses without reloading the corpus.
+
+    import corpus
+    for v in corpus.iter_verses('WLC', 'GEN', start=(1, 1), end=(2, 3)):
+        ...
+    corpus.get_verse('SBLGNT', 'JHN', 1, 1)
+    corpus.get_tokens('SBLGNT', 'JHN', 1, 1)
+    corpus.lexicon().get('H3068')
+
+Strong's lookups go through the local lexicon cache (database/lexicon_cache.py)
+instead of PostgREST.
+"""
+
+import os
+import re
+import sys
+import json
+import logging
+import unicodedata
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+CORPUS_DIR = os.getenv('ALL4YAH_CORPUS_DIR', os.path.join(BASE_DIR, 'data', 'corpus'))
+DATABASE_DIR = os.path.join(BASE_DIR, 'database')
+BOOK_CACHE_SIZE = int(os.getenv('ALL4YAH_BOOK_CACHE', '32'))
+REST_PAGE_SIZE = 1000
+
+OT_BOOKS = [
+    'GEN', 'EXO', 'LEV', 'NUM', 'DEU', 'JOS', 'JDG', 'RUT', '1SA', '2SA', '1KI', '2KI',
+    '1CH', '2CH', 'EZR', 'NEH', 'EST', 'JOB', 'PSA', 'PRO', 'ECC', 'SNG', 'ISA', 'JER',
+    'LAM', 'EZK', 'DAN', 'HOS', 'JOL', 'AMO', 'OBA', 'JON', 'MIC', 'NAM', 'HAB', 'ZEP',
+    'HAG', 'ZEC', 'MAL'
+]
+NT_BOOKS = [
+    'MAT', 'MRK', 'LUK', 'JHN', 'ACT', 'ROM', '1CO', '2CO', 'GAL', 'EPH', 'PHP', 'COL',
+    '1TH', '2TH', '1TI', '2TI', 'TIT', 'PHM', 'HEB', 'JAS', '1PE', '2PE', '1JN', '2JN',
+    '3JN', 'JUD', 'REV'
+]
+DEUTERO_BOOKS = [
+    'TOB', 'JDT', 'ESG', 'WIS', 'SIR', 'BAR', 'LJE', 'S3Y', 'SUS', 'BEL', '1MA', '2MA',
+    '3MA', '4MA', 'PS2', 'MAN', '1ES', '2ES', 'ENO', 'JUB'
+]
+CANON_ORDER = OT_BOOKS + NT_BOOKS + DEUTERO_BOOKS
+
+BOOK_NAMES = {
+    'genesis': 'GEN', 'gen': 'GEN', 'exodus': 'EXO', 'exod': 'EXO', 'leviticus': 'LEV',
+    'numbers': 'NUM', 'deuteronomy': 'DEU', 'deut': 'DEU', 'joshua': 'JOS', 'judges': 'JDG',
+    'ruth': 'RUT', '1 samuel': '1SA', '2 samuel': '2SA', '1 kings': '1KI', '2 kings': '2KI',
+    '1 chronicles': '1CH', '2 chronicles': '2CH', 'ezra': 'EZR', 'nehemiah': 'NEH',
+    'esther': 'EST', 'job': 'JOB', 'psalms': 'PSA', 'psalm': 'PSA', 'ps': 'PSA',
+    'proverbs': 'PRO', 'ecclesiastes': 'ECC', 'song of solomon': 'SNG', 'song of songs': 'SNG',
+    'isaiah': 'ISA', 'jeremiah': 'JER', 'lamentations': 'LAM', 'ezekiel': 'EZK',
+    'daniel': 'DAN', 'hosea': 'HOS', 'joel': 'JOL', 'amos': 'AMO', 'obadiah': 'OBA',
+    'jonah': 'JON', 'micah': 'MIC', 'nahum': 'NAM', 'habakkuk': 'HAB', 'zephaniah': 'ZEP',
+    'haggai': 'HAG', 'zechariah': 'ZEC', 'malachi': 'MAL',
+    'matthew': 'MAT', 'matt': 'MAT', 'mark': 'MRK', 'luke': 'LUK', 'john': 'JHN', 'jn': 'JHN',
+    'acts': 'ACT', 'romans': 'ROM', '1 corinthians': '1CO', '2 corinthians': '2CO',
+    'galatians': 'GAL', 'ephesians': 'EPH', 'philippians': 'PHP', 'colossians': 'COL',
+    '1 thessalonians': '1TH', '2 thessalonians': '2TH', '1 timothy': '1TI', '2 timothy': '2TI',
+    'titus': 'TIT', 'philemon': 'PHM', 'hebrews': 'HEB', 'james': 'JAS', '1 peter': '1PE',
+    '2 peter': '2PE', '1 john': '1JN', '2 john': '2JN', '3 john': '3JN', 'jude': 'JUD',
+    'revelation': 'REV',
+    'tobit': 'TOB', 'judith': 'JDT', 'wisdom': 'WIS', 'sirach': 'SIR', 'baruch': 'BAR',
+    '1 maccabees': '1MA', '2 maccabees': '2MA', '3 maccabees': '3MA', '4 maccabees': '4MA',
+    '1 esdras': '1ES',
+}
+
+# =============================================================================
+# References
+# =============================================================================
+
+def parse_reference(reference):
+    """'John 1:1' -> ('JHN', 1, 1); 'John 1' -> ('JHN', 1, None)."""
+    match = re.match(r'^\s*(.+?)\s+(\d+)(?::(\d+))?\s*$', reference)
+    if not match:
+        raise ValueError(f"Unrecognised reference: {reference}")
+    name, chapter, verse = match.groups()
+    name = re.sub(r'\s+', ' ', name.strip().rstrip('.'))
+    code = BOOK_NAMES.get(name.lower(), name.upper())
+    return code, int(chapter), int(verse) if verse else None
+
+def default_manuscript(book):
+    """Morphology-bearing source text for a book."""
+    if book in NT_BOOKS:
+        return 'SBLGNT'
+    if book in OT_BOOKS:
+        return 'WLC'
+    return 'LXX'
+
+# =============================================================================
+# Snapshot and REST loading
+# =============================================================================
+
+def rest_get(table, params):
+    """GET every row matching params from Supabase, paging through the result."""
+    url = os.getenv('SUPABASE_URL')
+    key = os.getenv('SUPABASE_SERVICE_ROLE_KEY') or os.getenv('SUPABASE_ANON_KEY')
+    if not url or not key:
+        return None
+
+    import requests
+    headers = {"apikey": key, "Authorization": f"Bearer {key}"}
+    rows = []
+    offset = 0
+    while True:
+        response = requests.get(
+            f"{url}/rest/v1/{table}",
+            headers=headers,
+            params={**params, "offset": offset, "limit": REST_PAGE_SIZE},
+        )
+        response.raise_for_status()
+        page = response.json()
+        rows.extend(page)
+        if len(page) < REST_PAGE_SIZE:
+            return rows
+        offset += REST_PAGE_SIZE
+
+def manuscript_id(manuscript):
+    """Manuscript UUID from the shared id cache (see database/manuscript_ids.py)."""
+    if DATABASE_DIR not in sys.path:
+        sys.path.append(DATABASE_DIR)
+    from manuscript_ids import open_resolver
+    return open_resolver().get(manuscript)
+
+def snapshot_path(manuscript, book):
+    return os.path.join(CORPUS_DIR, manuscript, f"{book}.json")
+
+def fetch_book(manuscript, book):
+    """
+    Download one book from the verses table and save it as a snapshot. An
+    empty result (book absent, no credentials) is not saved, so the book is
+    looked up again next time instead of staying empty.
+    """
+    ms_id = manuscript_id(manuscript)
+    if ms_id is None:
+        return None
+    logging.info(f"Fetching {manuscript} {book} from Supabase...")
+    rows = rest_get('verses', {
+        "select": "chapter,verse,text,morphology",
+        "manuscript_id": f"eq.{ms_id}",
+        "book": f"eq.{book}",
+        "order": "chapter.asc,verse.asc",
+    })
+    if not rows:
+        return rows
+    path = snapshot_path(manuscript, book)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(rows, f, ensure_ascii=False)
+    return rows
+
+class Book:
+    """One decoded book: verses sorted by (chapter, verse) with a key index."""
+
+    def __init__(self, manuscript, code, rows):
+        self.manuscript = manuscript
+        self.code = code
+        self.verses = sorted(
+            ({'book': code, 'chapter': int(r['chapter']), 'verse': int(r['verse']),
+              'text': r.get('text') or '', 'morphology': r.get('morphology')} for r in rows),
+            key=lambda v: (v['chapter'], v['verse']),
+        )
+        self.keys = [(v['chapter'], v['verse']) for v in self.verses]
+
+    def get(self, chapter, verse):
+        i = bisect_left(self.keys, (chapter, verse))
+        if i < len(self.keys) and self.keys[i] == (chapter, verse):
+            return self.verses[i]
+        return None
+
+    def range(self, start=None, end=None):
+        lo = bisect_left(self.keys, start) if start else 0
+        hi = bisect_right(self.keys, end) if end else len(self.keys)
+        return self.verses[lo:hi]
+
+@lru_cache(maxsize=BOOK_CACHE_SIZE)
+def load_book(manuscript, book):
+    """Decoded book from the local snapshot, falling back to Supabase. None if absent."""
+    path = snapshot_path(manuscript, book)
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            rows = json.load(f)
+    else:
+        rows = fetch_book(manuscript, book)
+        if rows is None:
+            return None
+    return Book(manuscript, book, rows) if rows else None
+
+def set_corpus_dir(path):
+    """Point the corpus at another snapshot directory and drop decoded books."""
+    global CORPUS_DIR
+    CORPUS_DIR = path
+    load_book.cache_clear()
+
+def list_books(manuscript):
+    """Books available for a manuscript, in canonical order."""
+    directory = os.path.join(CORPUS_DIR, manuscript)
+    if os.path.isdir(directory):
+        present = {name[:-5] for name in os.listdir(directory) if name.endswith('.json')}
+        extra = sorted(present - set(CANON_ORDER))
+        return [b for b in CANON_ORDER if b in present] + extra
+    return list(CANON_ORDER)
+
+def list_manuscripts():
+    if not os.path.isdir(CORPUS_DIR):
+        return []
+    return sorted(d for d in os.listdir(CORPUS_DIR) if os.path.isdir(os.path.join(CORPUS_DIR, d)))
+
+# =============================================================================
+# Public iteration / lookup API
+# =============================================================================
+
+def iter_verses(manuscript, book=None, start=None, end=None):
+    """
+    Yield verse dicts (book, chapter, verse, text, morphology) for a whole
+    manuscript, one book, or a (chapter, verse) range within a book.
+    """
+    books = [book] if book else list_books(manuscript)
+    for code in books:
+        decoded = load_book(manuscript, code)
+        if decoded is not None:
+            yield from decoded.range(start, end)
+
+def get_verse(manuscript, book, chapter, verse):
+    decoded = load_book(manuscript, book)
+    return decoded.get(chapter, verse) if decoded else None
+
+def get_tokens(manuscript, book, chapter, verse):
+    """Normalized morphology tokens for a verse ([] if it has none)."""
+    v = get_verse(manuscript, book, chapter, verse)
+    return verse_tokens(v) if v else []
+
+def verse_tokens(v):
+    morphology = v.get('morphology') or []
+    if isinstance(morphology, str):
+        morphology = json.loads(morphology)
+    tokens = []
+    for raw in morphology:
+        tokens.extend(normalize_token(raw))
+    return tokens
+
+def lexicon():
+    """Shared read-through Strong's lexicon cache (see database/lexicon_cache.py)."""
+    if DATABASE_DIR not in sys.path:
+        sys.path.append(DATABASE_DIR)
+    from lexicon_cache import open_cache
+    return open_cache()
+
+def profile_from_argv():
+    """--profile for the agents; see database/profiling.py."""
+    if DATABASE_DIR not in sys.path:
+        sys.path.append(DATABASE_DIR)
+    from profiling import profile_from_argv
+    return profile_from_argv()
+
+# =============================================================================
+# Morphology normalization
+# =============================================================================
+
+# OSHB prefix lemmas (b/7225 = "in" + reshit)
+HEBREW_PREFIXES = {
+    'b': ('preposition', {'in', 'with', 'by', 'among', 'at', 'on'}),
+    'l': ('preposition', {'to', 'for', 'of', 'unto'}),
+    'k': ('preposition', {'as', 'like', 'according'}),
+    'm': ('preposition', {'from', 'of', 'than'}),
+    'w': ('conjunction', {'and', 'but', 'then', 'so', 'now'}),
+    'c': ('conjunction', {'and', 'but', 'then', 'so', 'now'}),
+    'h': ('article', {'the'}),
+    'd': ('article', {'the'}),
+    's': ('pronoun', {'who', 'which', 'that'}),
+    'i': ('particle', set()),
+}
+
+GREEK_POS = {
+    'N': 'noun', 'V': 'verb', 'A': 'adjective', 'D': 'adverb', 'C': 'conjunction',
+    'P': 'preposition', 'R': 'pronoun', 'X': 'particle', 'I': 'interjection',
+}
+OSHB_POS = {
+    'N': 'noun', 'V': 'verb', 'A': 'adjective', 'D': 'adverb', 'C': 'conjunction',
+    'R': 'preposition', 'P': 'pronoun', 'S': 'pronoun', 'T': 'particle',
+}
+CASE_NUMBER_RE = re.compile(r'[NGDAV]([SPD])[MFN]')
+
+def fold_greek(word):
+    """Strip accents/breathings and fold final sigma so lemmas match lexicon headwords."""
+    decomposed = unicodedata.normalize('NFD', word or '')
+    stripped = ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return stripped.lower().replace('ς', 'σ')
+
+def normalize_token(raw):
+    """
+    Convert one stored morphology entry into sub-tokens of the form
+    {surface, strongs, lemma, pos, number}.
+
+    Handles the three shapes in the verses table:
+    - SBLGNT: {word, lemma, pos, parsing}
+    - LXX:    {word, strongs: [...], morph}
+    - OSHB:   {text, lemma: "b/7225", morph: "HR/Ncfsa"}
+    """
+    if 'parsing' in raw:
+        code = raw.get('pos') or ''
+        pos = 'article' if code == 'RA' else GREEK_POS.get(code[:1], 'other')
+        parsing = raw.get('parsing') or ''
+        number = parsing[5] if len(parsing) > 5 and parsing[5] in 'SP' else None
+        return [{
+            'surface': raw.get('word', ''),
+            'strongs': [],
+            'lemma': fold_greek(raw.get('lemma', '')),
+            'pos': pos,
+            'number': number,
+        }]
+
+    if 'strongs' in raw:
+        morph = raw.get('morph') or ''
+        code = re.split(r'[\s.]', morph, maxsplit=1)[0]
+        pos = 'article' if code.startswith('RA') else GREEK_POS.get(code[:1], 'other')
+        number_match = CASE_NUMBER_RE.search(morph)
+        return [{
+            'surface': raw.get('word', ''),
+            'strongs': list(raw.get('strongs') or []),
+            'lemma': '',
+            'pos': pos,
+            'number': number_match.group(1) if number_match else None,
+        }]
+
+    # OSHB: one surface word, several morphemes separated by '/'
+    lemmas = (raw.get('lemma') or '').split('/')
+    morph = raw.get('morph') or ''
+    segments = morph[1:].split('/') if morph else []
+    tokens = []
+    for i, lemma in enumerate(lemmas):
+        segment = segments[i] if i < len(segments) else ''
+        lemma = lemma.strip()
+        if lemma in HEBREW_PREFIXES:
+            pos, _ = HEBREW_PREFIXES[lemma]
+            if segment.startswith('Td'):
+                pos = 'article'
+            tokens.append({'surface': raw.get('text', ''), 'strongs': [], 'lemma': lemma,
+                           'pos': pos, 'number': None})
+            continue
+        digits = re.match(r'(\d+)', lemma)
+        pos = OSHB_POS.get(segment[:1], 'other')
+        number = None
+        if pos == 'noun' and len(segment) > 3:
+            number = {'s': 'S', 'p': 'P', 'd': 'P'}.get(segment[3])
+        tokens.append({
+            'surface': raw.get('text', ''),
+            'strongs': [f"H{int(digits.group(1))}"] if digits else [],
+            'lemma': lemma,
+            'pos': pos,
+            'number': number,
+        })
+    return tokens
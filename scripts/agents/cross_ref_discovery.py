@@ -1,55 +1,113 @@
-import os
+import re
+import math
 import argparse
 import json
 import logging
-# import torch
-# from sentence_transformers import SentenceTransformer
+from collections import Counter
+
+import corpus
+
+TOP_HITS = 25
+WORD_RE = re.compile(r"[^\W\d_]+")
+STOPWORDS = {
+    'the', 'and', 'of', 'to', 'in', 'that', 'he', 'his', 'for', 'a', 'is', 'was', 'they', 'i',
+    'with', 'not', 'him', 'be', 'all', 'shall', 'them', 'it', 'you', 'your', 'will', 'my', 'me',
+    'from', 'who', 'their', 'have', 'on', 'are', 'which', 'by', 'as', 'said', 'when', 'there',
+    'but', 'we', 'this', 'were', 'an', 'so', 'then', 'also', 'had', 'her', 'she', 'one',
+    'unto', 'thee', 'thou', 'thy', 'ye', 'upon', 'us', 'our', 'no', 'or', 'if', 'at', 'do',
+}
 
 def setup_logging():
     logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-def load_manuscripts(manuscripts_dir):
-    logging.info(f"Loading manuscripts from {manuscripts_dir}...")
-    # TODO: Load text from files
-    return []
+def terms(text):
+    return [w for w in WORD_RE.findall(text.lower()) if w not in STOPWORDS and len(w) > 2]
+
+def load_manuscripts(manuscript, query_terms):
+    """
+    Stream a manuscript from the shared corpus, counting document frequencies
+    for every term and keeping only verses that share a term with the query.
+    """
+    logging.info(f"Loading {manuscript} from the corpus...")
+    df = Counter()
+    total = 0
+    candidates = []
+    for verse in corpus.iter_verses(manuscript):
+        counts = Counter(terms(verse['text']))
+        df.update(counts.keys())
+        total += 1
+        if query_terms & counts.keys():
+            candidates.append((verse, counts))
+    return candidates, df, total
+
+def tfidf(counts, df, total):
+    vector = {t: (1 + math.log(c)) * (1 + math.log((1 + total) / (1 + df[t]))) for t, c in counts.items()}
+    norm = math.sqrt(sum(v * v for v in vector.values())) or 1.0
+    return {t: v / norm for t, v in vector.items()}
 
-def find_references(query, threshold):
+def cosine(a, b):
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(v * b.get(t, 0.0) for t, v in a.items())
+
+def find_references(query, threshold, manuscript='WEB'):
+    """
+    Rank verses against the query by tf-idf cosine, then pair the best Old
+    Testament hits with the best New Testament hits that resemble each other.
+    """
     logging.info(f"Searching for references related to '{query}' with threshold {threshold}...")
-    
-    # Placeholder for embedding logic
-    # model = SentenceTransformer('all-MiniLM-L6-v2')
-    # embeddings = model.encode(manuscript_texts)
-    
-    found_refs = [
-        {
-            "source": "Isaiah 53:5",
-            "target": "1 Peter 2:24",
-            "similarity": 0.85,
-            "theme": "Healing/Suffering"
-        }
-    ]
-    
+
+    query_counts = Counter(terms(query))
+    candidates, df, total = load_manuscripts(manuscript, set(query_counts))
+    if not candidates:
+        return []
+    query_vector = tfidf(query_counts, df, total)
+
+    scored = []
+    for verse, counts in candidates:
+        vector = tfidf(counts, df, total)
+        scored.append((cosine(query_vector, vector), verse, vector))
+    scored.sort(key=lambda s: -s[0])
+    old = [s for s in scored if s[1]['book'] not in corpus.NT_BOOKS][:TOP_HITS]
+    new = [s for s in scored if s[1]['book'] in corpus.NT_BOOKS][:TOP_HITS]
+
+    found_refs = []
+    for _, source, source_vector in old:
+        for _, target, target_vector in new:
+            similarity = cosine(source_vector, target_vector)
+            if similarity < threshold:
+                continue
+            shared = sorted(source_vector.keys() & target_vector.keys(),
+                            key=lambda t: -(source_vector[t] + target_vector[t]))
+            found_refs.append({
+                "source": f"{source['book']} {source['chapter']}:{source['verse']}",
+                "target": f"{target['book']} {target['chapter']}:{target['verse']}",
+                "similarity": round(similarity, 3),
+                "theme": '/'.join(t.capitalize() for t in shared[:2]),
+            })
+
+    found_refs.sort(key=lambda r: -r['similarity'])
     return found_refs
 
 def main():
     setup_logging()
-    
+
     parser = argparse.ArgumentParser(description="Cross-Reference Discovery Agent")
     parser.add_argument("--query", type=str, required=True, help="Topic or text to search for")
     parser.add_argument("--threshold", type=float, default=0.5, help="Similarity threshold")
+    parser.add_argument("--manuscript", default="WEB", help="Corpus manuscript to search (default: WEB)")
     parser.add_argument("--output", default="cross_references.json", help="Output file")
-    
+
     args = parser.parse_args()
-    
-    # base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-    # manuscripts_dir = os.path.join(base_dir, 'manuscripts')
-    
-    results = find_references(args.query, args.threshold)
-    
+
+    results = find_references(args.query, args.threshold, args.manuscript)
+
     with open(args.output, 'w') as f:
         json.dump(results, f, indent=2)
-    
+
     logging.info(f"Saved {len(results)} references to {args.output}")
 
 if __name__ == "__main__":
+    from corpus import profile_from_argv
+    profile_from_argv()
     main()
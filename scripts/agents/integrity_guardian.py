@@ -1,62 +1,587 @@
 import os
+import re
 import argparse
+import codecs
+import hashlib
+import json
 import logging
+import unicodedata
+from xml.parsers import expat
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import jsonschema
+except ImportError:  # optional: only needed for --json-schema
+    jsonschema = None
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+MANIFEST_PATH = os.path.join(BASE_DIR, 'data', 'cache', 'integrity_manifest.json')
+SCANNED_EXTENSIONS = ('.txt', '.xml', '.json', '.md')
+CHUNK_SIZE = 1024 * 1024
+
+# Hebrew combining points and accents (and the precomposed presentation forms).
+# NFC reorders these by canonical combining class, which is not the order
+# WLC/OSHB encode them in, so --fix leaves pointed Hebrew alone unless asked.
+HEBREW_POINTS_RE = re.compile('[\u0591-\u05BD\u05BF\u05C1\u05C2\u05C4\u05C5\u05C7\uFB1D-\uFB4F]')
 
 def setup_logging():
     logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-def check_file_integrity(filepath, fix_mode=False):
-    # logging.debug(f"Checking {filepath}...")
-    issues = []
-    
+# =============================================================================
+# Stream checks: fed every decoded chunk of every file in a single pass
+# =============================================================================
+
+class BracketBalanceCheck:
+    def __init__(self):
+        self.opened = 0
+        self.closed = 0
+
+    def feed(self, text):
+        self.opened += text.count('(')
+        self.closed += text.count(')')
+
+    def issues(self):
+        if self.opened != self.closed:
+            return ["Mismatched parentheses"]
+        return []
+
+class NormalizationCheck:
+    """Flags text that is not in Unicode NFC (e.g. decomposed niqqud or Greek accents)."""
+
+    def __init__(self):
+        self.offset = 0
+        self.tail = ''
+        self.first_bad = None
+        self.hebrew_points = False
+
+    def feed(self, text):
+        if not self.hebrew_points:
+            self.hebrew_points = HEBREW_POINTS_RE.search(text) is not None
+        # Carry the last character over so a base letter and its combining
+        # marks split across chunks are still checked together
+        window = self.tail + text
+        if self.first_bad is None and not unicodedata.is_normalized('NFC', window):
+            for i in range(len(window)):
+                if not unicodedata.is_normalized('NFC', window[i:i + 8]):
+                    self.first_bad = self.offset - len(self.tail) + i
+                    break
+        self.offset += len(text)
+        self.tail = text[-1:]
+
+    def issues(self):
+        if self.first_bad is not None:
+            return [f"Text not NFC-normalized (first at char {self.first_bad})"]
+        return []
+
+STREAM_CHECKS = [BracketBalanceCheck, NormalizationCheck]
+
+# =============================================================================
+# File validators: registered per extension, each streams the file itself
+# =============================================================================
+
+VALIDATORS = {}
+
+def register_validator(*extensions):
+    def decorator(func):
+        for ext in extensions:
+            VALIDATORS.setdefault(ext, []).append(func)
+        return func
+    return decorator
+
+class VerseSequenceHandler:
+    """
+    Expat callbacks tracking verse markers (OSIS <verse osisID|sID>, <milestone
+    unit="verse">) and checking that chapter/verse numbers only move forward
+    within a book and that a book never reappears after another one started.
+    """
+
+    MAX_ISSUES = 20
+
+    def __init__(self, parser):
+        self.parser = parser
+        self.book = None
+        self.last = None
+        self.seen_books = set()
+        self.issues = []
+        self.markers = 0
+
+    def location(self):
+        p = self.parser
+        return f"line {p.CurrentLineNumber}, column {p.CurrentColumnNumber}, byte {p.CurrentByteIndex}"
+
+    def report(self, message):
+        if len(self.issues) < self.MAX_ISSUES:
+            self.issues.append(f"{message} at {self.location()}")
+
+    def start_element(self, name, attrs):
+        if name not in VERSE_TAGS:
+            return
+        tag = name.lower()
+        if tag == 'verse':
+            if 'eID' in attrs:
+                return
+            ref = attrs.get('osisID') or attrs.get('sID') or attrs.get('id') or attrs.get('n')
+        elif tag == 'milestone' and attrs.get('unit', '').lower() == 'verse':
+            ref = attrs.get('id') or attrs.get('n')
+        else:
+            return
+        if not ref:
+            return
+        # osisID may list several verses ("Gen.1.1 Gen.1.2"); check the span
+        refs = ref.split()
+        for part in (refs[0], refs[-1]) if len(refs) > 1 else refs:
+            self.check(part)
+
+    def check(self, ref):
+        match = VERSE_REF_RE.match(ref)
+        if not match:
+            return
+        book, chapter, verse = match.group(1), int(match.group(2)), int(match.group(3))
+        self.markers += 1
+        if book != self.book:
+            if book in self.seen_books:
+                self.report(f"Book {book} resumes after {self.book} ({ref})")
+            self.seen_books.add(book)
+            self.book, self.last = book, None
+        if self.last is not None and (chapter, verse) <= self.last:
+            self.report(f"Verse {ref} out of sequence after {self.book} {self.last[0]}:{self.last[1]}")
+        self.last = (chapter, verse)
+
+VERSE_TAGS = {'verse', 'Verse', 'milestone', 'Milestone'}
+VERSE_REF_RE = re.compile(r'^(.+?)[.\s](\d+)[.:](\d+)$')
+
+@register_validator('.xml')
+def validate_xml(filepath, options):
+    """
+    Stream the file through expat: no tree is built, so memory stays constant
+    regardless of file size. Reports malformed XML and verse-marker sequencing
+    problems with line, column and byte offset.
+    """
+    parser = expat.ParserCreate()
+    handler = VerseSequenceHandler(parser)
+    if options.get('verse_order', True):
+        parser.StartElementHandler = handler.start_element
+    try:
+        with open(filepath, 'rb') as f:
+            parser.ParseFile(f)
+    except expat.ExpatError as e:
+        handler.issues.append(
+            f"Malformed XML at line {e.lineno}, column {e.offset}, byte {parser.ErrorByteIndex}: "
+            f"{expat.ErrorString(e.code)}"
+        )
+    return handler.issues
+
+JSON_TOKEN_RE = re.compile(r'''
+    (?P<ws>[ \t\n\r]+)
+  | (?P<string>"(?:[^"\\\x00-\x1f]|\\["\\/bfnrt]|\\u[0-9a-fA-F]{4})*")
+  | (?P<number>-?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?(?:[eE][+-]?[0-9]+)?)
+  | (?P<literal>true|false|null)
+  | (?P<punct>[{}\[\]:,])
+''', re.VERBOSE)
+JSON_PARTIAL_STRING_RE = re.compile(r'"(?:[^"\\\x00-\x1f]|\\["\\/bfnrt]|\\u[0-9a-fA-F]{4})*(?:\\(?:u[0-9a-fA-F]{0,3})?)?\Z')
+JSON_PARTIAL_NUMBER_RE = re.compile(r'[-+.0-9eE]*\Z')
+
+def _reject_constant(name):
+    raise ValueError(f"{name} is not JSON")
+
+# Strict about NaN/Infinity, which json accepts by default
+JSON_DECODER = json.JSONDecoder(parse_constant=_reject_constant)
+
+class JsonStreamValidator:
+    """
+    Incremental JSON well-formedness check over decoded chunks. Any object or
+    array that fits in the buffer is handed to the C decoder in one go; larger
+    ones are tokenized with a regex and their nesting tracked on a stack, so
+    memory stays bounded by the chunk size rather than the file. When
+    `on_item` is given, each element of a top-level array is decoded and
+    passed to it as soon as it is complete.
+    """
+
+    def __init__(self, on_item=None):
+        self.on_item = on_item
+        self.buffer = ''
+        self.offset = 0      # chars consumed before self.buffer
+        self.line = 1
+        self.stack = []
+        self.expect = 'value'
+        self.top_level = None
+        self.item_start = None
+        self.item_parts = []
+        self.error = None
+
+    def feed(self, text, final=False):
+        if self.error:
+            return
+        buffer = self.buffer + text
+        pos, end = 0, len(buffer)
+        while pos < end:
+            match = JSON_TOKEN_RE.match(buffer, pos)
+            # A token running into the chunk boundary may continue in the next chunk
+            if match is None or (not final and match.lastgroup in ('number', 'literal')
+                                 and self._incomplete(buffer, pos)):
+                if not final and self._incomplete(buffer, pos):
+                    break
+                self._fail(buffer, pos, f"unexpected {buffer[pos:pos + 10]!r}")
+                return
+            kind = match.lastgroup
+            # The top-level array itself is tokenized when its elements are wanted one by one
+            if (kind == 'punct' and match.group() in '{[' and self.expect in ('value', '[close')
+                    and not (self.on_item and not self.stack)):
+                decoded = self._decode_container(buffer, pos, final)
+                if decoded == 'wait':
+                    break
+                if decoded is not None:
+                    value, pos = decoded
+                    self._value_started(match.group(), pos)
+                    self._value_done(buffer, pos, value)
+                    continue
+            if kind != 'ws':
+                error = self._step(match.group() if kind == 'punct' else kind, buffer, pos, match.end())
+                if error:
+                    self._fail(buffer, pos, error)
+                    return
+            pos = match.end()
+
+        if self.item_start is not None:
+            self.item_parts.append(buffer[self.item_start:pos])
+            self.item_start = 0
+        self.line += buffer.count('\n', 0, pos)
+        self.offset += pos
+        self.buffer = buffer[pos:]
+
+    @staticmethod
+    def _decode_container(buffer, start, final):
+        """
+        (value, end) if the container at `start` decodes completely, 'wait' if
+        it is cut off by the end of a small buffer, None to tokenize it instead
+        (too large, or malformed: tokenizing pinpoints the error).
+        """
+        try:
+            return JSON_DECODER.raw_decode(buffer, start)
+        except json.JSONDecodeError as e:
+            truncated = e.pos >= len(buffer) - 64 or e.msg.startswith('Unterminated string')
+            if truncated and not final and len(buffer) - start < CHUNK_SIZE:
+                return 'wait'
+        except ValueError:
+            pass
+        return None
+
+    def close(self):
+        self.feed('', final=True)
+        if not self.error and self.expect != 'end':
+            self._fail(self.buffer, len(self.buffer), "unexpected end of file")
+
+    @staticmethod
+    def _incomplete(buffer, pos):
+        """True if everything from `pos` to the end of `buffer` could be the start of a token."""
+        if buffer.startswith('"', pos):
+            return JSON_PARTIAL_STRING_RE.match(buffer, pos) is not None
+        return (JSON_PARTIAL_NUMBER_RE.match(buffer, pos) is not None
+                or any(literal.startswith(buffer[pos:]) for literal in ('true', 'false', 'null')))
+
+    def _step(self, token, buffer, start, end):
+        expect = self.expect
+        if expect == 'end':
+            return "trailing data after the JSON document"
+        if token in ('}', ']'):
+            opener = '{' if token == '}' else '['
+            if not self.stack or self.stack[-1] != opener or expect not in ('comma_or_close', opener + 'close'):
+                return f"unexpected {token!r}"
+            self.stack.pop()
+            self._value_done(buffer, end)
+        elif token == ',':
+            if expect != 'comma_or_close':
+                return "unexpected ','"
+            self.expect = 'key' if self.stack[-1] == '{' else 'value'
+        elif token == ':':
+            if expect != 'colon':
+                return "unexpected ':'"
+            self.expect = 'value'
+        elif expect in ('key', '{close'):
+            if token != 'string':
+                return "expected an object key"
+            self.expect = 'colon'
+        elif expect in ('value', '[close'):
+            self._value_started(token, start)
+            if token in ('{', '['):
+                self.stack.append(token)
+                self.expect = token + 'close'
+            else:
+                self._value_done(buffer, end)
+        else:
+            return f"unexpected {token}"
+        return None
+
+    def _value_started(self, token, start):
+        if self.top_level is None:
+            self.top_level = token
+        if self.on_item and self.stack == ['[']:
+            self.item_start = start
+
+    def _value_done(self, buffer, end, value=None):
+        if not self.stack:
+            self.expect = 'end'
+            return
+        self.expect = 'comma_or_close'
+        if self.item_start is not None and self.stack == ['[']:
+            if value is None:
+                self.item_parts.append(buffer[self.item_start:end])
+                value = json.loads(''.join(self.item_parts))
+            self.item_parts, self.item_start = [], None
+            self.on_item(value)
+
+    def _fail(self, buffer, pos, message):
+        line = self.line + buffer.count('\n', 0, pos)
+        self.error = f"Malformed JSON at line {line}, char {self.offset + pos}: {message}"
+
+class ArrayItemSchemaCheck:
+    """
+    Validates the elements of a top-level array one at a time against the
+    schema of the whole array. Each element is validated as a one-element
+    array, so "items", $ref and definitions resolve as they would against the
+    whole document; minItems/maxItems are checked on the final count.
+    """
+
+    MAX_ISSUES = 10
+    ROOT_KEYWORDS = {'$schema', '$id', 'id', '$comment', 'title', 'description', 'type',
+                     'items', 'minItems', 'maxItems', 'definitions', '$defs'}
+
+    def __init__(self, schema):
+        self.schema = schema
+        self.validator = jsonschema.Draft7Validator(
+            {k: v for k, v in schema.items() if k not in ('minItems', 'maxItems')})
+        self.count = 0
+        self.errors = []
+
+    @classmethod
+    def applies(cls, schema):
+        """False for schemas that need the whole array at once (uniqueItems, contains, tuple items, ...)."""
+        return set(schema) <= cls.ROOT_KEYWORDS and isinstance(schema.get('items', {}), dict)
+
+    def feed(self, item):
+        index, self.count = self.count, self.count + 1
+        if len(self.errors) >= self.MAX_ISSUES:
+            return
+        errors = sorted(self.validator.iter_errors([item]), key=lambda e: list(e.path))
+        self.errors.extend(schema_issue(e, [index] + list(e.path)[1:]) for e in errors)
+
+    def issues(self):
+        issues = self.errors[:self.MAX_ISSUES]
+        if self.count < self.schema.get('minItems', 0):
+            issues.append(f"Schema violation at /: {self.count} items, minItems is {self.schema['minItems']}")
+        if self.count > self.schema.get('maxItems', self.count):
+            issues.append(f"Schema violation at /: {self.count} items, maxItems is {self.schema['maxItems']}")
+        return issues
+
+def schema_issue(error, path):
+    return f"Schema violation at /{'/'.join(map(str, path))}: {error.message}"
+
+@register_validator('.json')
+def validate_json(filepath, options):
+    """
+    Stream the file through JsonStreamValidator. With --json-schema, a
+    top-level array is validated element by element as it streams past; any
+    other document, or a schema ArrayItemSchemaCheck cannot split, is loaded
+    in full for validation once it is known to be well-formed.
+    """
+    schema = options.get('json_schema') if jsonschema is not None else None
+    items = ArrayItemSchemaCheck(schema) if schema and ArrayItemSchemaCheck.applies(schema) else None
+    scanner = JsonStreamValidator(items.feed if items else None)
     try:
         with open(filepath, 'r', encoding='utf-8') as f:
-            content = f.read()
-            
-        # Placeholder Checks:
-        # 1. Check for valid XML/JSON structure
-        # 2. Check for matching parentheses/brackets
-        if content.count('(') != content.count(')'):
-            issues.append("Mismatched parentheses")
-            
-        if fix_mode and issues:
-            logging.info(f"Attempting to fix {filepath}...")
-            # Implement fix logic
-            
-    except Exception as e:
-        issues.append(f"Read Error: {str(e)}")
-        
-    return issues
-
-def scan_directory(directory, fix_mode):
+            while not scanner.error:
+                chunk = f.read(CHUNK_SIZE)
+                if not chunk:
+                    scanner.close()
+                    break
+                scanner.feed(chunk)
+    except UnicodeDecodeError as e:
+        return [f"Malformed JSON: {e}"]
+    if scanner.error:
+        return [scanner.error]
+
+    if not schema:
+        return []
+    if items and scanner.top_level == '[':
+        return items.issues()
+    with open(filepath, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    errors = sorted(jsonschema.Draft7Validator(schema).iter_errors(data), key=lambda e: list(e.path))
+    return [schema_issue(e, e.path) for e in errors[:10]]
+
+# =============================================================================
+# Scanner
+# =============================================================================
+
+def normalize_file(filepath):
+    """Rewrite a file in NFC, streaming through a temporary file."""
+    tmp_path = filepath + '.nfc.tmp'
+    with open(filepath, 'r', encoding='utf-8') as src, open(tmp_path, 'w', encoding='utf-8') as dst:
+        for line in src:
+            dst.write(unicodedata.normalize('NFC', line))
+    os.replace(tmp_path, filepath)
+
+def checks_fingerprint(options):
+    """
+    Hash of everything besides a file's contents that decides its issues: the
+    scan options, whether jsonschema is installed and this module's checks.
+    Manifest entries recorded under a different fingerprint are rechecked.
+    """
+    digest = hashlib.sha256(json.dumps(options, sort_keys=True).encode('utf-8'))
+    digest.update(getattr(jsonschema, '__version__', 'no jsonschema').encode('utf-8'))
+    with open(os.path.abspath(__file__), 'rb') as f:
+        digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+def check_file_integrity(filepath, fix_mode=False, options=None, known=None, fix_hebrew=False):
+    """
+    Stream a file once to hash it and run the stream checks, then run the
+    validators registered for its extension. If the hash matches `known`
+    (sha256, issues) from the manifest, the validators are skipped. With
+    `fix_mode`, files that are not NFC are rewritten, except pointed Hebrew
+    unless `fix_hebrew` is set.
+
+    Returns (issues, sha256).
+    """
+    options = options or {}
+    issues = []
+    digest = hashlib.sha256()
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    checks = [check() for check in STREAM_CHECKS]
+    position = 0
+
+    try:
+        with open(filepath, 'rb') as f:
+            while True:
+                chunk = f.read(CHUNK_SIZE)
+                final = not chunk
+                digest.update(chunk)
+                if decoder is not None:
+                    try:
+                        text = decoder.decode(chunk, final=final)
+                    except UnicodeDecodeError as e:
+                        issues.append(f"Invalid UTF-8 at byte {position + e.start}")
+                        decoder = None
+                    else:
+                        for check in checks:
+                            check.feed(text)
+                position += len(chunk)
+                if final:
+                    break
+    except OSError as e:
+        return [f"Read Error: {str(e)}"], None
+
+    sha256 = digest.hexdigest()
+    if known and known[0] == sha256 and not fix_mode:
+        return known[1], sha256
+
+    if decoder is not None:
+        for check in checks:
+            issues.extend(check.issues())
+        ext = os.path.splitext(filepath)[1].lower()
+        for validator in VALIDATORS.get(ext, []):
+            issues.extend(validator(filepath, options))
+
+    if fix_mode and any(issue.startswith("Text not NFC") for issue in issues):
+        if checks[STREAM_CHECKS.index(NormalizationCheck)].hebrew_points and not fix_hebrew:
+            logging.warning(f"Not normalizing {filepath}: NFC would reorder its Hebrew points (--fix-hebrew to force)")
+        else:
+            logging.info(f"Normalizing {filepath} to NFC...")
+            normalize_file(filepath)
+            return check_file_integrity(filepath, False, options)
+
+    return issues, sha256
+
+def _check_worker(task):
+    path, fix_mode, options, known, fix_hebrew = task
+    issues, sha256 = check_file_integrity(path, fix_mode, options, known, fix_hebrew)
+    return path, issues, sha256
+
+def load_manifest(path):
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return {}
+
+def save_manifest(manifest, path):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def scan_directory(directory, fix_mode, manifest_path=MANIFEST_PATH, workers=None, options=None, full=False,
+                   fix_hebrew=False):
+    """
+    Scan every manuscript file, skipping files whose (size, mtime) match the
+    manifest from the previous run with the same checks fingerprint. Changed
+    files are checked across a process pool.
+    """
     logging.info(f"Scanning {directory} for integrity issues...")
-    report = {}
-    
+    options = options or {}
+    fingerprint = checks_fingerprint(options)
+    manifest = {} if full else load_manifest(manifest_path)
+    current = {}
+    pending = []
+
     for root, dirs, files in os.walk(directory):
         for file in files:
-            if file.endswith(('.txt', '.xml', '.json', '.md')):
+            if file.endswith(SCANNED_EXTENSIONS):
                 path = os.path.join(root, file)
-                issues = check_file_integrity(path, fix_mode)
-                if issues:
-                    report[path] = issues
-                    
-    return report
+                stat = os.stat(path)
+                entry = manifest.get(path)
+                if entry and entry.get('checks') != fingerprint:
+                    entry = None
+                if entry and entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime and not fix_mode:
+                    current[path] = entry
+                else:
+                    current[path] = {'size': stat.st_size, 'mtime': stat.st_mtime, 'checks': fingerprint}
+                    known = (entry['sha256'], entry['issues']) if entry and 'sha256' in entry else None
+                    pending.append((path, known))
+
+    logging.info(f"{len(current)} files, {len(current) - len(pending)} unchanged since last scan")
+
+    tasks = [(path, fix_mode, options, known, fix_hebrew) for path, known in pending]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for path, issues, sha256 in pool.map(_check_worker, tasks, chunksize=8):
+            if fix_mode:
+                stat = os.stat(path)
+                current[path].update(size=stat.st_size, mtime=stat.st_mtime)
+            current[path].update(sha256=sha256, issues=issues)
+
+    save_manifest(current, manifest_path)
+    return {path: entry['issues'] for path, entry in current.items() if entry.get('issues')}
 
 def main():
     setup_logging()
-    
+
     parser = argparse.ArgumentParser(description="Data Integrity Guardian")
     parser.add_argument("--directory", default="manuscripts", help="Directory to scan")
     parser.add_argument("--fix", action="store_true", help="Attempt to auto-fix issues")
+    parser.add_argument("--fix-hebrew", action="store_true",
+                        help="With --fix, also NFC-normalize pointed Hebrew (reorders points; off by default)")
     parser.add_argument("--output", default="integrity_report.log", help="Output file")
-    
+    parser.add_argument("--manifest", default=MANIFEST_PATH, help="Manifest of previously scanned files")
+    parser.add_argument("--full", action="store_true", help="Ignore the manifest and rescan every file")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--json-schema", help="JSON Schema that every .json file must satisfy")
+    parser.add_argument("--skip-verse-order", action="store_true", help="Only check XML well-formedness, not verse sequencing")
+
     args = parser.parse_args()
-    
+
     base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
     target_dir = os.path.join(base_dir, args.directory)
-    
-    report = scan_directory(target_dir, args.fix)
-    
+
+    options = {'verse_order': not args.skip_verse_order}
+    if args.json_schema:
+        if jsonschema is None:
+            logging.warning("jsonschema is not installed; .json files are only checked for well-formedness")
+        with open(args.json_schema, 'r', encoding='utf-8') as f:
+            options['json_schema'] = json.load(f)
+
+    report = scan_directory(target_dir, args.fix, args.manifest, args.workers, options, args.full,
+                            args.fix_hebrew)
+
     if report:
         logging.warning(f"Found issues in {len(report)} files.")
         with open(args.output, 'w') as f:
@@ -67,4 +592,6 @@ def main():
         logging.info("No integrity issues found. System is clean.")
 
 if __name__ == "__main__":
+    from corpus import profile_from_argv
+    profile_from_argv()
     main()
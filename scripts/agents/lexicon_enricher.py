@@ -1,46 +1,115 @@
-import os
+import re
 import argparse
 import json
 import logging
 from collections import Counter
 
+import corpus
+
+DEFAULT_MANUSCRIPTS = ['WLC', 'LXX', 'SBLGNT']
+FUNCTION_POS = {'article', 'conjunction', 'preposition', 'particle'}
+STRONGS_RE = re.compile(r'^([HG])0*(\d+)[a-zA-Z]?$')
+
 def setup_logging():
     logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-def analyze_word_usage(target_word, context_window=5):
+def token_key(token):
+    """Strong's number when the token has one, otherwise its lemma or surface form."""
+    if token['strongs']:
+        return token['strongs'][0]
+    return token['lemma'] or corpus.fold_greek(token['surface'])
+
+def token_matcher(target):
+    """
+    Predicate for the tokens a target denotes. A Strong's number matches
+    tagged tokens (WLC, LXX); a G number also matches SBLGNT tokens, which
+    carry lemmas instead, through the lexicon headword.
+    """
+    match = STRONGS_RE.match(target.strip())
+    if match:
+        strong = f"{match.group(1).upper()}{int(match.group(2))}"
+        entry = corpus.lexicon().get(strong) if strong.startswith('G') else None
+        headword = corpus.fold_greek(entry['original_word']) if entry and entry.get('original_word') else None
+        if headword:
+            return lambda token: strong in token['strongs'] or token['lemma'] == headword
+        return lambda token: strong in token['strongs']
+    folded = corpus.fold_greek(target.strip())
+    return lambda token: folded in (token['lemma'], corpus.fold_greek(token['surface']))
+
+def lexicon_entry(target):
+    """Headword, transliteration and gloss for a Strong's number, from the local lexicon cache."""
+    match = STRONGS_RE.match(target.strip())
+    if not match:
+        return None
+    entry = corpus.lexicon().get(f"{match.group(1).upper()}{int(match.group(2))}")
+    if not entry:
+        return None
+    return {k: entry[k] for k in ('original_word', 'transliteration', 'part_of_speech', 'short_definition')}
+
+def analyze_word_usage(target_word, context_window=5, manuscripts=None):
+    """
+    Count occurrences of a Strong's number or lemma across the morphology-tagged
+    manuscripts, with the content words that most often appear within
+    `context_window` tokens of it.
+    """
     logging.info(f"Analyzing usage of {target_word} with context window {context_window}...")
-    
-    # Placeholder for logic:
-    # 1. Glob all greek/hebrew files.
-    # 2. Find all occurrences of target_word.
-    # 3. Extract surrounding words.
-    
-    # Mock result
+
+    matches = token_matcher(target_word)
+    manuscripts = manuscripts or DEFAULT_MANUSCRIPTS
+    if STRONGS_RE.match(target_word.strip()):
+        # Hebrew numbers only occur in WLC; Greek numbers never do
+        hebrew = target_word.strip().upper().startswith('H')
+        manuscripts = [m for m in manuscripts if (m == 'WLC') == hebrew]
+
+    occurrences = 0
+    collocations = Counter()
+    forms = Counter()
+    books = Counter()
+    for manuscript in manuscripts:
+        for verse in corpus.iter_verses(manuscript):
+            tokens = corpus.verse_tokens(verse)
+            for i, token in enumerate(tokens):
+                if not matches(token):
+                    continue
+                occurrences += 1
+                forms[token['surface']] += 1
+                books[f"{manuscript} {verse['book']}"] += 1
+                lo, hi = max(0, i - context_window), i + context_window + 1
+                for j in range(lo, min(hi, len(tokens))):
+                    neighbour = tokens[j]
+                    if j != i and neighbour['pos'] not in FUNCTION_POS and not matches(neighbour):
+                        collocations[token_key(neighbour)] += 1
+
     usage_stats = {
         "word": target_word,
-        "occurrences": 154,
-        "common_collocations": [("love", 50), ("God", 30), ("brother", 10)],
-        "semantic_range": ["affection", "divine love", "brotherly love"]
+        "lexicon": lexicon_entry(target_word),
+        "occurrences": occurrences,
+        "common_collocations": collocations.most_common(20),
+        "forms": forms.most_common(20),
+        "distribution": dict(books.most_common()),
     }
-    
+
     return usage_stats
 
 def main():
     setup_logging()
-    
+
     parser = argparse.ArgumentParser(description="Lexicon Enrichment Agent")
     parser.add_argument("--target", type=str, required=True, help="Strong's number or word to analyze")
     parser.add_argument("--context-window", type=int, default=5, help="Number of words to analyze around the target")
+    parser.add_argument("--manuscripts", nargs="+", help=f"Manuscript codes to search (default: {' '.join(DEFAULT_MANUSCRIPTS)})")
     parser.add_argument("--output", default="lexicon_update.json", help="Output file")
-    
+
     args = parser.parse_args()
-    
-    result = analyze_word_usage(args.target, args.context_window)
-    
+
+    result = analyze_word_usage(args.target, args.context_window, args.manuscripts)
+
     with open(args.output, 'w') as f:
-        json.dump(result, f, indent=2)
-    
+        json.dump(result, f, indent=2, ensure_ascii=False)
+
     logging.info(f"Enrichment data saved to {args.output}")
 
 if __name__ == "__main__":
+    from corpus import profile_from_argv
+    profile_from_argv()
     main()
@@ -2,64 +2,358 @@ import os
 import argparse
 import json
 import logging
+import math
 import re
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from xml.parsers import expat
+
+import corpus
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+NAMES_CACHE = os.path.join(BASE_DIR, 'data', 'cache', 'names.json')
+CHUNK_SIZE = 1024 * 1024
+
+# Boundary detection
+WINDOW = 4                 # verses compared on each side of a gap
+MIN_UNIT = 3               # shortest narrative unit, in verses
+WEIGHT_CHAPTER = 0.35
+WEIGHT_TOPIC = 0.40
+WEIGHT_NAMES = 0.25
+
+STOPWORDS = {
+    'the', 'and', 'of', 'to', 'in', 'that', 'he', 'his', 'for', 'a', 'is', 'was', 'they', 'i',
+    'with', 'not', 'him', 'be', 'all', 'shall', 'them', 'it', 'you', 'your', 'will', 'my', 'me',
+    'from', 'who', 'their', 'have', 'on', 'are', 'which', 'by', 'as', 'said', 'when', 'there',
+    'but', 'we', 'this', 'were', 'an', 'so', 'then', 'also', 'had', 'her', 'she', 'one',
+    'up', 'out', 'into', 'at', 'because', 'no', 'what', 'if', 'us', 'our', 'came', 'went',
+    'let', 'do', 'been', 'or', 'these', 'those', 'upon', 'unto', 'thee', 'thou', 'thy', 'ye',
+}
+WORD_RE = re.compile(r"[^\W\d_]+(?:'[^\W\d_]+)?")
+TEXT_LINE_RE = re.compile(r'^\s*(.+?)\s+(\d+):(\d+)\s+(.*)$')
+XML_REF_RE = re.compile(r'^(.+?)\.(\d+)\.(\d+)$')
+JSON_SEPARATOR_RE = re.compile(r'[ \t\r\n,\[\]]*')
+
+_names = set()
 
 def setup_logging():
     logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-def extract_narratives(file_path):
+# =============================================================================
+# Streaming readers: each yields {book, chapter, verse, text} in file order
+# =============================================================================
+
+def read_text(file_path):
+    """Lines of 'BOOK<TAB>chapter<TAB>verse<TAB>text' or 'Book chapter:verse text'."""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            parts = line.rstrip('\n').split('\t')
+            if len(parts) >= 4 and parts[1].isdigit() and parts[2].isdigit():
+                yield {'book': parts[0], 'chapter': int(parts[1]), 'verse': int(parts[2]), 'text': parts[3]}
+                continue
+            match = TEXT_LINE_RE.match(line)
+            if match:
+                book, chapter, verse, text = match.groups()
+                yield {'book': book, 'chapter': int(chapter), 'verse': int(verse), 'text': text}
+
+def read_xml(file_path):
+    """OSIS verses, either <verse osisID> containers or sID/eID milestones."""
+    ready = []
+    current = {'ref': None, 'text': [], 'depth': 0, 'milestone': False}
+
+    def emit():
+        match = XML_REF_RE.match(current['ref'].split()[0])
+        if match:
+            ready.append({
+                'book': match.group(1), 'chapter': int(match.group(2)), 'verse': int(match.group(3)),
+                'text': ' '.join(''.join(current['text']).split()),
+            })
+        current['ref'], current['text'] = None, []
+
+    def start(name, attrs):
+        if name == 'verse' and ('sID' in attrs or 'eID' in attrs):
+            if current['ref']:
+                emit()
+            if 'sID' in attrs:
+                current['ref'], current['milestone'] = attrs['sID'], True
+        elif name == 'verse' and 'osisID' in attrs:
+            current['ref'], current['milestone'], current['depth'] = attrs['osisID'], False, 0
+        if current['ref'] and not current['milestone']:
+            current['depth'] += 1
+
+    def end(name):
+        if current['ref'] and not current['milestone']:
+            current['depth'] -= 1
+            if current['depth'] == 0:
+                emit()
+
+    def chars(data):
+        if current['ref']:
+            current['text'].append(data)
+
+    parser = expat.ParserCreate()
+    parser.StartElementHandler = start
+    parser.EndElementHandler = end
+    parser.CharacterDataHandler = chars
+    with open(file_path, 'rb') as f:
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            parser.Parse(chunk, not chunk)
+            yield from ready
+            ready.clear()
+            if not chunk:
+                break
+
+def read_json(file_path):
+    """
+    JSON lines, or a JSON array of verse rows decoded one element at a time.
+    Raises ValueError with the character offset on malformed or truncated input.
+    """
+    decoder = json.JSONDecoder()
+    with open(file_path, 'r', encoding='utf-8') as f:
+        buffer, idx, consumed = '', 0, 0
+        eof = False
+        while True:
+            idx = JSON_SEPARATOR_RE.match(buffer, idx).end()
+            try:
+                row, idx = decoder.raw_decode(buffer, idx)
+            except ValueError as e:
+                # Only an error near the end of the buffer can be a row cut off by the chunk boundary
+                cut_off = isinstance(e, json.JSONDecodeError) and (
+                    e.pos >= len(buffer) - 64 or e.msg.startswith('Unterminated string'))
+                if eof and idx == len(buffer):
+                    break
+                if eof or not cut_off:
+                    pos = consumed + (e.pos if isinstance(e, json.JSONDecodeError) else idx)
+                    raise ValueError(f"{file_path}: malformed JSON at char {pos}: "
+                                     f"{getattr(e, 'msg', e)}") from None
+                chunk = f.read(CHUNK_SIZE)
+                eof = not chunk
+                consumed += idx
+                buffer, idx = buffer[idx:] + chunk, 0
+                continue
+            yield {'book': row['book'], 'chapter': int(row['chapter']), 'verse': int(row['verse']),
+                   'text': row.get('text') or ''}
+
+def read_corpus(manuscript):
+    """Verses of a manuscript from the shared corpus snapshots (source is a manuscript code)."""
+    for v in corpus.iter_verses(manuscript):
+        yield {'book': v['book'], 'chapter': v['chapter'], 'verse': v['verse'], 'text': v['text']}
+
+READERS = {'text': read_text, 'xml': read_xml, 'json': read_json, 'corpus': read_corpus}
+
+def iter_books(verses):
+    """Group a verse stream into consecutive (book, [verses]) runs."""
+    book, batch = None, []
+    for v in verses:
+        if v['book'] != book and batch:
+            yield book, batch
+            batch = []
+        book = v['book']
+        batch.append(v)
+    if batch:
+        yield book, batch
+
+# =============================================================================
+# Name lexicon (theophoric_names + name_mappings)
+# =============================================================================
+
+def load_names(names_path=NAMES_CACHE):
+    """
+    English personal and divine names used for character density. Read from a
+    local cache; when missing, fetched once from Supabase and cached.
+    """
+    if os.path.exists(names_path):
+        with open(names_path, 'r', encoding='utf-8') as f:
+            return set(json.load(f))
+
+    names = set()
+    for table, columns in (('theophoric_names', 'name_english'),
+                           ('name_mappings', 'traditional_rendering,restored_rendering')):
+        rows = corpus.rest_get(table, {"select": columns})
+        if rows is None:
+            logging.warning(f"No name cache at {names_path} and no SUPABASE_URL; using capitalised words only")
+            return set()
+        for row in rows:
+            names.update(v for v in row.values() if v)
+
+    os.makedirs(os.path.dirname(names_path), exist_ok=True)
+    with open(names_path, 'w', encoding='utf-8') as f:
+        json.dump(sorted(names), f, ensure_ascii=False, indent=1)
+    logging.info(f"Cached {len(names)} names to {names_path}")
+    return names
+
+def _init_worker(names):
+    global _names
+    _names = names
+
+# =============================================================================
+# Segmentation
+# =============================================================================
+
+def analyze_verse(text):
+    words = WORD_RE.findall(text)
+    content = Counter(w.lower() for w in words if w.lower() not in STOPWORDS and len(w) > 2)
+    if _names:
+        names = {w for w in words if w in _names}
+    else:
+        # Without a name list, treat mid-sentence capitalised words as names
+        names = {w for w in words[1:] if w[0].isupper() and w.lower() not in STOPWORDS}
+    return content, names, len(words)
+
+def cosine(a, b):
+    if not a or not b:
+        return 0.0
+    dot = sum(count * b.get(word, 0) for word, count in a.items())
+    norm = math.sqrt(sum(c * c for c in a.values())) * math.sqrt(sum(c * c for c in b.values()))
+    return dot / norm if norm else 0.0
+
+def window_sum(items, start, end):
+    total = Counter()
+    for counter in items[max(start, 0):end]:
+        total.update(counter)
+    return total
+
+def boundary_scores(verses, analyses):
+    """Score each gap i (between verse i-1 and i) as a pericope boundary."""
+    contents = [a[0] for a in analyses]
+    names = [Counter(a[1]) for a in analyses]
+    scores = [0.0] * len(verses)
+    for i in range(1, len(verses)):
+        chapter_break = 1.0 if verses[i]['chapter'] != verses[i - 1]['chapter'] else 0.0
+        topic_shift = 1.0 - cosine(window_sum(contents, i - WINDOW, i), window_sum(contents, i, i + WINDOW))
+        before = set(window_sum(names, i - WINDOW, i))
+        after = set(window_sum(names, i, i + WINDOW))
+        union = before | after
+        name_shift = 1.0 - len(before & after) / len(union) if union else 0.0
+        scores[i] = WEIGHT_CHAPTER * chapter_break + WEIGHT_TOPIC * topic_shift + WEIGHT_NAMES * name_shift
+    return scores
+
+def pick_boundaries(scores):
+    """Local maxima above mean + 0.5 stdev, at least MIN_UNIT verses apart."""
+    gaps = scores[1:]
+    if not gaps:
+        return [0]
+    mean = sum(gaps) / len(gaps)
+    stdev = math.sqrt(sum((s - mean) ** 2 for s in gaps) / len(gaps))
+    threshold = mean + 0.5 * stdev
+
+    candidates = sorted(
+        (i for i in range(1, len(scores))
+         if scores[i] >= threshold
+         and scores[i] >= scores[i - 1]
+         and (i + 1 >= len(scores) or scores[i] >= scores[i + 1])),
+        key=lambda i: -scores[i],
+    )
+    chosen = [0]
+    for i in candidates:
+        if all(abs(i - j) >= MIN_UNIT for j in chosen) and len(scores) - i >= MIN_UNIT:
+            chosen.append(i)
+    return sorted(chosen)
+
+def describe_unit(book, verses, analyses, book_terms):
+    content, names, word_count = Counter(), Counter(), 0
+    for text_terms, verse_names, count in analyses:
+        content.update(text_terms)
+        names.update(sorted(verse_names))
+        word_count += count
+
+    # Themes: terms over-represented in this unit relative to the whole book
+    total_book = sum(book_terms.values()) or 1
+    total_unit = sum(content.values()) or 1
+    themes = sorted(
+        content,
+        key=lambda w: -(content[w] / total_unit) * math.log(total_book / book_terms[w]),
+    )[:5]
+    characters = [name for name, _ in names.most_common(5)]
+
+    first, last = verses[0], verses[-1]
+    if first['chapter'] == last['chapter']:
+        reference = f"{book} {first['chapter']}:{first['verse']}-{last['verse']}"
+    else:
+        reference = f"{book} {first['chapter']}:{first['verse']}-{last['chapter']}:{last['verse']}"
+
+    name_density = sum(names.values()) / word_count if word_count else 0.0
+    unit_type = "Story" if name_density >= 0.03 and len(characters) >= 2 else "Teaching"
+    score = name_density * len(characters) * math.log(1 + len(verses))
+
+    title = " and ".join(characters[:2]) if characters else themes[0].capitalize() if themes else reference
+    return {
+        "title": title,
+        "reference": reference,
+        "type": unit_type,
+        "characters": characters,
+        "themes": themes,
+        "verse_count": len(verses),
+        "name_density": round(name_density, 4),
+        "score": round(score, 4),
+        "excerpt": first['text'][:200],
+    }
+
+def segment_book(task):
+    book, verses = task
+    analyses = [analyze_verse(v['text']) for v in verses]
+    book_terms = Counter()
+    for content, _, _ in analyses:
+        book_terms.update(content)
+
+    starts = pick_boundaries(boundary_scores(verses, analyses))
+    ends = starts[1:] + [len(verses)]
+    return [
+        describe_unit(book, verses[s:e], analyses[s:e], book_terms)
+        for s, e in zip(starts, ends)
+    ]
+
+def extract_narratives(file_path, file_format='text', workers=None, names=None):
     logging.info(f"Mining narratives from {file_path}...")
-    
+
+    reader = READERS.get(file_format)
+    if reader is None:
+        raise ValueError(f"Unsupported format: {file_format} (expected one of {', '.join(READERS)})")
+    if names is None:
+        names = load_names()
+
     opportunities = []
-    
-    # Placeholder Logic:
-    # 1. Read file.
-    # 2. Split by Chapter/Section headers.
-    # 3. Simple Keyword analysis to guess themes.
-    
-    # Simulating finding the story of David and Goliath
-    opportunities.append({
-        "title": "David and Goliath",
-        "reference": "1 Samuel 17",
-        "type": "Story",
-        "characters": ["David", "Goliath", "Saul"],
-        "themes": ["Courage", "Faith", "Underdog"],
-        "plot_summary": "A young shepherd defeats a giant warrior with a sling.",
-        "content_idea": "Great for a motivational post about overcoming giant obstacles."
-    })
-
-    # Simulating finding the Sermon on the Mount
-    opportunities.append({
-        "title": "The Beatitudes",
-        "reference": "Matthew 5",
-        "type": "Teaching",
-        "characters": ["Jesus", "Disciples"],
-        "themes": ["Blessing", "Humility", "Ethics"],
-        "plot_summary": "Jesus teaches about who is blessed in the Kingdom of Heaven.",
-        "content_idea": "Series of tweets breaking down each Beatitude."
-    })
-    
+    max_in_flight = 2 * (workers or os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(names,)) as pool:
+        # Keep only a few books in flight so the reader stays ahead of the
+        # workers without buffering the whole canon
+        in_flight = deque()
+        for task in iter_books(reader(file_path)):
+            in_flight.append(pool.submit(segment_book, task))
+            if len(in_flight) >= max_in_flight:
+                opportunities.extend(in_flight.popleft().result())
+        while in_flight:
+            opportunities.extend(in_flight.popleft().result())
+
+    opportunities.sort(key=lambda u: -u['score'])
     return opportunities
 
 def main():
     setup_logging()
-    
+
     parser = argparse.ArgumentParser(description="Narrative Extraction Agent")
-    parser.add_argument("--source", type=str, required=True, help="Path to manuscript file")
-    parser.add_argument("--format", type=str, default="text", help="File format (text, xml, json)")
+    parser.add_argument("--source", type=str, required=True, help="Path to manuscript file (manuscript code with --format corpus)")
+    parser.add_argument("--format", type=str, default="text", choices=sorted(READERS), help="File format (text, xml, json, or corpus snapshots)")
     parser.add_argument("--output", default="content_opportunities.json", help="Output file")
-    
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--top", type=int, default=None, help="Keep only the N highest-ranked units")
+
     args = parser.parse_args()
-    
-    # In a real scenario, we would check if file exists:
-    # if not os.path.exists(args.source): ...
 
-    results = extract_narratives(args.source)
-    
+    if args.format != 'corpus' and not os.path.exists(args.source):
+        parser.error(f"source file not found: {args.source}")
+
+    results = extract_narratives(args.source, args.format, args.workers)
+    if args.top:
+        results = results[:args.top]
+
     with open(args.output, 'w') as f:
         json.dump(results, f, indent=2)
-    
+
     logging.info(f"Extracted {len(results)} content opportunities to {args.output}")
 
 if __name__ == "__main__":
+    from corpus import profile_from_argv
+    profile_from_argv()
     main()
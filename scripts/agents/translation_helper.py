@@ -1,47 +1,219 @@
-import os
+import re
 import argparse
 import json
 import logging
 
+from corpus import HEBREW_PREFIXES, fold_greek, parse_reference, default_manuscript, get_tokens, lexicon
+
+# English words that can render a closed-class source token on their own
+CLOSED_CLASS = {
+    'article': {'the', 'a', 'an'},
+    'conjunction': {'and', 'but', 'or', 'for', 'so', 'then', 'that', 'because', 'now', 'yet', 'if'},
+    'preposition': {'in', 'into', 'on', 'at', 'to', 'from', 'with', 'by', 'for', 'of', 'through',
+                    'upon', 'over', 'under', 'before', 'after', 'among', 'against', 'out', 'about'},
+    'particle': {'not', 'no', 'indeed', 'behold', 'lo', 'even', 'also'},
+}
+
+CONTENT_POS = {'noun', 'verb', 'adjective', 'adverb', 'pronoun'}
+
+IRREGULAR_FORMS = {
+    'am': 'be', 'is': 'be', 'are': 'be', 'was': 'be', 'were': 'be', 'been': 'be', 'being': 'be',
+    'has': 'have', 'had': 'have', 'said': 'say', 'made': 'make', 'went': 'go', 'came': 'come',
+    'saw': 'see', 'seen': 'see', 'gave': 'give', 'given': 'give', 'took': 'take', 'taken': 'take',
+    'spoke': 'speak', 'spoken': 'speak', 'knew': 'know', 'known': 'know', 'men': 'man',
+    'women': 'woman', 'children': 'child', 'people': 'person',
+}
+ENGLISH_STOPWORDS = set().union(*CLOSED_CLASS.values()) | {'was', 'is', 'be', 'been', 'are', 'were'}
+WORD_RE = re.compile(r"[A-Za-z]+(?:'[a-z]+)?")
+GLOSS_SPLIT_RE = re.compile(r"[^a-z]+")
+
 def setup_logging():
     logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-def verify_translation(reference, translation):
+def stem(word):
+    """Crude English suffix stripping, good enough to match glosses to inflected forms."""
+    word = word.lower()
+    if word in IRREGULAR_FORMS:
+        return IRREGULAR_FORMS[word]
+    for suffix in ("'s", 'ies', 'ing', 'ed', 'es', 's'):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[:-len(suffix)] + ('y' if suffix == 'ies' else '')
+    return word
+
+def gloss_words(text):
+    return {w for w in GLOSS_SPLIT_RE.split((text or '').lower()) if len(w) > 1}
+
+def load_gloss_dictionary():
+    """Build {strong_number|folded_lemma: [gloss words]} from the local lexicon cache."""
+    glosses = {}
+    for strong, original_word, gloss in lexicon().headwords():
+        words = sorted(gloss_words(gloss))
+        if not words:
+            continue
+        glosses[strong] = words
+        if strong.startswith('G'):
+            glosses.setdefault(fold_greek(original_word), words)
+
+    if not glosses:
+        logging.warning("Lexicon cache is empty (run database/lexicon_cache.py --build); "
+                        "alignment uses closed-class words only")
+    return glosses
+
+def candidate_words(token, glosses):
+    """English words (stemmed) that may render this source token."""
+    words = set()
+    for strong in token['strongs']:
+        words.update(glosses.get(strong, ()))
+    if token['lemma']:
+        words.update(glosses.get(token['lemma'], ()))
+        if token['lemma'] in HEBREW_PREFIXES:
+            words.update(HEBREW_PREFIXES[token['lemma']][1])
+    words.update(CLOSED_CLASS.get(token['pos'], ()))
+    return {stem(w) for w in words}
+
+def align(tokens, english, glosses):
+    """
+    Greedy alignment of source tokens to English words.
+
+    Each source token takes the unused English word whose stem is in its gloss
+    set, preferring the word closest to the token's relative position.
+    """
+    stems = [stem(w) for w in english]
+    used = [False] * len(english)
+    links = []
+    for i, token in enumerate(tokens):
+        candidates = candidate_words(token, glosses)
+        expected = (i / max(len(tokens) - 1, 1)) * max(len(english) - 1, 0)
+        best = None
+        for j, word_stem in enumerate(stems):
+            if used[j] or word_stem not in candidates:
+                continue
+            if best is None or abs(j - expected) < abs(best - expected):
+                best = j
+        if best is not None:
+            used[best] = True
+        links.append((token, best))
+    return links, used
+
+def verify_translation(reference, translation, manuscript=None, glosses=None):
     logging.info(f"Verifying translation for {reference}...")
-    
-    # Placeholder Logic:
-    # 1. Look up morphology for reference (e.g. John 1:1 in greek_nt)
-    # 2. Parsed: "En"(Prep) "arche"(Noun, Dat, Sing) ...
-    # 3. Check if translation "In the beginning" matches Preposition + Noun structure.
-    
-    # Mocking a potential issue
+
+    book, chapter, verse = parse_reference(reference)
+    if verse is None:
+        raise ValueError(f"{reference} is a whole chapter; give a verse (e.g. {reference}:1) "
+                         f"or pass the chapter's translations with --translations")
+    manuscript = manuscript or default_manuscript(book)
+    if glosses is None:
+        glosses = load_gloss_dictionary()
+
+    tokens = get_tokens(manuscript, book, chapter, verse)
+    if not tokens:
+        return {
+            "reference": reference,
+            "status": "ERROR",
+            "morphology_match": "0%",
+            "notes": f"{manuscript} has no morphology for {book} {chapter}:{verse}.",
+        }
+
+    english = WORD_RE.findall(translation)
+    links, used = align(tokens, english, glosses)
+
     issues = []
-    if "Word" in translation and "Logos" not in reference: # specific dummy check
-        pass
-        
+    weight_total = weight_aligned = 0.0
+    alignment = []
+    for token, j in links:
+        weight = 1.0 if token['pos'] in CONTENT_POS else 0.25
+        weight_total += weight
+        target = english[j] if j is not None else None
+        if target is not None:
+            weight_aligned += weight
+            if token['pos'] == 'noun' and token['number']:
+                plural = stem(target) != target.lower() and target.lower().endswith('s')
+                if token['number'] == 'P' and not plural:
+                    issues.append(f"'{token['surface']}' is plural but rendered as '{target}'")
+                elif token['number'] == 'S' and plural:
+                    issues.append(f"'{token['surface']}' is singular but rendered as '{target}'")
+        elif token['pos'] in CONTENT_POS:
+            issues.append(f"No rendering found for '{token['surface']}' ({', '.join(token['strongs']) or token['lemma']})")
+        alignment.append({
+            "source": token['surface'],
+            "strongs": token['strongs'],
+            "pos": token['pos'],
+            "target": target,
+        })
+
+    content_words = [w for w in english if w.lower() not in ENGLISH_STOPWORDS]
+    unaligned = [w for w, u in zip(english, used) if not u and w.lower() not in ENGLISH_STOPWORDS]
+
+    source_coverage = weight_aligned / weight_total if weight_total else 0.0
+    target_coverage = 1 - len(unaligned) / len(content_words) if content_words else 1.0
+    score = (2 * source_coverage + target_coverage) / 3
+
+    if score >= 0.8 and not issues:
+        status, notes = "PASS", f"Accurate alignment with {manuscript} morphology."
+    elif score >= 0.5:
+        status, notes = "REVIEW", f"Partial alignment with {manuscript} morphology."
+    else:
+        status, notes = "FAIL", f"Translation does not follow {manuscript} morphology."
+    if unaligned:
+        issues.append(f"English words without a source token: {', '.join(unaligned)}")
+
     return {
-        "reference": reference,
-        "status": "PASS",
-        "morphology_match": "95%",
-        "notes": "Accurate alignment with Greek morphology."
+        "reference": f"{book} {chapter}:{verse}",
+        "status": status,
+        "morphology_match": f"{round(score * 100)}%",
+        "source_coverage": round(source_coverage, 3),
+        "target_coverage": round(target_coverage, 3),
+        "issues": issues,
+        "alignment": alignment,
+        "notes": notes,
     }
 
+def load_translations(path):
+    """Read a chapter of proposed translations: JSON {verse: text} or TSV 'verse<TAB>text'."""
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.endswith('.json'):
+            return {int(k): v for k, v in json.load(f).items()}
+        rows = (line.rstrip('\n').split('\t', 1) for line in f if line.strip())
+        return {int(num): text for num, text in rows}
+
+def verify_chapter(reference, translations, manuscript=None):
+    """Verify every verse of a chapter, sharing one book index and gloss dictionary."""
+    book, chapter, _ = parse_reference(reference)
+    glosses = load_gloss_dictionary()
+    return [
+        verify_translation(f"{book} {chapter}:{verse}", text, manuscript, glosses)
+        for verse, text in sorted(translations.items())
+    ]
+
 def main():
     setup_logging()
-    
+
     parser = argparse.ArgumentParser(description="Translation Helper Agent")
-    parser.add_argument("--source", type=str, required=True, help="Reference (e.g., John 1:1)")
-    parser.add_argument("--translation", type=str, required=True, help="Proposed translation text")
+    parser.add_argument("--source", type=str, required=True, help="Reference (e.g., John 1:1, or John 1 with --translations)")
+    parser.add_argument("--translation", type=str, help="Proposed translation text")
+    parser.add_argument("--translations", type=str, help="JSON/TSV file of verse -> proposed translation for a whole chapter")
+    parser.add_argument("--manuscript", type=str, help="Morphology source (default: WLC for OT, SBLGNT for NT, LXX otherwise)")
     parser.add_argument("--output", default="translation_check.json", help="Output file")
-    
+
     args = parser.parse_args()
-    
-    result = verify_translation(args.source, args.translation)
-    
+
+    try:
+        if args.translations:
+            result = verify_chapter(args.source, load_translations(args.translations), args.manuscript)
+        elif args.translation:
+            result = verify_translation(args.source, args.translation, args.manuscript)
+        else:
+            parser.error("one of --translation or --translations is required")
+    except ValueError as e:
+        parser.error(str(e))
+
     with open(args.output, 'w') as f:
         json.dump(result, f, indent=2)
-    
+
     logging.info(f"Verification result saved to {args.output}")
 
 if __name__ == "__main__":
+    from corpus import profile_from_argv
+    profile_from_argv()
     main()
@@ -1,59 +1,108 @@
-import os
+import re
 import argparse
 import json
 import logging
+from difflib import SequenceMatcher
+
+import corpus
+
+WORD_RE = re.compile(r"[^\W\d_]+")
 
 def setup_logging():
     logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-def scan_manuscripts(manuscripts_dir, dry_run=False):
-    logging.info(f"Scanning manuscripts in {manuscripts_dir}...")
-    
-    # Placeholder for actual logic:
-    # 1. Iterate through subfolders (greek_nt, codex-sinaiticus, etc.)
-    # 2. Parse text files (assuming consistent naming or structure)
-    # 3. Align verses and compare content
-    
-    found_variants = []
-    
+def comparable_words(text):
+    """Words with accents, breathings and niqqud stripped so only textual differences remain."""
+    return WORD_RE.findall(corpus.fold_greek(text))
+
+def compare_verse(text_a, text_b):
+    """Return (diff_score, changes) where diff_score is 0.0 for identical wording."""
+    words_a, words_b = comparable_words(text_a), comparable_words(text_b)
+    matcher = SequenceMatcher(None, words_a, words_b, autojunk=False)
+    changes = [
+        {"type": tag, "a": ' '.join(words_a[i1:i2]), "b": ' '.join(words_b[j1:j2])}
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes() if tag != 'equal'
+    ]
+    return round(1 - matcher.ratio(), 3), changes
+
+def scan_manuscripts(base, witnesses, books=None, dry_run=False, min_score=0.0):
+    """
+    Compare every verse of the base manuscript with the same verse in each
+    witness, reading both through the shared corpus one book at a time.
+    """
+    logging.info(f"Comparing {base} against {', '.join(witnesses)}...")
+
+    books = books or corpus.list_books(base)
+    if not books:
+        logging.warning(f"No books for {base}")
+        return []
     if dry_run:
-        logging.info("[DRY RUN] Simulating scan...")
-        # Simulate finding a variant
-        found_variants.append({
-            "verse": "John 1:1",
-            "source_a": "Textus Receptus",
-            "text_a": "In the beginning was the Word...",
-            "source_b": "Codex Sinaiticus",
-            "text_b": "In the beginning was the Word...",
-            "diff_score": 0.0 # Identical
-        })
-    else:
-        # TODO: Implement actual directory traversal and text comparison
-        pass
+        logging.info(f"[DRY RUN] Limiting scan to {books[0]}")
+        books = books[:1]
+
+    found_variants = []
+    for book in books:
+        for witness in witnesses:
+            if corpus.load_book(witness, book) is None:
+                continue
+            for verse in corpus.iter_verses(base, book):
+                other = corpus.get_verse(witness, book, verse['chapter'], verse['verse'])
+                reference = f"{book} {verse['chapter']}:{verse['verse']}"
+                if other is None:
+                    found_variants.append({
+                        "verse": reference,
+                        "source_a": base,
+                        "text_a": verse['text'],
+                        "source_b": witness,
+                        "text_b": None,
+                        "diff_score": 1.0,
+                        "changes": [{"type": "omit", "a": verse['text'], "b": ""}],
+                    })
+                    continue
+                diff_score, changes = compare_verse(verse['text'], other['text'])
+                if changes and diff_score >= min_score:
+                    found_variants.append({
+                        "verse": reference,
+                        "source_a": base,
+                        "text_a": verse['text'],
+                        "source_b": witness,
+                        "text_b": other['text'],
+                        "diff_score": diff_score,
+                        "changes": changes,
+                    })
+        logging.info(f"{book}: {len(found_variants)} variants so far")
 
     return found_variants
 
 def generate_report(variants, output_path):
     logging.info(f"Generating report at {output_path}...")
     with open(output_path, 'w') as f:
-        json.dump(variants, f, indent=2)
+        json.dump(variants, f, indent=2, ensure_ascii=False)
     logging.info("Report generated successfully.")
 
 def main():
     setup_logging()
-    
+
     parser = argparse.ArgumentParser(description="Manuscript Variance Spotter")
-    parser.add_argument("--manuscripts-dir", default="manuscripts", help="Path to manuscripts directory")
+    parser.add_argument("--corpus-dir", default=corpus.CORPUS_DIR, help="Directory of corpus snapshots")
+    parser.add_argument("--base", default="SBLGNT", help="Manuscript code to compare against")
+    parser.add_argument("--witnesses", nargs="+", help="Manuscript codes to compare (default: every other snapshot)")
+    parser.add_argument("--book", action="append", help="Limit to a book code (repeatable)")
+    parser.add_argument("--min-score", type=float, default=0.0, help="Only report variants at or above this diff score")
     parser.add_argument("--output", default="critical_apparatus.json", help="Output report file")
     parser.add_argument("--dry-run", action="store_true", help="Run without processing all files")
-    
+
     args = parser.parse_args()
-    
-    base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-    data_dir = os.path.join(base_dir, args.manuscripts_dir)
-    
-    variants = scan_manuscripts(data_dir, args.dry_run)
+
+    corpus.set_corpus_dir(args.corpus_dir)
+    witnesses = args.witnesses or [m for m in corpus.list_manuscripts() if m != args.base]
+    if not witnesses:
+        parser.error(f"no witness manuscripts found in {args.corpus_dir}")
+
+    variants = scan_manuscripts(args.base, witnesses, args.book, args.dry_run, args.min_score)
     generate_report(variants, args.output)
 
 if __name__ == "__main__":
+    from corpus import profile_from_argv
+    profile_from_argv()
     main()